@@ -0,0 +1,147 @@
+"""
+Общие генераторы синтетических данных для бенчмарков.
+
+Запуск всего набора:
+    pytest benchmarks
+
+Сохранение запуска в .benchmarks включается опцией, чтобы обычный
+прогон не оставлял файлов в рабочей копии:
+    pytest benchmarks --benchmark-autosave
+
+сравнение с последним сохранённым запуском:
+    pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:10%
+
+Бенчмарки хранилищ по умолчанию идут на 1k, 10k и 100k объектов,
+большие размеры включаются опцией --max-size:
+    pytest benchmarks/test_repos.py --max-size=1000000
+"""
+import random
+import types
+from dataclasses import field
+
+import pytest
+
+from classic.domain.core import (
+    Entity, Root, HaveInvariants, criteria, invariant,
+)
+
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--max-size', type=int, default=100_000,
+        help='Наибольшее количество объектов в бенчмарках хранилищ',
+    )
+
+
+def pytest_generate_tests(metafunc):
+    if 'size' in metafunc.fixturenames:
+        max_size = metafunc.config.getoption('max_size')
+        metafunc.parametrize(
+            'size', [size for size in SIZES if size <= max_size],
+        )
+
+
+@criteria
+def greater_than(value, other):
+    return value > other
+
+
+@criteria
+def divisible_by(value, divider):
+    return value % divider == 0
+
+
+def make_deep_tree(depth: int):
+    """
+    Дерево глубины depth из чередующихся And и Or.
+    """
+    rule = greater_than(-1)
+    for level in range(depth):
+        if level % 2:
+            rule = rule & ~divisible_by(1_000_003 + level)
+        else:
+            rule = divisible_by(level + 2) | rule
+    return rule
+
+
+def make_wide_tree(width: int):
+    """
+    And из width вложенных Or.
+    """
+    rule = greater_than(-1)
+    for i in range(width):
+        rule = rule & (greater_than(i - 1_000_000) | divisible_by(i + 2))
+    return rule
+
+
+def make_wide_class(width: int) -> type:
+    """
+    Класс сущности с width полями и инвариантом на каждое.
+    """
+    namespace = {'__annotations__': {'id': int}}
+    for i in range(width):
+        name = f'field_{i}'
+        namespace['__annotations__'][name] = int
+
+        def check(self, name=name):
+            return getattr(self, name) >= 0
+
+        check.__name__ = f'check_{name}'
+        namespace[check.__name__] = invariant(check)
+    return types.new_class(
+        f'Wide{width}', (Entity[int], HaveInvariants),
+        exec_body=lambda body: body.update(namespace),
+    )
+
+
+class Line(Entity[int], HaveInvariants):
+    id: int
+    quantity: int
+    price: int
+
+    @invariant
+    def positive_quantity(self):
+        return self.quantity > 0
+
+    @invariant
+    def non_negative_price(self):
+        return self.price >= 0
+
+
+class Order(Root[int], HaveInvariants):
+    id: int
+    customer: str
+    amount: int
+    lines: list[Line] = field(default_factory=list)
+
+    @invariant
+    def has_customer(self):
+        return bool(self.customer)
+
+    @criteria
+    def amount_greater_than(self, amount):
+        return self.amount > amount
+
+    @criteria
+    def customer_is(self, customer):
+        return self.customer == customer
+
+
+def make_order(order_id: int, lines: int = 3, seed: int = 0) -> Order:
+    rng = random.Random(seed + order_id)
+    return Order(
+        id=order_id,
+        customer=f'customer-{rng.randrange(100)}',
+        amount=rng.randrange(10_000),
+        lines=[
+            Line(id=i, quantity=rng.randrange(1, 10), price=rng.randrange(100))
+            for i in range(lines)
+        ],
+    )
+
+
+def make_orders(size: int, lines: int = 3) -> list[Order]:
+    return [make_order(order_id, lines) for order_id in range(size)]
@@ -0,0 +1,43 @@
+"""
+Накладные расходы декораторов check_arg и check_result.
+
+Запуск:
+    pytest benchmarks/test_checks.py
+"""
+from classic.domain.core import check_arg, check_result, criteria
+
+
+@criteria
+def is_positive(value):
+    return value > 0
+
+
+def service(user_id, book_id, comment=None):
+    return book_id
+
+
+checked_service = check_arg('book_id', is_positive())(service)
+checked_twice_service = check_arg(
+    user_id=is_positive(), book_id=is_positive(),
+)(service)
+checked_result_service = check_result(is_positive())(service)
+
+
+def test_plain_call(benchmark):
+    benchmark(service, 1, 2)
+
+
+def test_check_arg_positional(benchmark):
+    benchmark(checked_service, 1, 2)
+
+
+def test_check_arg_keyword(benchmark):
+    benchmark(checked_service, 1, book_id=2)
+
+
+def test_check_arg_two_arguments(benchmark):
+    benchmark(checked_twice_service, 1, 2)
+
+
+def test_check_result(benchmark):
+    benchmark(checked_result_service, 1, 2)
@@ -0,0 +1,55 @@
+"""
+Сравнение скомпилированного дерева критериев с интерпретируемым.
+
+Запуск:
+    pytest benchmarks/test_compile.py
+"""
+import random
+
+import pytest
+
+from classic.domain.core import criteria
+
+
+@criteria
+def greater_than(value, other):
+    return value > other
+
+
+@criteria
+def less_than(value, other):
+    return value < other
+
+
+@criteria
+def divisible_by(value, divider):
+    return value % divider == 0
+
+
+def make_rule(width: int):
+    rule = greater_than(-1)
+    for i in range(width):
+        rule = rule & (
+            less_than(1_000_000 + i) | divisible_by(i + 2)
+        ) & ~divisible_by(1_000_003 + i)
+    return rule
+
+
+CANDIDATES = [random.randrange(1_000_000) for __ in range(10_000)]
+
+
+@pytest.mark.parametrize('width', (1, 5, 20))
+def test_interpreted(benchmark, width):
+    rule = make_rule(width)
+    benchmark(lambda: list(filter(rule, CANDIDATES)))
+
+
+@pytest.mark.parametrize('width', (1, 5, 20))
+def test_compiled(benchmark, width):
+    rule = make_rule(width).compile()
+    benchmark(lambda: list(filter(rule, CANDIDATES)))
+
+
+def test_compilation(benchmark):
+    rule = make_rule(20)
+    benchmark(rule.compile)
@@ -0,0 +1,37 @@
+"""
+Построение и вычисление глубоких и широких деревьев And/Or.
+
+Запуск:
+    pytest benchmarks/test_criteria.py
+"""
+import pytest
+
+from .conftest import make_deep_tree, make_wide_tree
+
+
+@pytest.mark.parametrize('depth', [10, 100])
+def test_build_deep_tree(benchmark, depth):
+    benchmark(make_deep_tree, depth)
+
+
+@pytest.mark.parametrize('width', [10, 100])
+def test_build_wide_tree(benchmark, width):
+    benchmark(make_wide_tree, width)
+
+
+@pytest.mark.parametrize('depth', [10, 100])
+def test_evaluate_deep_tree(benchmark, depth):
+    rule = make_deep_tree(depth)
+    benchmark(rule.is_satisfied_by, 12_345)
+
+
+@pytest.mark.parametrize('width', [10, 100])
+def test_evaluate_wide_tree(benchmark, width):
+    rule = make_wide_tree(width)
+    benchmark(rule.is_satisfied_by, 12_345)
+
+
+@pytest.mark.parametrize('width', [10, 100])
+def test_optimize_wide_tree(benchmark, width):
+    rule = make_wide_tree(width)
+    benchmark(rule.optimize)
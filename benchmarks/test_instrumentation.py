@@ -0,0 +1,52 @@
+"""
+Накладные расходы измерения вычислений критериев.
+
+Запуск:
+    pytest benchmarks/test_instrumentation.py
+"""
+import pytest
+
+from classic.domain.core import (
+    criteria, StatsSink, CallbackSink,
+    enable_instrumentation, disable_instrumentation,
+)
+
+
+@criteria
+def is_positive(value):
+    return value > 0
+
+
+@criteria
+def is_even(value):
+    return value % 2 == 0
+
+
+rule = is_positive() & ~is_even()
+
+
+@pytest.fixture
+def sinks(request):
+    enable_instrumentation(*request.param)
+    yield
+    disable_instrumentation()
+
+
+def test_never_enabled(benchmark):
+    benchmark(rule.is_satisfied_by, 3)
+
+
+def test_disabled(benchmark):
+    enable_instrumentation(StatsSink())
+    disable_instrumentation()
+
+    benchmark(rule.is_satisfied_by, 3)
+
+
+@pytest.mark.parametrize('sinks', [
+    (),
+    (StatsSink(),),
+    (CallbackSink(lambda criteria_, result, elapsed: None),),
+], indirect=True, ids=['no_sinks', 'stats', 'callback'])
+def test_enabled(benchmark, sinks):
+    benchmark(rule.is_satisfied_by, 3)
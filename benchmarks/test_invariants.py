@@ -0,0 +1,65 @@
+"""
+Сборка инвариантов широких классов и проверка больших агрегатов.
+
+Запуск:
+    pytest benchmarks/test_invariants.py
+"""
+from timeit import repeat
+
+import pytest
+
+from classic.domain.core.invariants import build_invariants
+from classic.domain.core.manifest import (
+    make_manifest, load_manifest, clear_manifest,
+)
+
+from .conftest import make_order, make_wide_class
+
+
+@pytest.mark.parametrize('width', [10, 100])
+def test_build_invariants(benchmark, width):
+    cls = make_wide_class(width)
+    benchmark(build_invariants, cls)
+
+
+@pytest.mark.parametrize('width', [10, 100])
+def test_build_invariants_from_manifest(benchmark, width):
+    cls = make_wide_class(width)
+    load_manifest(make_manifest([cls]))
+    try:
+        benchmark(build_invariants, cls)
+    finally:
+        clear_manifest()
+
+
+def test_manifest_is_cheaper_than_reflection():
+    classes = [make_wide_class(100) for __ in range(20)]
+    for number, cls in enumerate(classes):
+        cls.__qualname__ = f'{cls.__qualname__}_{number}'
+
+    def build_all():
+        for cls in classes:
+            build_invariants(cls)
+
+    manifest = make_manifest(classes)
+    reflection = min(repeat(build_all, number=1, repeat=5))
+    load_manifest(manifest)
+    try:
+        from_manifest = min(repeat(build_all, number=1, repeat=5))
+    finally:
+        clear_manifest()
+
+    assert from_manifest < reflection / 2
+
+
+@pytest.mark.parametrize('width', [10, 100])
+def test_check_wide_class(benchmark, width):
+    cls = make_wide_class(width)
+    instance = cls(0, *range(width))
+    benchmark(instance.invariants.is_satisfied)
+
+
+@pytest.mark.parametrize('lines', [10, 1_000])
+def test_check_aggregate(benchmark, lines):
+    order = make_order(1, lines=lines)
+    benchmark(order.invariants.is_satisfied)
@@ -0,0 +1,89 @@
+"""
+Память и доступ к атрибутам Value и Entity с __dict__ и со слотами.
+
+Размер экземпляра записывается в extra_info результата.
+
+Запуск:
+    pytest benchmarks/test_layout.py
+"""
+import tracemalloc
+
+import pytest
+
+from classic.domain.core import Value, Entity
+
+
+class Money(Value):
+    amount: int
+    currency: str
+
+
+class SlottedMoney(Value, slots=True):
+    amount: int
+    currency: str
+
+
+class Account(Entity[int]):
+    id: int
+    owner: str
+    balance: int
+
+
+class SlottedAccount(Entity[int], slots=True):
+    id: int
+    owner: str
+    balance: int
+
+
+VALUES = [Money, SlottedMoney]
+ENTITIES = [Account, SlottedAccount]
+
+
+def bytes_per_object(factory, count: int = 10_000) -> float:
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        objects = [factory(i) for i in range(count)]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    assert len(objects) == count
+    return (after - before) / count
+
+
+@pytest.mark.parametrize('cls', VALUES, ids=lambda cls: cls.__name__)
+def test_value_creation(benchmark, cls):
+    benchmark.extra_info['bytes_per_object'] = bytes_per_object(
+        lambda i: cls(i, 'RUB'),
+    )
+    benchmark(cls, 1, 'RUB')
+
+
+@pytest.mark.parametrize('cls', VALUES, ids=lambda cls: cls.__name__)
+def test_value_hash(benchmark, cls):
+    value = cls(1, 'RUB')
+    benchmark(hash, value)
+
+
+@pytest.mark.parametrize('cls', VALUES, ids=lambda cls: cls.__name__)
+def test_value_attribute_access(benchmark, cls):
+    value = cls(1, 'RUB')
+    benchmark(lambda: value.amount)
+
+
+@pytest.mark.parametrize('cls', ENTITIES, ids=lambda cls: cls.__name__)
+def test_entity_creation(benchmark, cls):
+    benchmark.extra_info['bytes_per_object'] = bytes_per_object(
+        lambda i: cls(i, 'owner', 0),
+    )
+    benchmark(cls, 1, 'owner', 0)
+
+
+@pytest.mark.parametrize('cls', ENTITIES, ids=lambda cls: cls.__name__)
+def test_entity_attribute_update(benchmark, cls):
+    account = cls(1, 'owner', 0)
+
+    def update():
+        account.balance = account.balance + 1
+
+    benchmark(update)
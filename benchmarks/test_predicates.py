@@ -0,0 +1,42 @@
+"""
+Вызов PredicateCriteria и доступ к критериям через дескрипторы.
+
+Запуск:
+    pytest benchmarks/test_predicates.py
+"""
+from classic.domain.core import criteria
+
+from .conftest import Order, make_order
+
+
+@criteria
+def is_positive(value):
+    return value > 0
+
+
+ORDER = make_order(1)
+RULE = Order.amount_greater_than(10)
+
+
+def test_predicate_direct_call(benchmark):
+    benchmark(is_positive.criteria_cls.predicate, 1)
+
+
+def test_predicate_criteria_dispatch(benchmark):
+    benchmark(RULE.is_satisfied_by, ORDER)
+
+
+def test_predicate_criteria_call(benchmark):
+    benchmark(RULE, ORDER)
+
+
+def test_predicate_criteria_construction(benchmark):
+    benchmark(Order.amount_greater_than, 10)
+
+
+def test_bound_unformed_criteria(benchmark):
+    benchmark(lambda: ORDER.amount_greater_than(10))
+
+
+def test_bound_formed_criteria(benchmark):
+    benchmark(lambda: ORDER.invariants())
@@ -0,0 +1,105 @@
+"""
+Операции InMemoryRepo на 1k - 1M объектов.
+
+Запуск:
+    pytest benchmarks/test_repos.py --max-size=1000000
+"""
+import pytest
+
+from classic.domain.core import (
+    Cursor, DictStorage, InMemoryRepo, Isolation, SortedStorage,
+)
+
+from .conftest import Order, make_orders
+
+
+class OrderRepo(InMemoryRepo[Order, int]):
+    pass
+
+
+class SortedOrderRepo(InMemoryRepo[Order, int]):
+    storage = SortedStorage
+
+
+@pytest.fixture
+def orders(size):
+    return make_orders(size, lines=1)
+
+
+@pytest.fixture
+def repo(orders):
+    repo = OrderRepo(isolation=Isolation.NONE)
+    repo.save(*orders)
+    return repo
+
+
+def test_save(benchmark, orders):
+    def save():
+        OrderRepo(isolation=Isolation.NONE).save(*orders)
+
+    benchmark(save)
+
+
+def test_get(benchmark, repo, size):
+    benchmark(repo.get, size // 2)
+
+
+def test_find(benchmark, repo):
+    rule = Order.amount_greater_than(5_000) & Order.customer_is('customer-1')
+    benchmark(lambda: list(repo.find(rule)))
+
+
+def test_find_first_page(benchmark, repo):
+    rule = Order.amount_greater_than(5_000)
+    benchmark(lambda: list(repo.find(rule, order_by='-amount', limit=20)))
+
+
+def test_count(benchmark, repo):
+    benchmark(repo.count, Order.amount_greater_than(5_000))
+
+
+@pytest.fixture(
+    params=[DictStorage, SortedStorage], ids=lambda cls: cls.__name__,
+)
+def storage_repo(request, orders):
+    repo_cls = OrderRepo if request.param is DictStorage else SortedOrderRepo
+    repo = repo_cls(isolation=Isolation.NONE)
+    repo.save(*orders)
+    return repo
+
+
+def test_storage_save(benchmark, orders):
+    def save():
+        SortedOrderRepo(isolation=Isolation.NONE).save(*orders)
+
+    benchmark(save)
+
+
+def test_storage_count_all(benchmark, storage_repo):
+    benchmark(storage_repo.count)
+
+
+def test_storage_exists(benchmark, storage_repo):
+    benchmark(storage_repo.exists, Order.amount_greater_than(5_000))
+
+
+def test_storage_last_page_by_id(benchmark, storage_repo, size):
+    cursor = Cursor('id', (size - 40, size - 40))
+    benchmark(storage_repo.find_page, None, order_by='id', after=cursor)
+
+
+def test_storage_first_by_id(benchmark, storage_repo):
+    benchmark(lambda: list(storage_repo.find(None, order_by='-id', limit=20)))
+
+
+def test_concurrent_find(benchmark, orders):
+    repo = OrderRepo(isolation=Isolation.SNAPSHOT, concurrent=True)
+    repo.save(*orders)
+    rule = Order.amount_greater_than(5_000) & Order.customer_is('customer-1')
+    benchmark(lambda: list(repo.find(rule)))
+
+
+def test_concurrent_save_one(benchmark, orders):
+    repo = OrderRepo(isolation=Isolation.SNAPSHOT, concurrent=True)
+    repo.save(*orders)
+    benchmark(repo.save, orders[0])
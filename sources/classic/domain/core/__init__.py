@@ -1,12 +1,28 @@
 from .entities import Value, Entity, Root
 from .errors import CriteriaNotSatisfied
 
-from .criteria import Criteria, And, Or, Xor, Invert
+from .criteria import Criteria, And, Or, Xor, Invert, NormalForm
+from .vectorization import Batch
 from .predicate_wrapping import Predicate, PredicateCriteria, criteria
 from .invariants import invariant, is_invariant, HaveInvariants
+from .asynchronous import (
+    AsyncCriteria, async_criteria, is_satisfied, must_be_satisfied,
+)
 from .checks import check_arg, check_result
+from .memoization import CriteriaMemo
+from .instrumentation import (
+    StatsSink, SpanSink, CallbackSink,
+    enable_instrumentation, disable_instrumentation, reset_instrumentation,
+    instrumented,
+)
+from .parallel import ParallelEvaluator, Backend
+from .evaluation import (
+    AdaptiveEvaluator, CriteriaStatistics, CriteriaStats,
+)
 
 from .repos import (
-    Repo, InMemoryRepo, ShelveRepo,
-    translate_for, is_translator,
+    Repo, ChangeSet, InMemoryRepo, Isolation, ShelveRepo, SQLiteRepo,
+    DictStorage, SortedStorage, Index, HashIndex, SortedIndex, Cursor, Page,
+    translate_for, is_translator, CriteriaTranslator, SqlTranslator,
+    AsyncRepo, AsyncInMemoryRepo,
 )
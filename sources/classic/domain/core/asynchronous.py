@@ -0,0 +1,202 @@
+import asyncio
+import inspect
+from typing import Awaitable, Callable, Iterable, ParamSpec
+
+from .criteria import (
+    Criteria, CompositeCriteria, UnaryCriteria, BinaryCriteria,
+    And, Or, Xor, Invert, DomainObject,
+)
+from .errors import CriteriaNotSatisfied
+from .predicate_wrapping import (
+    PredicateCriteria, CriteriaDescriptor, make_predicate_criteria,
+)
+
+
+Params = ParamSpec('Params')
+AsyncPredicate = Callable[[DomainObject, Params], Awaitable[bool]]
+
+
+class AsyncCriteria(Criteria[DomainObject]):
+    """
+    Базовый класс для критериев, проверка которых требует ввода-вывода.
+
+    Такие критерии комбинируются с обычными через &, |, ^ и ~,
+    а проверяются только асинхронно, функциями is_satisfied
+    и must_be_satisfied из этого модуля.
+    """
+    __slots__ = ()
+
+    async def is_satisfied_by_async(self, candidate: DomainObject) -> bool:
+        raise NotImplementedError
+
+    def is_satisfied_by(self, candidate: DomainObject) -> bool:
+        raise TypeError(
+            f'{self.__class__.__name__} is asynchronous, '
+            f'use "await is_satisfied(criteria, candidate)"'
+        )
+
+
+class AsyncPredicateCriteria(
+    AsyncCriteria[DomainObject],
+    PredicateCriteria[DomainObject, Params],
+):
+    __slots__ = ()
+
+    async def is_satisfied_by_async(self, candidate: DomainObject) -> bool:
+        return await self.predicate(candidate, *self.args, **self.kwargs)
+
+
+def async_criteria(
+    fn: AsyncPredicate[DomainObject, Params],
+) -> CriteriaDescriptor[DomainObject, Params]:
+    """
+    Декоратор, аналогичный criteria, для предикатов-корутин:
+
+    >>> @async_criteria
+    ... async def within_quota(user, amount):
+    ...     return await quotas.remaining(user.id) >= amount
+    ...
+    ... await is_satisfied(is_active() & within_quota(10), user)
+    True
+    """
+    assert inspect.iscoroutinefunction(fn)
+
+    return CriteriaDescriptor[DomainObject, Params](
+        make_predicate_criteria(fn, base=AsyncPredicateCriteria)
+    )
+
+
+def _nested(criteria: Criteria) -> tuple[Criteria, ...]:
+    if isinstance(criteria, CompositeCriteria):
+        return criteria.nested_criteria
+    if isinstance(criteria, UnaryCriteria):
+        return criteria.nested_criteria,
+    if isinstance(criteria, BinaryCriteria):
+        return criteria.left, criteria.right
+    return ()
+
+
+def _async_nodes(criteria: Criteria, found: set[int] = None) -> set[int]:
+    """
+    Возвращает id узлов дерева, в которых есть асинхронные критерии.
+    Каждый узел обходится один раз.
+    """
+    if found is None:
+        found = set()
+    nested = _nested(criteria)
+    for node in nested:
+        _async_nodes(node, found)
+    if (
+        isinstance(criteria, AsyncCriteria) or
+        any(id(node) in found for node in nested)
+    ):
+        found.add(id(criteria))
+    return found
+
+
+def is_async(criteria: Criteria) -> bool:
+    """
+    Есть ли в дереве критериев асинхронные критерии.
+    """
+    if isinstance(criteria, AsyncCriteria):
+        return True
+    return any(map(is_async, _nested(criteria)))
+
+
+async def _first_decisive(
+    nested_criteria: Iterable[Criteria[DomainObject]],
+    candidate: DomainObject,
+    decisive: bool,
+    asynchronous: set[int],
+) -> bool:
+    """
+    Проверяет критерии конкурентно. Как только один из них вернул
+    decisive, отменяет остальные и возвращает decisive.
+    """
+    tasks = [
+        asyncio.ensure_future(_evaluate(criteria, candidate, asynchronous))
+        for criteria in nested_criteria
+    ]
+    try:
+        for completed in asyncio.as_completed(tasks):
+            if bool(await completed) is decisive:
+                return decisive
+        return not decisive
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def _evaluate(
+    criteria: Criteria[DomainObject],
+    candidate: DomainObject,
+    asynchronous: set[int],
+) -> bool:
+    if id(criteria) not in asynchronous:
+        return criteria.is_satisfied_by(candidate)
+
+    if isinstance(criteria, AsyncCriteria):
+        return bool(await criteria.is_satisfied_by_async(candidate))
+
+    if isinstance(criteria, (And, Or)):
+        decisive = isinstance(criteria, Or)
+        running = []
+        for nested in criteria.nested_criteria:
+            if id(nested) in asynchronous:
+                running.append(nested)
+                continue
+            # Асинхронные критерии подряд проверяются конкурентно,
+            # следующий синхронный - только после них
+            if running and await _first_decisive(
+                running, candidate, decisive, asynchronous,
+            ) is decisive:
+                return decisive
+            running = []
+            if bool(nested.is_satisfied_by(candidate)) is decisive:
+                return decisive
+        if running:
+            return await _first_decisive(
+                running, candidate, decisive, asynchronous,
+            )
+        return not decisive
+
+    if isinstance(criteria, Invert):
+        return not await _evaluate(
+            criteria.nested_criteria, candidate, asynchronous,
+        )
+
+    if isinstance(criteria, Xor):
+        left, right = await asyncio.gather(
+            _evaluate(criteria.left, candidate, asynchronous),
+            _evaluate(criteria.right, candidate, asynchronous),
+        )
+        return left ^ right
+
+    return criteria.is_satisfied_by(candidate)
+
+
+async def is_satisfied(
+    criteria: Criteria[DomainObject],
+    candidate: DomainObject,
+) -> bool:
+    """
+    Проверяет кандидата на соответствие дереву критериев, в котором
+    могут быть асинхронные критерии.
+
+    Вложенные критерии And и Or проверяются в объявленном порядке,
+    с ранним выходом, как в синхронном случае, так что предыдущие
+    критерии защищают следующие. Только идущие подряд асинхронные
+    критерии проверяются конкурентно, с отменой оставшихся,
+    как только результат известен.
+    """
+    return await _evaluate(criteria, candidate, _async_nodes(criteria))
+
+
+async def must_be_satisfied(
+    criteria: Criteria[DomainObject],
+    candidate: DomainObject,
+) -> None:
+    if not is_async(criteria):
+        criteria.must_be_satisfied_by(candidate)
+    elif not await is_satisfied(criteria, candidate):
+        raise CriteriaNotSatisfied(criteria)
@@ -1,52 +1,165 @@
 from functools import wraps
 import inspect
+from typing import Any, Callable
 
 from classic.components import doublewrap
 
+from .asynchronous import is_satisfied, must_be_satisfied
 from .criteria import Criteria
 
 
 _EMPTY = object()
 
+ArgumentGetter = Callable[[tuple, dict], Any]
+
+
+def argument_getter(fn: Callable, name: str) -> ArgumentGetter:
+    """
+    Один раз, по сигнатуре fn, определяет, где при вызове находится
+    аргумент name, и возвращает функцию, достающую его из (args, kwargs).
+    Если аргумент не передан и у него нет значения по умолчанию,
+    функция возвращает _EMPTY.
+    """
+    signature = inspect.signature(fn)
+    try:
+        parameter = signature.parameters[name]
+    except KeyError:
+        raise TypeError(
+            f'{fn.__qualname__}() has no argument {name!r}'
+        ) from None
+
+    index = list(signature.parameters).index(name)
+    default = parameter.default
+    if default is inspect.Parameter.empty:
+        default = _EMPTY
+
+    if parameter.kind is inspect.Parameter.POSITIONAL_ONLY:
+        def getter(args, kwargs):
+            return args[index] if len(args) > index else default
+
+    elif parameter.kind is inspect.Parameter.POSITIONAL_OR_KEYWORD:
+        def getter(args, kwargs):
+            if len(args) > index:
+                return args[index]
+            return kwargs.get(name, default)
+
+    elif parameter.kind is inspect.Parameter.KEYWORD_ONLY:
+        def getter(args, kwargs):
+            return kwargs.get(name, default)
+
+    elif parameter.kind is inspect.Parameter.VAR_POSITIONAL:
+        def getter(args, kwargs):
+            return args[index:]
+
+    else:
+        def getter(args, kwargs):
+            bound = signature.bind_partial(*args, **kwargs)
+            return bound.arguments.get(name, {})
+
+    return getter
+
 
 @doublewrap
-def check_arg(fn, prop: str, criteria: Criteria, skip: bool = False):
+def check_arg(
+    fn, prop: str = None,
+    criteria: Criteria = None,
+    skip: bool = False,
+    **criteria_by_arg: Criteria,
+):
     """
     Декоратор, проверяющий указанные аргумент на соответствие критерию
     при вызове декорируемой функции.
 
+    Положение аргумента в вызове определяется один раз при декорировании,
+    а не на каждый вызов.
+
     >>> from classic.domain.core import criteria, check_arg
     ...
     ... @criteria
     ... def is_authenticated(identity):
     ...     return identity is not None
     ...
-    ... @check_arg('identity', is_authenticated)
+    ... @check_arg('identity', is_authenticated())
     ... def some_method(identity, book_id):
     ...     pass
     ...
     ... some_method(identity=1)
     True
+
+    Несколько аргументов можно проверить одним декоратором, передав
+    критерии именованными аргументами (кроме имён prop, criteria и skip):
+    >>> @check_arg(identity=is_authenticated(), book_id=book_exists())
+    ... def some_method(identity, book_id):
+    ...     pass
+
+    С skip=True при несоответствии любого из аргументов функция
+    не вызывается и возвращается None.
+
+    Корутины оборачиваются асинхронно, тогда критерии могут быть
+    асинхронными (см. AsyncCriteria).
     """
 
-    signature = inspect.signature(fn)
+    if prop is not None:
+        criteria_by_arg[prop] = criteria
+
+    checks = tuple(
+        (argument_getter(fn, name), criteria_)
+        for name, criteria_ in criteria_by_arg.items()
+    )
+
+    if inspect.iscoroutinefunction(fn):
+
+        @wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            for get_argument, criteria_ in checks:
+                candidate = get_argument(args, kwargs)
+                if candidate is _EMPTY:
+                    continue
+                if skip:
+                    if not await is_satisfied(criteria_, candidate):
+                        return None
+                else:
+                    await must_be_satisfied(criteria_, candidate)
+
+            return await fn(*args, **kwargs)
+
+        return async_wrapper
+
+    if len(checks) == 1:
+        (get_argument, criteria_), = checks
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            candidate = get_argument(args, kwargs)
+            if candidate is not _EMPTY:
+                if skip:
+                    if not criteria_.is_satisfied_by(candidate):
+                        return None
+                else:
+                    criteria_.must_be_satisfied_by(candidate)
+
+            return fn(*args, **kwargs)
+
+        return wrapper
 
     @wraps(fn)
     def wrapper(*args, **kwargs):
-        candidate = signature.bind(args, kwargs).arguments[prop]
-
-        if skip and not criteria.is_satisfied_by(candidate):
-            return None
-        else:
-            criteria.must_be_satisfied_by(candidate)
+        for get_argument, criteria_ in checks:
+            candidate = get_argument(args, kwargs)
+            if candidate is _EMPTY:
+                continue
+            if skip:
+                if not criteria_.is_satisfied_by(candidate):
+                    return None
+            else:
+                criteria_.must_be_satisfied_by(candidate)
 
         return fn(*args, **kwargs)
 
     return wrapper
 
 
-@doublewrap
-def check_result(fn, criteria: Criteria, skip: bool = False):
+def check_result(criteria: Criteria, skip: bool = False):
     """
     Декоратор, проверяющий результат функции на соответствие заданному критерию.
 
@@ -56,11 +169,11 @@ def check_result(fn, criteria: Criteria, skip: bool = False):
     ... def is_none(value):
     ...     return value is not None
     ...
-    ... @check_result(is_none)
+    ... @check_result(is_none())
     ... def returns(identity):
     ...     return 1
     ...
-    ... @check_result(is_none)
+    ... @check_result(is_none())
     ... def return_none(identity):
     ...     return None
     ...
@@ -68,17 +181,43 @@ def check_result(fn, criteria: Criteria, skip: bool = False):
     1
     >>> return_none()
     CriteriaNotSatisfied
+
+    Корутины оборачиваются асинхронно, тогда критерий может быть
+    асинхронным (см. AsyncCriteria).
     """
+    # doublewrap здесь не подходит: критерий сам по себе callable,
+    # и @check_result(some_criteria) был бы принят за декорирование критерия.
 
-    @wraps(fn)
-    def wrapper(*args, **kwargs):
-        result = fn(*args, **kwargs)
+    def decorator(fn):
 
-        if skip and not criteria.is_satisfied_by(result):
-            return None
-        else:
-            criteria.must_be_satisfied_by(result)
+        if inspect.iscoroutinefunction(fn):
 
-        return result
+            @wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                result = await fn(*args, **kwargs)
 
-    return wrapper
+                if skip:
+                    if not await is_satisfied(criteria, result):
+                        return None
+                else:
+                    await must_be_satisfied(criteria, result)
+
+                return result
+
+            return async_wrapper
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            result = fn(*args, **kwargs)
+
+            if skip:
+                if not criteria.is_satisfied_by(result):
+                    return None
+            else:
+                criteria.must_be_satisfied_by(result)
+
+            return result
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,34 @@
+from typing import Any, Callable
+
+
+class Compiler:
+    """
+    Собирает дерево критериев в одну функцию от кандидата.
+
+    Каждый критерий описывает себя выражением на Python
+    (см. Criteria.compile_expression), ссылаясь на кандидата по имени
+    CANDIDATE, а нужные ему объекты (предикаты, аргументы, методы)
+    связывает с пространством имён функции через bind.
+
+    Используется внутри библиотеки, см. Criteria.compile.
+    """
+
+    CANDIDATE = 'candidate'
+
+    namespace: dict[str, Any]
+
+    def __init__(self) -> None:
+        self.namespace = {}
+
+    def bind(self, value: Any) -> str:
+        name = f'_{len(self.namespace)}'
+        self.namespace[name] = value
+        return name
+
+    def build(self, expression: str) -> Callable[[Any], bool]:
+        source = (
+            f'def compiled({self.CANDIDATE}):\n'
+            f'    return True if {expression} else False\n'
+        )
+        exec(compile(source, '<compiled criteria>', 'exec'), self.namespace)
+        return self.namespace['compiled']
@@ -0,0 +1,310 @@
+import dataclasses
+import datetime
+import decimal
+import enum
+import uuid
+from copy import deepcopy
+from typing import (
+    Any, Callable, TypeVar, Union, get_args, get_origin, get_type_hints,
+)
+from types import NoneType, UnionType
+
+from .entities import Value, Entity, DIRTY_FIELDS, CHECK_STATE
+
+
+T = TypeVar('T')
+
+IMMUTABLE = (
+    NoneType, bool, int, float, complex, str, bytes,
+    decimal.Decimal, uuid.UUID, enum.Enum,
+    datetime.date, datetime.time, datetime.timedelta, datetime.timezone,
+)
+
+_copiers: dict[type, Callable[[Any], Any]] = {}
+
+
+def _is_shared(hint: Any) -> bool:
+    """
+    Можно ли не копировать значение, объявленное с такой аннотацией.
+    """
+    if hint is Any:
+        return False
+
+    origin = get_origin(hint)
+    if origin in (Union, UnionType):
+        return all(_is_shared(arg) for arg in get_args(hint))
+    if origin in (tuple, frozenset):
+        return all(
+            arg is Ellipsis or _is_shared(arg)
+            for arg in get_args(hint)
+        )
+    if origin is not None:
+        return False
+
+    return isinstance(hint, type) and issubclass(hint, (*IMMUTABLE, Value))
+
+
+def copy_object(obj: T) -> T:
+    """
+    Копирует доменный объект или контейнер с доменными объектами.
+
+    Неизменяемые значения (в т.ч. Value) не копируются, сущности
+    копируются сгенерированной для их класса функцией (см. make_copier),
+    списки, словари и множества копируются поэлементно,
+    всё остальное - через deepcopy.
+    """
+    cls = obj.__class__
+    copier = _copiers.get(cls)
+    if copier is not None:
+        return copier(obj)
+
+    if isinstance(obj, (*IMMUTABLE, Value)):
+        return obj
+    if isinstance(obj, Entity):
+        return make_copier(cls)(obj)
+    if cls is list or cls is FrozenList:
+        return [copy_object(item) for item in obj]
+    if cls is dict or cls is FrozenDict:
+        return {key: copy_object(value) for key, value in obj.items()}
+    if cls is set or cls is FrozenSet:
+        return {copy_object(item) for item in obj}
+    return deepcopy(obj)
+
+
+def _field_copy_expression(hint: Any, value: str) -> str | None:
+    """
+    Возвращает выражение, копирующее значение поля с аннотацией hint,
+    или None, если значение можно разделять между копиями.
+    """
+    if _is_shared(hint):
+        return None
+
+    origin = get_origin(hint)
+    args = get_args(hint)
+    if origin is list and args:
+        if _is_shared(args[0]):
+            return f'list({value})'
+        return f'[copy_object(item) for item in {value}]'
+    if origin is set and args and _is_shared(args[0]):
+        return f'set({value})'
+    if origin is dict and len(args) == 2 and _is_shared(args[1]):
+        return f'dict({value})'
+
+    return f'copy_object({value})'
+
+
+def make_copier(cls: type[T]) -> Callable[[T], T]:
+    """
+    Генерирует функцию копирования экземпляров датакласса cls.
+
+    Функция копирует __dict__ объекта и поля из слотов, заменяя копиями
+    только те поля, аннотации которых допускают изменяемые значения:
+    поля с Value и неизменяемыми типами остаются общими с оригиналом,
+    списки неизменяемых значений копируются поверхностно, сущности
+    и всё остальное - через copy_object.
+
+    В отличие от deepcopy, ссылки между объектами внутри агрегата
+    не сохраняются, поэтому агрегат должен быть деревом, без циклов.
+    """
+    copier = _copiers.get(cls)
+    if copier is not None:
+        return copier
+
+    try:
+        hints = get_type_hints(cls)
+    except (NameError, TypeError):
+        hints = {}
+
+    lines = _copier_lines(cls, hints)
+    namespace = {
+        'cls': cls,
+        'new': object.__new__,
+        'set_attr': object.__setattr__,
+        'copy_object': copy_object,
+    }
+    exec(
+        compile('\n'.join(lines), f'<copier of {cls.__qualname__}>', 'exec'),
+        namespace,
+    )
+    copier = _copiers[cls] = namespace['copy']
+    return copier
+
+
+def _slot_names(cls: type) -> set[str]:
+    names = set()
+    for klass in cls.__mro__:
+        slots = vars(klass).get('__slots__', ())
+        names.update((slots,) if isinstance(slots, str) else slots)
+    return names
+
+
+def _copier_lines(cls: type, hints: dict[str, Any]) -> list[str]:
+    has_dict = any('__dict__' in vars(klass) for klass in cls.__mro__[:-1])
+    slots = _slot_names(cls)
+
+    lines = [
+        'def copy(source):',
+        '    target = new(cls)',
+    ]
+    if has_dict:
+        lines += [
+            '    state = source.__dict__.copy()',
+            # Копия ещё не проверялась на инварианты
+            f'    state.pop({DIRTY_FIELDS!r}, None)',
+            f'    state.pop({CHECK_STATE!r}, None)',
+        ]
+
+    for field in dataclasses.fields(cls):
+        expression = _field_copy_expression(
+            hints.get(field.name, Any), 'value',
+        )
+        if field.name in slots:
+            # DIRTY_FIELDS, CHECK_STATE и кешированный хеш не копируются
+            lines.append(f'    value = source.{field.name}')
+            if expression is not None:
+                lines += [
+                    f'    if value is not None:',
+                    f'        value = {expression}',
+                ]
+            lines.append(f'    set_attr(target, {field.name!r}, value)')
+        elif expression is not None:
+            lines += [
+                f'    value = state.get({field.name!r})',
+                f'    if value is not None:',
+                f'        state[{field.name!r}] = {expression}',
+            ]
+
+    if has_dict:
+        lines.append('    set_attr(target, "__dict__", state)')
+    lines.append('    return target')
+    return lines
+
+
+def _read_only(self, *args: Any, **kwargs: Any) -> None:
+    raise TypeError(f'{self.__class__.__name__} is read-only')
+
+
+def _read_only_container(base: type, mutators: tuple[str, ...]) -> type:
+    namespace = {name: _read_only for name in mutators}
+    namespace['__slots__'] = ()
+    # Копии и восстановленные после pickle контейнеры изменяемы
+    namespace['__reduce__'] = lambda self: (base, (base(self),))
+    return type(f'Frozen{base.__name__.capitalize()}', (base,), namespace)
+
+
+FrozenList = _read_only_container(list, (
+    '__setitem__', '__delitem__', '__iadd__', '__imul__',
+    'append', 'extend', 'insert', 'pop', 'remove', 'clear',
+    'sort', 'reverse',
+))
+FrozenDict = _read_only_container(dict, (
+    '__setitem__', '__delitem__', '__ior__',
+    'clear', 'pop', 'popitem', 'setdefault', 'update',
+))
+FrozenSet = _read_only_container(set, (
+    '__ior__', '__iand__', '__isub__', '__ixor__',
+    'add', 'discard', 'remove', 'pop', 'clear', 'update',
+    'intersection_update', 'difference_update',
+    'symmetric_difference_update',
+))
+
+_frozen_classes: dict[type, type] = {}
+
+
+def _frozen_setattr(self, name: str, value: Any) -> None:
+    raise dataclasses.FrozenInstanceError(
+        f'cannot assign to field {name!r} of a frozen snapshot',
+    )
+
+
+def _frozen_delattr(self, name: str) -> None:
+    raise dataclasses.FrozenInstanceError(
+        f'cannot delete field {name!r} of a frozen snapshot',
+    )
+
+
+def _thaw(cls: type[T], state: dict[str, Any]) -> T:
+    obj = object.__new__(cls)
+    for name, value in state.items():
+        object.__setattr__(obj, name, value)
+    return obj
+
+
+def _state(obj: Any) -> dict[str, Any]:
+    state = {
+        field.name: getattr(obj, field.name)
+        for field in dataclasses.fields(obj)
+    }
+    extra = getattr(obj, '__dict__', None)
+    if extra is not None:
+        state = {**extra, **state}
+        state.pop(DIRTY_FIELDS, None)
+        state.pop(CHECK_STATE, None)
+    return state
+
+
+def frozen_class(cls: type[T]) -> type[T]:
+    """
+    Возвращает наследника класса сущности cls с тем же именем
+    и теми же слотами, экземпляры которого нельзя изменять.
+    copy_object, deepcopy и pickle превращают их обратно в cls.
+    """
+    frozen = _frozen_classes.get(cls)
+    if frozen is not None:
+        return frozen
+
+    base = cls
+
+    def __reduce_ex__(self, protocol):
+        return _thaw, (base, _state(self))
+
+    frozen = type(cls)(cls.__name__, (cls,), {
+        # Поля уже объявлены в cls, датакласс не пересоздаётся
+        '__dataclass_fields__': cls.__dataclass_fields__,
+        '__slots__': (),
+        '__module__': cls.__module__,
+        '__qualname__': cls.__qualname__,
+        '__setattr__': _frozen_setattr,
+        '__delattr__': _frozen_delattr,
+        '__reduce_ex__': __reduce_ex__,
+    })
+    _frozen_classes[cls] = _frozen_classes[frozen] = frozen
+    _copiers[frozen] = make_copier(cls)
+    return frozen
+
+
+def freeze_object(obj: T) -> T:
+    """
+    Возвращает неизменяемую копию доменного объекта или контейнера
+    с доменными объектами: сущности становятся экземплярами
+    frozen_class, списки, словари и множества - FrozenList, FrozenDict
+    и FrozenSet (наследниками list, dict и set без изменяющих методов).
+    Неизменяемые значения (в т.ч. Value) не копируются, всё остальное
+    копируется через deepcopy. Как и для copy_object, агрегат должен
+    быть деревом, без циклов.
+
+    Изменить такой объект можно, только скопировав его (copy_object).
+    """
+    cls = obj.__class__
+    if isinstance(obj, (*IMMUTABLE, Value)):
+        return obj
+    if isinstance(obj, Entity):
+        if _frozen_classes.get(cls) is cls:
+            return obj
+        return _thaw(frozen_class(cls), {
+            name: freeze_object(value)
+            for name, value in _state(obj).items()
+        })
+    if cls is list or cls is FrozenList:
+        return FrozenList(map(freeze_object, obj))
+    if cls is tuple:
+        return tuple(map(freeze_object, obj))
+    if cls is dict or cls is FrozenDict:
+        return FrozenDict(
+            (key, freeze_object(value)) for key, value in obj.items()
+        )
+    if cls is set or cls is FrozenSet:
+        return FrozenSet(map(freeze_object, obj))
+    if cls is frozenset:
+        return frozenset(map(freeze_object, obj))
+    return deepcopy(obj)
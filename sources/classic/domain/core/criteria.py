@@ -1,13 +1,33 @@
-from typing import Optional, Sequence, Generic, TypeVar, overload
+from enum import Enum
+from itertools import product
+from typing import (
+    Callable, Iterable, Optional, Sequence, Generic, TypeVar, overload,
+)
 
 from classic.domain.core import entities
 
+from .compilation import Compiler
 from .errors import CriteriaNotSatisfied
+from .vectorization import (
+    Batch, Mask, as_mask, full_mask, compress, expand,
+    mask_or, mask_xor, mask_not, mask_any, mask_all,
+)
 
 
 DomainObject = TypeVar('DomainObject', bound=entities.DomainObject)
 
 
+class NormalForm(Enum):
+    """
+    Нормальная форма, к которой Criteria.optimize приводит дерево.
+
+    DNF - Or из And (дизъюнктивная), CNF - And из Or (конъюнктивная).
+    Листьями в обоих случаях остаются критерии и их отрицания.
+    """
+    DNF = 'dnf'
+    CNF = 'cnf'
+
+
 class Criteria(Generic[DomainObject]):
     """
     Базовый класс для критериев.
@@ -61,6 +81,7 @@ class Criteria(Generic[DomainObject]):
     >>> list(filter(old_and_obsolete, [Task(1), Task(2), Task(3)]))
     Task(1)
     """
+    __slots__ = ()
 
     def __and__(
         self, other: 'Criteria[DomainObject]',
@@ -89,17 +110,133 @@ class Criteria(Generic[DomainObject]):
         return self.is_satisfied_by(candidate)
 
     def must_be_satisfied_by(self, candidate: DomainObject) -> None:
-        if not self.is_satisfied_by(candidate):
-            raise CriteriaNotSatisfied
+        remainder = self.remainder_unsatisfied_by(candidate)
+        if remainder is not None:
+            raise CriteriaNotSatisfied(remainder)
 
     def remainder_unsatisfied_by(
         self, candidate: DomainObject
     ) -> Optional['Criteria[DomainObject]']:
+        """
+        Проверяет кандидата за один проход и возвращает None,
+        если критерий удовлетворён, иначе - ту часть дерева критериев,
+        которая не удовлетворена. Листья остатка (см. leaves) - критерии,
+        которые не выполнились, со своими аргументами.
+
+        Вычисляются те же критерии, что и в is_satisfied_by: And
+        останавливается на первом невыполненном, так что критерии-стражи
+        (например, проверка на None) защищают следующие за ними.
+
+        >>> criteria = is_published() & (can_edit(user) | is_admin(user))
+        ... criteria.remainder_unsatisfied_by(book).leaves()
+        [can_edit(user), is_admin(user)]
+        """
         if self.is_satisfied_by(candidate):
             return None
         else:
             return self
 
+    def leaves(self) -> list['Criteria[DomainObject]']:
+        """
+        Критерии дерева, не являющиеся And и Or.
+        """
+        return [self]
+
+    def describe(self) -> str:
+        """
+        Короткое описание критерия для сообщений об ошибках.
+        """
+        return f'{self.__class__.__qualname__}()'
+
+    def __repr__(self) -> str:
+        return self.describe()
+
+    def simplify(self) -> 'Criteria[DomainObject]':
+        """
+        Возвращает упрощённое эквивалентное дерево, см. optimize.
+        Листовые критерии возвращают себя.
+        """
+        return self
+
+    def optimize(
+        self, normal_form: NormalForm = None,
+    ) -> 'Criteria[DomainObject]':
+        """
+        Возвращает новое эквивалентное дерево критериев, не изменяя
+        исходное: константы (ReturnsTrue, ReturnsFalse) свёрнуты,
+        двойные отрицания убраны, вложенные And и Or одного вида
+        раскрыты, структурно равные критерии внутри And и Or
+        оставлены по одному, а x & ~x и x | ~x заменены константами.
+
+        С normal_form дерево дополнительно приводится к DNF или CNF,
+        например, для трансляторов, понимающих только такую форму.
+        Размер нормальной формы может расти экспоненциально.
+
+        >>> (is_new() & ReturnsTrue() & ~~is_new()).optimize()
+        is_new()
+        >>> (a() & (b() | c())).optimize(NormalForm.DNF)
+        Or(And(a(), b()), And(a(), c()))
+        """
+        optimized = self.simplify()
+        if normal_form is None:
+            return optimized
+
+        if normal_form is NormalForm.DNF:
+            outer, inner = Or, And
+        else:
+            outer, inner = And, Or
+        return outer(*(
+            inner(*clause)
+            for clause in _clauses(_push_negations(optimized), outer, inner)
+        )).simplify()
+
+    def compile(self) -> Callable[[DomainObject], bool]:
+        """
+        Собирает дерево критериев в одну функцию от кандидата, в которой
+        предикаты и их аргументы связаны заранее. Результат эквивалентен
+        is_satisfied_by, но без диспетчеризации по дереву на каждый вызов.
+
+        Если дерево слишком глубокое для компиляции, возвращает
+        is_satisfied_by как есть.
+
+        >>> rule = with_param(1) & ~without_param()
+        ... is_satisfied_by = rule.compile()
+        ... list(filter(is_satisfied_by, candidates))
+        """
+        compiler = Compiler()
+        try:
+            return compiler.build(self.compile_expression(compiler))
+        except (RecursionError, SyntaxError, MemoryError):
+            return self.is_satisfied_by
+
+    def compile_expression(self, compiler: Compiler) -> str:
+        """
+        Возвращает выражение на Python, вычисляющее критерий
+        для кандидата с именем compiler.CANDIDATE.
+        """
+        return f'{compiler.bind(self.is_satisfied_by)}({compiler.CANDIDATE})'
+
+    def mask(self, batch: Batch) -> Mask:
+        """
+        Проверяет сразу всю пачку кандидатов, возвращает булеву маску.
+
+        По умолчанию проверяет кандидатов по одному, составные критерии
+        комбинируют маски вложенных, а критерии из предикатов могут
+        использовать векторизованную реализацию,
+        см. CriteriaDescriptor.vectorized.
+        """
+        return as_mask(map(self.is_satisfied_by, batch.rows()))
+
+    def filter_many(
+        self, objects: Iterable[DomainObject] | Batch,
+    ) -> list[DomainObject]:
+        """
+        Возвращает список объектов, удовлетворяющих критерию,
+        проверяя их пачкой через mask.
+        """
+        batch = objects if isinstance(objects, Batch) else Batch(objects)
+        return compress(batch.rows(), self.mask(batch))
+
     @overload
     def __get__(
         self, instance: DomainObject,
@@ -118,13 +255,15 @@ class Criteria(Generic[DomainObject]):
         self, instance: DomainObject,
         owner: type[DomainObject],
     ):
-        if instance:
+        if instance is not None:
             return BoundFormedCriteria(instance, self)
         else:
             return self
 
 
 class BoundFormedCriteria(Generic[DomainObject]):
+    __slots__ = ('instance', 'criteria')
+
     instance: DomainObject
     criteria: Criteria[DomainObject]
 
@@ -151,14 +290,68 @@ class CompositeCriteria(Criteria[DomainObject]):
 
     Используется внутри библиотеки.
     """
+    __slots__ = ('nested_criteria',)
+
     nested_criteria: Sequence[Criteria[DomainObject]]
 
     def __init__(self, *criteria: Criteria[DomainObject]):
-        self.nested_criteria = list(criteria)
+        self.nested_criteria = criteria
+
+    def __eq__(self, other: object) -> bool:
+        return (
+            other.__class__ is self.__class__ and
+            self.nested_criteria == other.nested_criteria
+        )
+
+    def __hash__(self) -> int:
+        return hash((self.__class__, self.nested_criteria))
+
+    def _simplify_nested(
+        self, kind: type['CompositeCriteria'],
+        absorbing: type['ConstantCriteria'],
+    ) -> Sequence[Criteria[DomainObject]] | Criteria[DomainObject]:
+        """
+        Упрощает вложенные критерии, раскрывая вложенные критерии
+        того же вида и убирая повторы и нейтральные константы.
+        Возвращает критерий, если результат известен заранее
+        (встретилась поглощающая константа или x вместе с ~x).
+        """
+        nested = []
+        for criteria in self.nested_criteria:
+            criteria = criteria.simplify()
+            if isinstance(criteria, absorbing):
+                return criteria
+            if isinstance(criteria, ConstantCriteria):
+                continue
+            if isinstance(criteria, kind):
+                nested.extend(criteria.nested_criteria)
+            else:
+                nested.append(criteria)
+
+        nested = _unique(nested)
+        for criteria in nested:
+            if (
+                isinstance(criteria, Invert) and
+                criteria.nested_criteria in nested
+            ):
+                return absorbing()
+        return nested
 
     def is_satisfied_by(self, candidate: DomainObject) -> bool:
         raise NotImplementedError
 
+    def leaves(self) -> list[Criteria[DomainObject]]:
+        return [
+            leaf
+            for criteria in self.nested_criteria
+            for leaf in criteria.leaves()
+        ]
+
+    def describe(self) -> str:
+        return '(' + f' {self.operator} '.join(
+            criteria.describe() for criteria in self.nested_criteria
+        ) + ')'
+
 
 class And(CompositeCriteria[DomainObject]):
     """
@@ -167,36 +360,59 @@ class And(CompositeCriteria[DomainObject]):
     Нужен для обработки логической операции И между несколькими критериями.
     В норме используется только под капотом и вручную не инстанцируется.
     """
+    __slots__ = ()
+
+    operator = '&'
 
     def __and__(self, other: Criteria[DomainObject]) -> Criteria[DomainObject]:
         if isinstance(other, And):
-            self.nested_criteria += other.nested_criteria
-        else:
-            self.nested_criteria += (other,)
-        return self
+            return And(*self.nested_criteria, *other.nested_criteria)
+        return And(*self.nested_criteria, other)
+
+    def simplify(self) -> Criteria[DomainObject]:
+        nested = self._simplify_nested(And, ReturnsFalse)
+        if isinstance(nested, Criteria):
+            return nested
+        if not nested:
+            return ReturnsTrue()
+        if len(nested) == 1:
+            return nested[0]
+        return And(*nested)
 
     def is_satisfied_by(self, candidate: DomainObject) -> bool:
-        return all([
-            criteria.is_satisfied_by(candidate)
+        for criteria in self.nested_criteria:
+            if not criteria.is_satisfied_by(candidate):
+                return False
+        return True
+
+    def compile_expression(self, compiler: Compiler) -> str:
+        return '(' + ' and '.join(
+            criteria.compile_expression(compiler)
             for criteria in self.nested_criteria
-        ])
+        ) + ')'
+
+    def mask(self, batch: Batch) -> Mask:
+        # Как и is_satisfied_by, следующий критерий проверяет только
+        # строки, на которых выполнены предыдущие
+        result = full_mask(len(batch), True)
+        rows = batch
+        for criteria in self.nested_criteria:
+            result = expand(result, criteria.mask(rows))
+            if not mask_any(result):
+                break
+            rows = batch.take(result)
+        return result
 
     def remainder_unsatisfied_by(
         self, candidate: DomainObject,
     ) -> Criteria[DomainObject] | None:
-
-        non_satisfied = [
-            criteria
-            for criteria in self.nested_criteria
-            if not criteria.is_satisfied_by(candidate)
-        ]
-        if not non_satisfied:
-            return None
-        if len(non_satisfied) == 1:
-            return non_satisfied[0]
-        if len(non_satisfied) == len(self.nested_criteria):
-            return self
-        return And(*non_satisfied)
+        # Как и is_satisfied_by, останавливается на первом невыполненном:
+        # следующие критерии могут рассчитывать на выполнение предыдущих
+        for criteria in self.nested_criteria:
+            remainder = criteria.remainder_unsatisfied_by(candidate)
+            if remainder is not None:
+                return remainder
+        return None
 
 
 class Or(CompositeCriteria[DomainObject]):
@@ -206,19 +422,66 @@ class Or(CompositeCriteria[DomainObject]):
     Нужен для обработки логической операции ИЛИ между несколькими критериями.
     В норме используется только под капотом и вручную не инстанцируется.
     """
+    __slots__ = ()
+
+    operator = '|'
 
     def __or__(self, other: Criteria[DomainObject]) -> Criteria[DomainObject]:
         if isinstance(other, Or):
-            self.nested_criteria += other.nested_criteria
-        else:
-            self.nested_criteria += (other,)
-        return self
+            return Or(*self.nested_criteria, *other.nested_criteria)
+        return Or(*self.nested_criteria, other)
+
+    def simplify(self) -> Criteria[DomainObject]:
+        nested = self._simplify_nested(Or, ReturnsTrue)
+        if isinstance(nested, Criteria):
+            return nested
+        if not nested:
+            return ReturnsFalse()
+        if len(nested) == 1:
+            return nested[0]
+        return Or(*nested)
 
     def is_satisfied_by(self, candidate: DomainObject) -> bool:
-        return any([
-            criteria.is_satisfied_by(candidate)
+        for criteria in self.nested_criteria:
+            if criteria.is_satisfied_by(candidate):
+                return True
+        return False
+
+    def compile_expression(self, compiler: Compiler) -> str:
+        return '(' + ' or '.join(
+            criteria.compile_expression(compiler)
             for criteria in self.nested_criteria
-        ])
+        ) + ')'
+
+    def mask(self, batch: Batch) -> Mask:
+        # Следующий критерий проверяет только строки,
+        # на которых не выполнен ни один из предыдущих
+        result = full_mask(len(batch), False)
+        undecided = full_mask(len(batch), True)
+        rows = batch
+        for criteria in self.nested_criteria:
+            result = mask_or(result, expand(undecided, criteria.mask(rows)))
+            if mask_all(result):
+                break
+            undecided = mask_not(result)
+            rows = batch.take(undecided)
+        return result
+
+    def remainder_unsatisfied_by(
+        self, candidate: DomainObject,
+    ) -> Criteria[DomainObject] | None:
+        remainders = []
+        for criteria in self.nested_criteria:
+            remainder = criteria.remainder_unsatisfied_by(candidate)
+            if remainder is None:
+                return None
+            remainders.append(remainder)
+
+        if not remainders:
+            return self
+        if len(remainders) == 1:
+            return remainders[0]
+        return Or(*remainders)
 
 
 class UnaryCriteria(Criteria[DomainObject]):
@@ -227,11 +490,22 @@ class UnaryCriteria(Criteria[DomainObject]):
 
     Используется внутри библиотеки.
     """
+    __slots__ = ('nested_criteria',)
+
     nested_criteria: Criteria[DomainObject]
 
     def __init__(self, criteria: Criteria[DomainObject]) -> None:
         self.nested_criteria = criteria
 
+    def __eq__(self, other: object) -> bool:
+        return (
+            other.__class__ is self.__class__ and
+            self.nested_criteria == other.nested_criteria
+        )
+
+    def __hash__(self) -> int:
+        return hash((self.__class__, self.nested_criteria))
+
 
 class Invert(UnaryCriteria[DomainObject]):
     """
@@ -240,10 +514,37 @@ class Invert(UnaryCriteria[DomainObject]):
     Нужен для обработки логической операции НЕ над вложенным критериями.
     В норме используется только под капотом и вручную не инстанцируется.
     """
+    __slots__ = ()
 
     def is_satisfied_by(self, candidate: DomainObject) -> bool:
         return not self.nested_criteria.is_satisfied_by(candidate)
 
+    def simplify(self) -> Criteria[DomainObject]:
+        nested = self.nested_criteria.simplify()
+        if isinstance(nested, Invert):
+            return nested.nested_criteria
+        if isinstance(nested, ReturnsTrue):
+            return ReturnsFalse()
+        if isinstance(nested, ReturnsFalse):
+            return ReturnsTrue()
+        return Invert(nested)
+
+    def compile_expression(self, compiler: Compiler) -> str:
+        return f'(not {self.nested_criteria.compile_expression(compiler)})'
+
+    def mask(self, batch: Batch) -> Mask:
+        return mask_not(self.nested_criteria.mask(batch))
+
+    def describe(self) -> str:
+        return f'~{self.nested_criteria.describe()}'
+
+    def remainder_unsatisfied_by(
+        self, candidate: DomainObject,
+    ) -> Criteria[DomainObject] | None:
+        if self.nested_criteria.is_satisfied_by(candidate):
+            return self
+        return None
+
 
 class BinaryCriteria(Criteria[DomainObject]):
     """
@@ -252,6 +553,8 @@ class BinaryCriteria(Criteria[DomainObject]):
 
     Используется внутри библиотеки.
     """
+    __slots__ = ('left', 'right')
+
     left: Criteria
     right: Criteria
 
@@ -262,6 +565,16 @@ class BinaryCriteria(Criteria[DomainObject]):
         self.left = left
         self.right = right
 
+    def __eq__(self, other: object) -> bool:
+        return (
+            other.__class__ is self.__class__ and
+            self.left == other.left and
+            self.right == other.right
+        )
+
+    def __hash__(self) -> int:
+        return hash((self.__class__, self.left, self.right))
+
     def is_satisfied_by(self, candidate: DomainObject) -> bool:
         raise NotImplementedError
 
@@ -274,6 +587,7 @@ class Xor(BinaryCriteria[DomainObject]):
     над вложенными критериями. В норме используется
     только под капотом и вручную не инстанцируется.
     """
+    __slots__ = ()
 
     def is_satisfied_by(self, candidate: DomainObject) -> bool:
         return (
@@ -281,14 +595,175 @@ class Xor(BinaryCriteria[DomainObject]):
             self.right.is_satisfied_by(candidate)
         )
 
+    def simplify(self) -> Criteria[DomainObject]:
+        left, right = self.left.simplify(), self.right.simplify()
+        if isinstance(left, ConstantCriteria):
+            left, right = right, left
+        if isinstance(right, ReturnsFalse):
+            return left
+        if isinstance(right, ReturnsTrue):
+            return Invert(left).simplify()
+        if left == right:
+            return ReturnsFalse()
+        if Invert(left).simplify() == right:
+            return ReturnsTrue()
+        return Xor(left, right)
+
+    def compile_expression(self, compiler: Compiler) -> str:
+        return (
+            f'((not {self.left.compile_expression(compiler)}) != '
+            f'(not {self.right.compile_expression(compiler)}))'
+        )
+
+    def mask(self, batch: Batch) -> Mask:
+        return mask_xor(self.left.mask(batch), self.right.mask(batch))
+
+    def remainder_unsatisfied_by(
+        self, candidate: DomainObject,
+    ) -> Criteria[DomainObject] | None:
+        left = self.left.remainder_unsatisfied_by(candidate)
+        right = self.right.remainder_unsatisfied_by(candidate)
+        if (left is None) is not (right is None):
+            return None
+        if left is None:
+            # Выполнены оба
+            return self
+        return Xor(left, right)
+
+    def describe(self) -> str:
+        return f'({self.left.describe()} ^ {self.right.describe()})'
+
+
+class ConstantCriteria(Criteria[DomainObject]):
+    """
+    Интерфейс критерия с постоянным результатом.
+    Все экземпляры одного класса равны между собой.
+
+    Используется внутри библиотеки.
+    """
+    __slots__ = ()
+
+    def __eq__(self, other: object) -> bool:
+        return other.__class__ is self.__class__
+
+    def __hash__(self) -> int:
+        return hash(self.__class__)
 
-class ReturnsTrue(Criteria[DomainObject]):
+
+class ReturnsTrue(ConstantCriteria[DomainObject]):
+    __slots__ = ()
 
     def is_satisfied_by(self, candidate: DomainObject) -> bool:
         return True
 
+    def compile_expression(self, compiler: Compiler) -> str:
+        return 'True'
+
+    def mask(self, batch: Batch) -> Mask:
+        return full_mask(len(batch), True)
 
-class ReturnsFalse(Criteria[DomainObject]):
+
+class ReturnsFalse(ConstantCriteria[DomainObject]):
+    __slots__ = ()
 
     def is_satisfied_by(self, candidate: DomainObject) -> bool:
         return False
+
+    def compile_expression(self, compiler: Compiler) -> str:
+        return 'False'
+
+    def mask(self, batch: Batch) -> Mask:
+        return full_mask(len(batch), False)
+
+
+def _unique(
+    criteria: Iterable[Criteria[DomainObject]],
+) -> list[Criteria[DomainObject]]:
+    """
+    Убирает структурно равные критерии, сохраняя порядок.
+    Нехешируемые критерии сравниваются перебором.
+    """
+    unique = []
+    seen = set()
+    for item in criteria:
+        try:
+            if item in seen:
+                continue
+            seen.add(item)
+        except TypeError:
+            if item in unique:
+                continue
+        unique.append(item)
+    return unique
+
+
+def _push_negations(
+    criteria: Criteria[DomainObject], negate: bool = False,
+) -> Criteria[DomainObject]:
+    """
+    Приводит дерево к виду, в котором отрицания стоят только
+    над листовыми критериями, а Xor выражен через And и Or.
+    """
+    if isinstance(criteria, Invert):
+        return _push_negations(criteria.nested_criteria, not negate)
+
+    if isinstance(criteria, (And, Or)):
+        kind = And if isinstance(criteria, And) else Or
+        if negate:
+            kind = Or if kind is And else And
+        return kind(*(
+            _push_negations(nested, negate)
+            for nested in criteria.nested_criteria
+        ))
+
+    if isinstance(criteria, Xor):
+        left, right = criteria.left, criteria.right
+        if negate:
+            expanded = (left & right) | (~left & ~right)
+        else:
+            expanded = (left & ~right) | (~left & right)
+        return _push_negations(expanded)
+
+    if isinstance(criteria, ConstantCriteria):
+        if negate:
+            return ReturnsFalse() if criteria.is_satisfied_by(None) \
+                else ReturnsTrue()
+        return criteria
+
+    return Invert(criteria) if negate else criteria
+
+
+def _clauses(
+    criteria: Criteria[DomainObject],
+    outer: type[CompositeCriteria],
+    inner: type[CompositeCriteria],
+) -> list[list[Criteria[DomainObject]]]:
+    """
+    Раскладывает дерево без Xor и с отрицаниями только над листьями
+    в список предложений: outer из inner. Для DNF outer - Or,
+    inner - And, для CNF наоборот.
+    """
+    if isinstance(criteria, outer):
+        return [
+            clause
+            for nested in criteria.nested_criteria
+            for clause in _clauses(nested, outer, inner)
+        ]
+
+    if isinstance(criteria, inner):
+        return [
+            [item for clause in combination for item in clause]
+            for combination in product(*(
+                _clauses(nested, outer, inner)
+                for nested in criteria.nested_criteria
+            ))
+        ]
+
+    if isinstance(criteria, ConstantCriteria):
+        # Нейтральный элемент inner даёт одно пустое предложение,
+        # нейтральный элемент outer - ни одного
+        if criteria.is_satisfied_by(None) is (inner is And):
+            return [[]]
+        return []
+
+    return [[criteria]]
@@ -1,45 +1,137 @@
 from abc import ABCMeta
 from dataclasses import dataclass
-from typing import Hashable, Generic, TypeVar
+from typing import Any, Callable, Hashable, Generic, TypeVar
+
+
+ID = TypeVar('ID', bound=Hashable)
+
+# Имя атрибута экземпляра с множеством полей, изменённых после последней
+# успешной проверки инвариантов. Отсутствие атрибута означает,
+# что объект ещё не проверялся. См. HaveInvariants(incremental=True).
+DIRTY_FIELDS = '__dirty_fields__'
+
+# Имя атрибута экземпляра с состоянием последней успешной проверки:
+# владельцы объекта и снимки полей с вложенными объектами.
+CHECK_STATE = '__check_state__'
+
+
+class CachedHash:
+    """
+    Место под вычисленный хеш в экземплярах Value со слотами.
+    """
+    __slots__ = ('_cached_hash',)
+
+
+class TracksChanges:
+    """
+    Место под DIRTY_FIELDS и CHECK_STATE в экземплярах Entity со слотами
+    и инкрементальной проверкой инвариантов.
+    """
+    __slots__ = (DIRTY_FIELDS, CHECK_STATE)
+
+
+def _cached_hash(hash_: Callable[[Any], int]) -> Callable[[Any], int]:
+
+    def __hash__(self) -> int:
+        try:
+            return self._cached_hash
+        except AttributeError:
+            value = hash_(self)
+            object.__setattr__(self, '_cached_hash', value)
+            return value
+
+    return __hash__
+
+
+def _with_mixin(bases: tuple[type, ...], mixin: type) -> tuple[type, ...]:
+    if any(issubclass(base, mixin) for base in bases):
+        return bases
+    return (*bases, mixin)
 
 
 class ValueMeta(ABCMeta):
+    """
+    Делает из класса неизменяемый датакласс со сравнением по значению.
 
-    def __new__(mcs, *args, **kwargs):
-        return dataclass(
-            super().__new__(mcs, *args, **kwargs),
-            frozen=True, eq=True, order=False,
+    С параметром класса slots=True поля хранятся в слотах, без __dict__,
+    а хеш вычисляется один раз и запоминается:
+
+    >>> class Money(Value, slots=True):
+    ...     amount: Decimal
+    ...     currency: str
+
+    Слоты не наследуются: их нужно указывать на каждом классе.
+    """
+
+    def __new__(mcs, name, bases, namespace, slots=False, **kwargs):
+        if '__dataclass_fields__' in namespace:
+            # Повторное создание класса внутри dataclass(slots=True)
+            return super().__new__(mcs, name, bases, namespace, **kwargs)
+
+        if slots:
+            bases = _with_mixin(bases, CachedHash)
+
+        cls = dataclass(
+            super().__new__(mcs, name, bases, namespace, **kwargs),
+            frozen=True, eq=True, order=False, slots=slots,
         )
+        if slots and cls.__hash__ is not None:
+            cls.__hash__ = _cached_hash(cls.__hash__)
+        return cls
 
 
 class EntityMeta(ABCMeta):
+    """
+    Делает из класса изменяемый датакласс со сравнением по идентичности.
 
-    def __new__(mcs, *args, **kwargs):
-        return dataclass(
-            super().__new__(mcs, *args, **kwargs),
-            frozen=False, eq=False, order=False,
-        )
+    С параметром класса slots=True поля хранятся в слотах, без __dict__:
 
+    >>> class Line(Entity[int], HaveInvariants, slots=True):
+    ...     id: int
+    ...     quantity: int
 
-ID = TypeVar('ID', bound=Hashable)
+    Слоты не наследуются: их нужно указывать на каждом классе.
+    """
+
+    def __new__(mcs, name, bases, namespace, slots=False, **kwargs):
+        if '__dataclass_fields__' in namespace:
+            # Повторное создание класса внутри dataclass(slots=True)
+            return super().__new__(mcs, name, bases, namespace, **kwargs)
+
+        if slots:
+            incremental = kwargs.get('incremental')
+            if incremental is None:
+                incremental = any(
+                    getattr(base, '__incremental_invariants__', False)
+                    for base in bases
+                )
+            if incremental:
+                bases = _with_mixin(bases, TracksChanges)
+
+        return dataclass(
+            super().__new__(mcs, name, bases, namespace, **kwargs),
+            frozen=False, eq=False, order=False, slots=slots,
+        )
 
 
 class DomainObject:
-    pass
+    __slots__ = ()
 
 
 @dataclass(eq=False)
 class HaveID(Generic[ID]):
+    __slots__ = ()
+
     id: ID
 
 
 class Value(DomainObject, metaclass=ValueMeta):
-    pass
+    __slots__ = ()
 
 
 class Entity(DomainObject, HaveID[ID], metaclass=EntityMeta):
-    pass
+    __slots__ = ()
 
 
 class Root(Entity, HaveID[ID], metaclass=EntityMeta):
-    pass
+    __slots__ = ()
@@ -1,4 +1,33 @@
+class CriteriaNotSatisfied(BaseException):
+    """
+    Кандидат не удовлетворяет критерию.
 
+    remainder - неудовлетворённая часть критерия
+    (см. Criteria.remainder_unsatisfied_by), failures - её листья,
+    то есть невыполненные критерии с их аргументами:
+
+    >>> rule = Book.is_author(1) | Book.is_published()
+    ... try:
+    ...     rule.must_be_satisfied_by(Book(author_id=2, published=False))
+    ... except CriteriaNotSatisfied as error:
+    ...     error.failures, str(error)
+    ([Book.is_author(1), Book.is_published()],
+     'Book.is_author(1), Book.is_published()')
+    """
+
+    def __init__(self, remainder: object = None) -> None:
+        if remainder is None:
+            super().__init__()
+        else:
+            super().__init__(remainder)
+        self.remainder = remainder
+
+    @property
+    def failures(self) -> list:
+        if self.remainder is None:
+            return []
+        return self.remainder.leaves()
+
+    def __str__(self) -> str:
+        return ', '.join(criteria.describe() for criteria in self.failures)
 
-class CriteriaNotSatisfied(BaseException):
-    pass
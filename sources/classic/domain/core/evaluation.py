@@ -0,0 +1,300 @@
+from collections import OrderedDict, deque
+from time import perf_counter
+from typing import Callable, Generic
+
+from .criteria import (
+    Criteria, CompositeCriteria, And, Or, Xor, Invert,
+    ReturnsTrue, ReturnsFalse, DomainObject,
+)
+
+
+class CriteriaStats:
+    """
+    Накопленная статистика вычислений одного класса критериев:
+    количество вызовов, сколько из них удовлетворились,
+    суммарное время вычисления в секундах.
+
+    Для перцентилей хранит время последних samples_size вычислений.
+    """
+    calls: int
+    satisfied: int
+    elapsed: float
+    samples: deque[float]
+
+    def __init__(self, samples_size: int = 1024) -> None:
+        self.calls = 0
+        self.satisfied = 0
+        self.elapsed = 0.0
+        self.samples = deque(maxlen=samples_size)
+
+    def record(self, result: bool, elapsed: float) -> None:
+        self.calls += 1
+        self.satisfied += bool(result)
+        self.elapsed += elapsed
+        self.samples.append(elapsed)
+
+    def percentile(self, percent: float) -> float:
+        """
+        Время вычисления, которое не превысили percent процентов
+        последних вычислений. Без вычислений - 0.
+        """
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = round(percent / 100 * (len(ordered) - 1))
+        return ordered[min(max(index, 0), len(ordered) - 1)]
+
+    @property
+    def cost(self) -> float:
+        """
+        Среднее время одного вычисления.
+        Для ещё не вызывавшихся критериев - 0, чтобы они быстрее
+        попали в начало очереди и набрали статистику.
+        """
+        if not self.calls:
+            return 0.0
+        return self.elapsed / self.calls
+
+    @property
+    def satisfied_ratio(self) -> float:
+        """
+        Доля вызовов, в которых критерий удовлетворился.
+        Для ещё не вызывавшихся критериев - 0.5.
+        """
+        if not self.calls:
+            return 0.5
+        return self.satisfied / self.calls
+
+
+class CriteriaStatistics:
+    """
+    Статистика вычислений, собранная по классам критериев.
+
+    Для листовых критериев (в т.ч. классов, созданных декоратором criteria)
+    хранит CriteriaStats, для составных оценивает стоимость и вероятность
+    удовлетворения по вложенным критериям.
+    """
+    by_class: dict[type[Criteria], CriteriaStats]
+
+    def __init__(self) -> None:
+        self.by_class = {}
+
+    def __getitem__(self, criteria_cls: type[Criteria]) -> CriteriaStats:
+        stats = self.by_class.get(criteria_cls)
+        if stats is None:
+            stats = self.by_class[criteria_cls] = CriteriaStats()
+        return stats
+
+    def record(
+        self, criteria_cls: type[Criteria],
+        result: bool, elapsed: float,
+    ) -> None:
+        self[criteria_cls].record(result, elapsed)
+
+    def estimate(self, criteria: Criteria) -> tuple[float, float]:
+        """
+        Возвращает оценку (стоимость, вероятность удовлетворения) критерия.
+        """
+        if isinstance(criteria, And):
+            cost, probability = 0.0, 1.0
+            for nested in criteria.nested_criteria:
+                nested_cost, nested_probability = self.estimate(nested)
+                cost += probability * nested_cost
+                probability *= nested_probability
+            return cost, probability
+
+        if isinstance(criteria, Or):
+            cost, not_probability = 0.0, 1.0
+            for nested in criteria.nested_criteria:
+                nested_cost, nested_probability = self.estimate(nested)
+                cost += not_probability * nested_cost
+                not_probability *= 1 - nested_probability
+            return cost, 1 - not_probability
+
+        if isinstance(criteria, Invert):
+            cost, probability = self.estimate(criteria.nested_criteria)
+            return cost, 1 - probability
+
+        if isinstance(criteria, Xor):
+            left_cost, left = self.estimate(criteria.left)
+            right_cost, right = self.estimate(criteria.right)
+            return (
+                left_cost + right_cost,
+                left * (1 - right) + right * (1 - left),
+            )
+
+        if isinstance(criteria, ReturnsTrue):
+            return 0.0, 1.0
+
+        if isinstance(criteria, ReturnsFalse):
+            return 0.0, 0.0
+
+        stats = self[criteria.__class__]
+        return stats.cost, stats.satisfied_ratio
+
+    def order(
+        self, criteria: CompositeCriteria,
+    ) -> list[Criteria]:
+        """
+        Упорядочивает вложенные критерии And/Or так, чтобы дешёвые
+        и наиболее часто решающие исход вычисления шли первыми.
+
+        Для And ключ - стоимость, делённая на вероятность НЕ удовлетвориться,
+        для Or - стоимость, делённая на вероятность удовлетвориться.
+        """
+        is_and = isinstance(criteria, And)
+
+        def rank(nested: Criteria) -> float:
+            cost, probability = self.estimate(nested)
+            decisive = 1 - probability if is_and else probability
+            if decisive <= 0:
+                return float('inf')
+            return cost / decisive
+
+        return sorted(criteria.nested_criteria, key=rank)
+
+
+class AdaptiveEvaluator(Generic[DomainObject]):
+    """
+    Вычислитель критериев с ранним выходом и адаптивным порядком.
+
+    Вложенные критерии And и Or вычисляются в порядке, построенном
+    по накопленной статистике, и перестраиваются каждые reorder_every
+    вычислений узла. Время и результат каждого листового критерия
+    записываются в статистику его класса.
+
+    Порядок вложенных критериев может меняться, поэтому предикаты
+    не должны иметь побочных эффектов. Если вложенный критерий,
+    вычисленный не в объявленном порядке, бросил исключение (например,
+    сравнение с None, от которого защищал предыдущий критерий),
+    узел вычисляется заново в объявленном порядке и больше
+    не переупорядочивается, так что охранные условия в And и Or
+    работают, как без вычислителя.
+
+    Хранится не больше max_plans порядков, давно не использованные
+    вытесняются, так что вычислитель можно держать долго, передавая
+    ему новые критерии.
+
+    Пример:
+    >>> from classic.domain.core import criteria, AdaptiveEvaluator
+    ...
+    ... @criteria
+    ... def is_positive(value):
+    ...     return value > 0
+    ...
+    ... @criteria
+    ... def is_even(value):
+    ...     return value % 2 == 0
+    ...
+    ... evaluator = AdaptiveEvaluator()
+    ... list(filter(evaluator.bind(is_positive() & is_even()), [-2, 1, 2]))
+    [2]
+    """
+    statistics: CriteriaStatistics
+    reorder_every: int
+    max_plans: int
+
+    def __init__(
+        self, statistics: CriteriaStatistics = None,
+        reorder_every: int = 1000,
+        max_plans: int = 1024,
+    ) -> None:
+        if max_plans < 1:
+            raise ValueError(f'max_plans must be positive, got {max_plans}')
+
+        self.statistics = statistics or CriteriaStatistics()
+        self.reorder_every = reorder_every
+        self.max_plans = max_plans
+        # id(узла) -> [узел, упорядоченные вложенные критерии, остаток до
+        # перестроения]. Узел хранится, чтобы id не переиспользовался,
+        # пока запись не вытеснена. Узлы, закреплённые в объявленном
+        # порядке, не перестраиваются: остаток у них бесконечный.
+        self._plans = OrderedDict()
+
+    def _ordered(self, criteria: CompositeCriteria) -> list[Criteria]:
+        plans = self._plans
+        plan = plans.get(id(criteria))
+        if plan is None or plan[0] is not criteria or plan[2] <= 0:
+            plan = plans[id(criteria)] = [
+                criteria,
+                self.statistics.order(criteria),
+                self.reorder_every,
+            ]
+            if len(plans) > self.max_plans:
+                plans.popitem(last=False)
+        plans.move_to_end(id(criteria))
+        plan[2] -= 1
+        return plan[1]
+
+    def _pin(self, criteria: CompositeCriteria) -> None:
+        self._plans[id(criteria)] = [
+            criteria, list(criteria.nested_criteria), float('inf'),
+        ]
+        if len(self._plans) > self.max_plans:
+            self._plans.popitem(last=False)
+
+    def _any(
+        self, nested: list[Criteria], candidate: DomainObject,
+        expected: bool,
+    ) -> bool:
+        for criteria in nested:
+            if bool(self.is_satisfied_by(criteria, candidate)) is expected:
+                return True
+        return False
+
+    def _composite(
+        self, criteria: CompositeCriteria, candidate: DomainObject,
+        expected: bool,
+    ) -> bool:
+        """
+        Есть ли среди вложенных критериев узла такой, что его результат
+        равен expected: для And - невыполненный, для Or - выполненный.
+        """
+        ordered = self._ordered(criteria)
+        try:
+            return self._any(ordered, candidate, expected)
+        except Exception:
+            declared = criteria.nested_criteria
+            if all(a is b for a, b in zip(ordered, declared)):
+                raise
+            self._pin(criteria)
+            return self._any(declared, candidate, expected)
+
+    def is_satisfied_by(
+        self, criteria: Criteria[DomainObject],
+        candidate: DomainObject,
+    ) -> bool:
+        if isinstance(criteria, And):
+            return not self._composite(criteria, candidate, False)
+
+        if isinstance(criteria, Or):
+            return self._composite(criteria, candidate, True)
+
+        if isinstance(criteria, Invert):
+            return not self.is_satisfied_by(
+                criteria.nested_criteria, candidate,
+            )
+
+        if isinstance(criteria, Xor):
+            return (
+                self.is_satisfied_by(criteria.left, candidate) ^
+                self.is_satisfied_by(criteria.right, candidate)
+            )
+
+        started_at = perf_counter()
+        result = criteria.is_satisfied_by(candidate)
+        self.statistics.record(
+            criteria.__class__, result, perf_counter() - started_at,
+        )
+        return result
+
+    def bind(
+        self, criteria: Criteria[DomainObject],
+    ) -> Callable[[DomainObject], bool]:
+        """
+        Возвращает функцию от кандидата, удобную для filter и подобных.
+        """
+        def is_satisfied_by(candidate: DomainObject) -> bool:
+            return self.is_satisfied_by(criteria, candidate)
+
+        return is_satisfied_by
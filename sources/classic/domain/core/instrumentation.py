@@ -0,0 +1,215 @@
+from contextlib import contextmanager
+from functools import wraps
+from threading import RLock
+from time import perf_counter, time_ns
+from typing import Any, Callable, Iterator, Protocol
+
+from .criteria import Criteria
+from .evaluation import CriteriaStatistics
+
+
+class Sink(Protocol):
+    """
+    Получатель измерений: критерий, результат и время вычисления
+    в секундах. Вызывается после каждого вычисления is_satisfied_by.
+    """
+
+    def record(
+        self, criteria: Criteria, result: bool, elapsed: float,
+    ) -> None:
+        ...
+
+
+class StatsSink:
+    """
+    Накапливает статистику по классам критериев в CriteriaStatistics:
+    количество вызовов, долю удовлетворившихся, суммарное время
+    и перцентили. Ту же статистику можно передать в AdaptiveEvaluator.
+
+    >>> sink = StatsSink()
+    ... with instrumented(sink):
+    ...     handle_request()
+    ... stats = sink.statistics[Book.can_edit]
+    ... stats.calls, stats.satisfied_ratio, stats.percentile(99)
+    """
+    statistics: CriteriaStatistics
+
+    def __init__(self, statistics: CriteriaStatistics = None) -> None:
+        self.statistics = statistics or CriteriaStatistics()
+
+    def record(
+        self, criteria: Criteria, result: bool, elapsed: float,
+    ) -> None:
+        self.statistics.record(criteria.__class__, result, elapsed)
+
+
+class SpanSink:
+    """
+    Создаёт по span на каждое вычисление через трассировщик
+    в стиле OpenTelemetry: объект с методом
+    start_span(name, start_time=..., attributes=...), возвращающим span
+    с методом end(end_time=...). Время - наносекунды с начала эпохи.
+
+    Span создаётся после вычисления, с восстановленным временем начала,
+    поэтому вложенные критерии не становятся дочерними span.
+
+    >>> from opentelemetry import trace
+    ... sink = SpanSink(trace.get_tracer('criteria'))
+    """
+
+    def __init__(self, tracer: Any, prefix: str = 'criteria.') -> None:
+        self.tracer = tracer
+        self.prefix = prefix
+
+    def record(
+        self, criteria: Criteria, result: bool, elapsed: float,
+    ) -> None:
+        end_time = time_ns()
+        span = self.tracer.start_span(
+            self.prefix + criteria.__class__.__qualname__,
+            start_time=end_time - int(elapsed * 1e9),
+            attributes={'criteria.result': bool(result)},
+        )
+        span.end(end_time=end_time)
+
+
+class CallbackSink:
+    """
+    Передаёт каждое измерение в функцию callback(criteria, result, elapsed).
+    """
+
+    def __init__(
+        self, callback: Callable[[Criteria, bool, float], None],
+    ) -> None:
+        self.callback = callback
+
+    def record(
+        self, criteria: Criteria, result: bool, elapsed: float,
+    ) -> None:
+        self.callback(criteria, result, elapsed)
+
+
+# Получатели заменяются кортежем целиком под _lock, поэтому обёртки
+# обходят их без блокировки
+_sinks: tuple[Sink, ...] = ()
+# класс -> исходный is_satisfied_by из __dict__ класса
+_originals: dict[type[Criteria], Callable] = {}
+# число включений, не закрытых disable_instrumentation
+_active = 0
+_lock = RLock()
+
+
+def _subclasses(cls: type) -> Iterator[type]:
+    yield cls
+    for subclass in cls.__subclasses__():
+        yield from _subclasses(subclass)
+
+
+def _instrument(method: Callable) -> Callable:
+
+    @wraps(method)
+    def is_satisfied_by(self, candidate):
+        if self.__class__.is_satisfied_by is not is_satisfied_by:
+            # Вызов через super() из переопределённого метода,
+            # измерение запишет сам переопределённый метод
+            return method(self, candidate)
+
+        started_at = perf_counter()
+        result = method(self, candidate)
+        elapsed = perf_counter() - started_at
+        for sink in _sinks:
+            sink.record(self, result, elapsed)
+        return result
+
+    return is_satisfied_by
+
+
+def enable_instrumentation(*sinks: Sink) -> None:
+    """
+    Включает измерение вычислений критериев и добавляет получателей.
+
+    Методы is_satisfied_by всех существующих классов критериев
+    (в т.ч. PredicateCriteria и инвариантов HaveInvariants) заменяются
+    обёртками, которые замеряют время и передают измерение получателям.
+    Классы, объявленные после включения со своим is_satisfied_by,
+    не измеряются, классы из декоратора criteria - измеряются.
+
+    Включения считаются: каждое закрывается вызовом
+    disable_instrumentation со своими получателями, исходные методы
+    возвращаются на место, когда закрыто последнее.
+    Выключенное измерение ничего не стоит.
+    Скомпилированные (Criteria.compile) и пакетные (Criteria.mask)
+    вычисления не измеряются.
+    """
+    global _sinks, _active
+
+    with _lock:
+        _sinks += sinks
+        _active += 1
+        for cls in _subclasses(Criteria):
+            if cls in _originals:
+                continue
+            method = cls.__dict__.get('is_satisfied_by')
+            if method is None:
+                continue
+            _originals[cls] = method
+            cls.is_satisfied_by = _instrument(method)
+
+
+def _restore() -> None:
+    global _sinks, _active
+
+    for cls, method in _originals.items():
+        cls.is_satisfied_by = method
+    _originals.clear()
+    _sinks = ()
+    _active = 0
+
+
+def disable_instrumentation(*sinks: Sink) -> None:
+    """
+    Закрывает одно включение и удаляет переданных при нём получателей,
+    остальные продолжают получать измерения. Исходные методы
+    возвращаются, когда закрыто последнее включение.
+    """
+    global _sinks, _active
+
+    with _lock:
+        if _active == 0:
+            return
+        remaining = list(_sinks)
+        for sink in sinks:
+            if sink in remaining:
+                remaining.remove(sink)
+        _sinks = tuple(remaining)
+        _active -= 1
+        if _active == 0:
+            _restore()
+
+
+def reset_instrumentation() -> None:
+    """
+    Выключает измерение сразу, независимо от числа включений,
+    и удаляет всех получателей.
+    """
+    with _lock:
+        _restore()
+
+
+@contextmanager
+def instrumented(*sinks: Sink) -> Iterator[None]:
+    """
+    Включает измерение с получателями sinks на время блока with.
+    Блоки можно вкладывать и открывать из разных потоков: при выходе
+    удаляются только получатели этого блока.
+
+    >>> with instrumented(outer):
+    ...     with instrumented(inner):
+    ...         is_positive()(1)  # получают outer и inner
+    ...     is_positive()(1)  # получает только outer
+    """
+    enable_instrumentation(*sinks)
+    try:
+        yield
+    finally:
+        disable_instrumentation(*sinks)
@@ -1,8 +1,16 @@
+import dataclasses
+import hashlib
 import inspect
-from typing import Collection, get_origin, get_args, ClassVar, TypeVar
-
-from .entities import Value, Entity
-from .criteria import Criteria, And, ReturnsTrue
+import sys
+from types import CodeType, ModuleType, NoneType, UnionType
+from typing import (
+    Any, Callable, Collection, Iterable, Iterator, Mapping, Sequence, ClassVar,
+    TypeVar, Union, get_origin, get_args, get_type_hints,
+)
+
+from .copying import IMMUTABLE
+from .entities import Value, DIRTY_FIELDS, CHECK_STATE
+from .criteria import Criteria, And, ReturnsTrue, DomainObject
 from .predicate_wrapping import criteria
 
 
@@ -22,107 +30,903 @@ def is_invariant(obj: object) -> bool:
     )
 
 
-@criteria
-def check_child(instance: object, child_name: str):
-    return getattr(instance, child_name).invariants.is_satisfied()
+# Описание того, как найти доменные объекты в значении поля:
+#   'object' - значение - доменный объект,
+#   'maybe' - значение может быть доменным объектом, проверяется isinstance,
+#   ['optional', shape] - значение может быть None,
+#   ['each', shape] - элементы коллекции,
+#   ['keys', shape], ['values', shape], ['items', shape, shape] - словарь,
+#   ['tuple', shape | None, ...] - кортеж фиксированной длины.
+Shape = str | list
 
+CHILDREN_VALIDATOR = '__children_validator__'
+# Атрибут класса, в котором хранятся собранные инварианты
+INVARIANTS_CACHE = '__invariants_cache__'
 
-@criteria
-def check_child_iterator(instance: object, child_name: str):
-    return all(
-        item.invariants.is_satisfied()
-        for item in getattr(instance, child_name)
-    )
 
+def _is_checkable(hint: Any) -> bool:
+    return isinstance(hint, type) and issubclass(hint, HaveInvariants)
 
-@criteria
-def check_child_dict_items(instance: object, child_name: str):
-    return all(
-        key.invariants.is_satisfied() and
-        value.invariants.is_satisfied()
-        for key, value in getattr(instance, child_name).items()
-    )
+
+def child_shape(hint: Any) -> Shape | None:
+    """
+    Возвращает описание доменных объектов в значении с аннотацией hint
+    или None, если доменных объектов в нём нет.
+    """
+    if _is_checkable(hint):
+        return 'object'
+
+    origin = get_origin(hint)
+    args = get_args(hint)
+
+    if origin in (Union, UnionType):
+        options = [arg for arg in args if arg is not NoneType]
+        if len(options) == 1:
+            shape = child_shape(options[0])
+            if shape is None:
+                return None
+            if shape == 'object':
+                return 'maybe'
+            return ['optional', shape]
+        if any(child_shape(option) is not None for option in options):
+            return 'maybe'
+        return None
+
+    if not isinstance(origin, type) or issubclass(origin, (str, bytes)):
+        return None
+
+    if issubclass(origin, Mapping):
+        if len(args) != 2:
+            return None
+        key, value = map(child_shape, args)
+        if key is not None and value is not None:
+            return ['items', key, value]
+        if key is not None:
+            return ['keys', key]
+        if value is not None:
+            return ['values', value]
+        return None
+
+    if issubclass(origin, tuple) and args and args[-1] is not Ellipsis:
+        shapes = [child_shape(arg) for arg in args]
+        if all(shape is None for shape in shapes):
+            return None
+        return ['tuple', *shapes]
+
+    if issubclass(origin, Collection) and args:
+        shape = child_shape(args[0])
+        return None if shape is None else ['each', shape]
+
+    return None
+
+
+def _type_hints(cls) -> dict[str, Any]:
+    try:
+        return get_type_hints(cls)
+    except (NameError, TypeError):
+        pass
+
+    # Часть аннотаций не разрешается, например, ссылка на класс,
+    # объявленный в функции. Разрешаем те, что можно, по одной.
+    hints = {}
+    for klass in reversed(cls.__mro__):
+        module = sys.modules.get(klass.__module__)
+        globalns = getattr(module, '__dict__', {})
+        localns = {**vars(klass), cls.__name__: cls}
+        for name, annotation in inspect.get_annotations(klass).items():
+            if isinstance(annotation, str):
+                try:
+                    annotation = eval(annotation, globalns, localns)
+                except Exception:
+                    continue
+            hints[name] = annotation
+    return hints
+
+
+def descendants_invariants(cls) -> list[list]:
+    """
+    Находит по аннотациям, в т.ч. унаследованным и отложенным,
+    поля класса, в которых могут лежать доменные объекты с инвариантами.
+    Возвращает пары [имя поля, shape], см. Shape.
+    """
+    hints = _type_hints(cls)
+    if dataclasses.is_dataclass(cls):
+        names = [field.name for field in dataclasses.fields(cls)]
+    else:
+        names = [
+            name for name, hint in hints.items()
+            if get_origin(hint) is not ClassVar
+        ]
+
+    descendants = []
+    for name in names:
+        shape = child_shape(hints.get(name))
+        if shape is not None:
+            descendants.append([name, shape])
+    return descendants
 
 
-@criteria
-def check_child_dict_values(instance: object, child_name: str):
-    return all(
-        item.invariants.is_satisfied()
-        for item in getattr(instance, child_name).values()
+def _shape_lines(
+    shape: Shape, value: str, indent: int, depth: int,
+) -> list[str]:
+    pad = '    ' * indent
+    if shape == 'object':
+        return [
+            f'{pad}if not {value}.__class__.invariants'
+            f'.is_satisfied_by({value}):',
+            f'{pad}    return False',
+        ]
+    if shape == 'maybe':
+        return [
+            f'{pad}if isinstance({value}, checkable) and not '
+            f'{value}.__class__.invariants.is_satisfied_by({value}):',
+            f'{pad}    return False',
+        ]
+    if not isinstance(shape, list) or not shape:
+        raise ValueError(f'Unknown shape {shape!r}')
+
+    kind, *nested = shape
+    key, item = f'key_{depth}', f'item_{depth}'
+    if kind == 'optional' and len(nested) == 1:
+        return [
+            f'{pad}if {value} is not None:',
+            *_shape_lines(nested[0], value, indent + 1, depth),
+        ]
+    if kind == 'each' and len(nested) == 1:
+        return [
+            f'{pad}for {item} in {value}:',
+            *_shape_lines(nested[0], item, indent + 1, depth + 1),
+        ]
+    if kind == 'keys' and len(nested) == 1:
+        return [
+            f'{pad}for {key} in {value}.keys():',
+            *_shape_lines(nested[0], key, indent + 1, depth + 1),
+        ]
+    if kind == 'values' and len(nested) == 1:
+        return [
+            f'{pad}for {item} in {value}.values():',
+            *_shape_lines(nested[0], item, indent + 1, depth + 1),
+        ]
+    if kind == 'items' and len(nested) == 2:
+        return [
+            f'{pad}for {key}, {item} in {value}.items():',
+            *_shape_lines(nested[0], key, indent + 1, depth + 1),
+            *_shape_lines(nested[1], item, indent + 1, depth + 1),
+        ]
+    if kind == 'tuple':
+        lines = []
+        for index, nested_shape in enumerate(nested):
+            if nested_shape is not None:
+                lines += _shape_lines(
+                    nested_shape, f'{value}[{index}]', indent, depth,
+                )
+        return lines
+
+    raise ValueError(f'Unknown shape {shape!r}')
+
+
+def make_children_validator(
+    cls: type, descendants: Sequence[Sequence],
+) -> Callable[[object], bool]:
+    """
+    Генерирует функцию, проверяющую инварианты вложенных доменных
+    объектов. Функция обходит только поля из descendants,
+    без рефлексии и поиска атрибутов по имени во время проверки.
+    """
+    lines = ['def validate(instance):']
+    for index, (name, shape) in enumerate(descendants):
+        if not name.isidentifier():
+            raise ValueError(f'Invalid field name {name!r}')
+        value = f'value_{index}'
+        lines.append(f'    {value} = instance.{name}')
+        lines += _shape_lines(shape, value, 1, 0)
+    lines.append('    return True')
+
+    namespace = {'checkable': HaveInvariants}
+    exec(
+        compile(
+            '\n'.join(lines), f'<children validator of {cls.__qualname__}>',
+            'exec',
+        ),
+        namespace,
     )
+    return namespace['validate']
 
 
 @criteria
-def check_child_dict_keys(instance: object, child_name: str):
-    return all(
-        item.invariants.is_satisfied()
-        for item in getattr(instance, child_name).keys()
+def check_children(instance: object):
+    return getattr(instance.__class__, CHILDREN_VALIDATOR)(instance)
+
+
+# Значения, которые не меняются без присваивания полю
+STABLE_VALUES = (*IMMUTABLE, Value)
+
+# Имена, через которые инвариант может читать поля неявно
+INDIRECT_ACCESS = frozenset({
+    'getattr', 'setattr', 'delattr', 'hasattr', 'vars', 'dir',
+    'eval', 'exec', 'globals', 'locals', 'super',
+    '__dict__', '__getattribute__', '__getattr__',
+})
+
+
+def _is_mutable(value: object) -> bool:
+    """
+    Может ли значение измениться без присваивания полю: изменяемы
+    все значения, кроме неизменяемых скаляров, Value и кортежей
+    и frozenset из них. Сущности изменяемы.
+    """
+    if isinstance(value, STABLE_VALUES):
+        return False
+    if isinstance(value, (tuple, frozenset)):
+        return any(map(_is_mutable, value))
+    return True
+
+
+def _code_objects(code: CodeType) -> Iterator[CodeType]:
+    yield code
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            yield from _code_objects(const)
+
+
+def _is_helper(obj: object) -> bool:
+    # Функции и модули могут читать поля объекта, не видимые
+    # в байткоде инварианта, классы считаются безопасными
+    return (
+        isinstance(obj, ModuleType) or
+        callable(obj) and not isinstance(obj, type)
     )
 
 
-CHECKABLE = Value, Entity
+def _field_names(cls) -> set[str]:
+    names = set()
+    for klass in cls.__mro__:
+        for name, annotation in inspect.get_annotations(klass).items():
+            if get_origin(annotation) is not ClassVar:
+                names.add(name)
+    return names
 
 
-def descendants_invariants(cls):
-    descendants: list[Criteria] = []
-    for name, child_cls in inspect.get_annotations(cls).items():
-        if isinstance(child_cls, CHECKABLE):
-            descendants.append(check_child(name))
-            continue
+def fields_read(fn, cls) -> frozenset[str] | None:
+    """
+    Возвращает поля класса cls, которые читает инвариант fn,
+    по именам атрибутов в его байткоде.
 
-        origin = get_origin(child_cls)
-        if not origin:
+    Если инвариант читает атрибуты неявно (getattr, vars, __dict__),
+    обращается к методам или свойствам класса, вызывает функции
+    из модуля или замыкания, то, какие поля он читает, неизвестно,
+    и возвращается None.
+    """
+    code = getattr(fn, '__code__', None)
+    if code is None:
+        return None
+
+    for cell in getattr(fn, '__closure__', None) or ():
+        try:
+            value = cell.cell_contents
+        except ValueError:
             continue
+        if _is_helper(value):
+            return None
 
-        if isinstance(origin, dict):
-            args = get_args(child_cls)
-            if len(args) != 2:
-                continue
-
-            key_type, value_type = args
-            key_is_domain = isinstance(key_type, CHECKABLE)
-            value_is_domain = isinstance(value_type, CHECKABLE)
-
-            if key_is_domain:
-                if value_is_domain:
-                    descendants.append(
-                        check_child_dict_items(name)
-                    )
-                else:
-                    descendants.append(
-                        check_child_dict_keys(name)
-                    )
-            elif value_is_domain:
-                descendants.append(
-                    check_child_dict_values(name)
-                )
+    names = set()
+    for code_ in _code_objects(code):
+        names.update(code_.co_names)
+    if not names.isdisjoint(INDIRECT_ACCESS):
+        return None
 
-        elif issubclass(origin, Collection):
-            descendants.append(
-                check_child_iterator(name)
-            )
+    namespace = getattr(fn, '__globals__', {})
+    fields = _field_names(cls)
+    for name in names - fields:
+        if name in namespace and _is_helper(namespace[name]):
+            return None
+        attribute = inspect.getattr_static(cls, name, None)
+        if callable(attribute) or hasattr(type(attribute), '__get__'):
+            return None
 
-    return descendants
+    return frozenset(names & fields)
 
 
-def build_invariants(cls) -> Criteria:
-    cls_invariants = [
-        invariant_() for __, invariant_
-        in inspect.getmembers(cls, is_invariant)
-    ] + descendants_invariants(cls)
-    if cls_invariants:
-        return And(*cls_invariants)
+def _children(shape: Shape, value: Any) -> Iterator[Any]:
+    """
+    Отдаёт доменные объекты из значения поля, см. Shape.
+    """
+    if shape == 'object':
+        yield value
+        return
+    if shape == 'maybe':
+        if isinstance(value, HaveInvariants):
+            yield value
+        return
+
+    kind, *nested = shape
+    if kind == 'optional':
+        if value is not None:
+            yield from _children(nested[0], value)
+    elif kind == 'each':
+        for item in value:
+            yield from _children(nested[0], item)
+    elif kind == 'keys':
+        for key in value.keys():
+            yield from _children(nested[0], key)
+    elif kind == 'values':
+        for item in value.values():
+            yield from _children(nested[0], item)
+    elif kind == 'items':
+        for key, item in value.items():
+            yield from _children(nested[0], key)
+            yield from _children(nested[1], item)
+    elif kind == 'tuple':
+        for nested_shape, item in zip(nested, value):
+            if nested_shape is not None:
+                yield from _children(nested_shape, item)
     else:
+        raise ValueError(f'Unknown shape {shape!r}')
+
+
+# Снимок контейнера, структуру которого нельзя запомнить
+UNKNOWN = object()
+
+
+def _snapshot(shape: Shape, value: Any) -> Any:
+    """
+    Копирует структуру контейнеров в значении поля так, чтобы потом
+    сравнить её со значением через ==. Доменные объекты не копируются,
+    сущности сравниваются по идентичности. Для контейнеров, тип которых
+    не известен, возвращает UNKNOWN.
+    """
+    if value is None or shape in ('object', 'maybe'):
+        return value
+
+    kind, *nested = shape
+    if kind == 'optional':
+        return _snapshot(nested[0], value)
+
+    if kind == 'tuple':
+        if type(value) is not tuple or len(value) != len(nested):
+            return UNKNOWN
+        items = [
+            item if nested_shape is None else _snapshot(nested_shape, item)
+            for nested_shape, item in zip(nested, value)
+        ]
+        return UNKNOWN if UNKNOWN in items else tuple(items)
+
+    if kind == 'each':
+        if type(value) in (set, frozenset):
+            if nested[0] in ('object', 'maybe'):
+                return frozenset(value)
+            return UNKNOWN
+        if type(value) not in (list, tuple):
+            return UNKNOWN
+        if nested[0] in ('object', 'maybe'):
+            return value[:]
+        items = [_snapshot(nested[0], item) for item in value]
+        return UNKNOWN if UNKNOWN in items else type(value)(items)
+
+    if type(value) is not dict:
+        return UNKNOWN
+    if kind == 'keys' or nested[-1] in ('object', 'maybe'):
+        return dict(value)
+    items = {key: _snapshot(nested[-1], item) for key, item in value.items()}
+    return UNKNOWN if UNKNOWN in items.values() else items
+
+
+def _is_container(shape: Shape) -> bool:
+    if shape in ('object', 'maybe'):
+        return False
+    kind, *nested = shape
+    if kind == 'optional':
+        return _is_container(nested[0])
+    if kind == 'tuple':
+        return any(
+            nested_shape is not None and _is_container(nested_shape)
+            for nested_shape in nested
+        )
+    return True
+
+
+def _no_state() -> None:
+    return None
+
+
+class CheckState:
+    """
+    Состояние последней успешной проверки экземпляра с инкрементальными
+    инвариантами, хранится в атрибуте CHECK_STATE.
+
+    owners - объекты, в полях которых экземпляр проверялся как вложенный,
+    по (id владельца, имя поля), fields - состояния полей с вложенными
+    объектами, stable - экземпляр не может стать невалидным
+    без присваивания его полям или полям вложенных в него объектов.
+
+    При копировании и сериализации состояние не сохраняется.
+
+    Используется внутри библиотеки, см. Invariants.
+    """
+    __slots__ = ('owners', 'fields', 'stable')
+
+    owners: dict[tuple[int, str], object]
+    fields: dict[str, 'FieldState']
+    stable: bool
+
+    def __init__(self) -> None:
+        self.owners = {}
+        self.fields = {}
+        self.stable = False
+
+    def __reduce__(self):
+        return _no_state, ()
+
+
+class FieldState:
+    """
+    Состояние поля с вложенными объектами после последней успешной
+    проверки: снимок структуры контейнеров (см. _snapshot), вложенные
+    объекты, сообщающие об изменениях (tracked), объекты, которые
+    нужно перепроверять каждый раз (volatile), и объекты, сообщившие
+    об изменениях после проверки (changed). Все - по id объекта.
+
+    Используется внутри библиотеки, см. Invariants.
+    """
+    __slots__ = ('snapshot', 'container', 'tracked', 'volatile', 'changed')
+
+    snapshot: Any
+    container: bool
+    tracked: dict[int, object]
+    volatile: dict[int, object]
+    changed: dict[int, object]
+
+    def __init__(
+        self, snapshot: Any, container: bool,
+        tracked: dict[int, object], volatile: dict[int, object],
+    ) -> None:
+        self.snapshot = snapshot
+        self.container = container
+        self.tracked = tracked
+        self.volatile = volatile
+        self.changed = {}
+
+    @property
+    def stable(self) -> bool:
+        return not self.container and not self.volatile
+
+    def matches(self, value: Any) -> bool:
+        return self.snapshot is not UNKNOWN and value == self.snapshot
+
+    def recheck(self) -> bool:
+        """
+        Перепроверяет объекты, которые могли измениться с прошлой
+        проверки поля. Состав поля при этом не изменился.
+        """
+        candidates = {**self.volatile, **self.changed}
+        for child in candidates.values():
+            if not child.__class__.invariants.is_satisfied_by(child):
+                return False
+
+        self.volatile = {
+            key: child for key, child in candidates.items()
+            if not _is_stable(child)
+        }
+        self.changed.clear()
+        return True
+
+
+def _check_state(obj: object) -> CheckState:
+    state = getattr(obj, CHECK_STATE, None)
+    if state is None:
+        state = CheckState()
+        object.__setattr__(obj, CHECK_STATE, state)
+    return state
+
+
+def _is_stable(child: object) -> bool:
+    if (
+        isinstance(child, Value) and
+        CHILDREN_VALIDATOR not in vars(child.__class__)
+    ):
+        return True
+    state = getattr(child, CHECK_STATE, None)
+    return state is not None and state.stable
+
+
+def _check_field(
+    owner: object, name: str, shape: Shape, value: Any,
+) -> FieldState | None:
+    """
+    Проверяет все вложенные объекты в поле и регистрирует owner
+    как владельца тех, что сообщают об изменениях.
+    """
+    tracked, volatile = {}, {}
+    for child in _children(shape, value):
+        if not child.__class__.invariants.is_satisfied_by(child):
+            return None
+        state = getattr(child, CHECK_STATE, None)
+        if state is not None and not isinstance(child, Value):
+            state.owners[id(owner), name] = owner
+            tracked[id(child)] = child
+        if not _is_stable(child):
+            volatile[id(child)] = child
+
+    return FieldState(
+        _snapshot(shape, value), _is_container(shape), tracked, volatile,
+    )
+
+
+def _report_change(obj: object) -> None:
+    """
+    Сообщает владельцам объекта, что он изменился после проверки.
+    """
+    state = getattr(obj, CHECK_STATE, None)
+    if state is None:
+        return
+
+    for key, owner in list(state.owners.items()):
+        owner_state = getattr(owner, CHECK_STATE, None)
+        field = owner_state and owner_state.fields.get(key[1])
+        if field is None or id(obj) not in field.tracked:
+            # Объект больше не лежит в этом поле владельца
+            del state.owners[key]
+        elif id(obj) not in field.changed:
+            field.changed[id(obj)] = obj
+            _report_change(owner)
+
+
+class Invariants(And[DomainObject]):
+    """
+    Инварианты класса с инкрементальной перепроверкой.
+
+    После успешной проверки экземпляра запоминает, что он валиден,
+    и далее, пока изменённые поля отслеживаются в атрибуте DIRTY_FIELDS,
+    перепроверяет только инварианты, читающие изменённые поля или поля
+    с изменяемыми значениями (контейнерами, сущностями), а также
+    инварианты с неизвестным набором полей.
+
+    Вложенные объекты в поле проверяются все, если полю присвоено новое
+    значение или изменился состав контейнеров в нём. Иначе
+    перепроверяются только те, что сообщили об изменении своих полей,
+    и те, что могут измениться без присваивания (см. CheckState).
+
+    Используется внутри библиотеки, см. HaveInvariants.
+    """
+    __slots__ = ('reads', 'descendants')
+
+    reads: list[frozenset[str] | None]
+    descendants: list[tuple[str, Shape]]
+
+    def __init__(
+        self, *criteria: Criteria[DomainObject],
+        reads: Sequence[frozenset[str] | None],
+        descendants: Sequence[Sequence] = (),
+    ) -> None:
+        super().__init__(*criteria)
+        self.reads = list(reads)
+        self.descendants = [(name, shape) for name, shape in descendants]
+
+    def _affected(
+        self, candidate: DomainObject, dirty: Collection[str] | None,
+    ) -> Iterator[Criteria[DomainObject]]:
+        # Проверка вложенных объектов идёт последней и без reads,
+        # её выполняет _children_satisfied
+        for criteria_, reads in zip(self.nested_criteria, self.reads):
+            if (
+                dirty is None or
+                reads is None or
+                not reads.isdisjoint(dirty) or
+                any(
+                    _is_mutable(getattr(candidate, name, None))
+                    for name in reads
+                )
+            ):
+                yield criteria_
+
+    def _children_satisfied(
+        self, candidate: DomainObject, dirty: set[str] | None,
+    ) -> bool:
+        if not self.descendants:
+            return True
+
+        state = _check_state(candidate)
+        if dirty is None:
+            state.fields = {}
+
+        for name, shape in self.descendants:
+            value = getattr(candidate, name)
+            field = state.fields.get(name)
+            if field is None or name in dirty or not field.matches(value):
+                field = _check_field(candidate, name, shape, value)
+                if field is None:
+                    return False
+                state.fields[name] = field
+            elif not field.recheck():
+                return False
+        return True
+
+    def _mark_valid(
+        self, candidate: DomainObject, dirty: set[str] | None,
+    ) -> None:
+        if dirty is None:
+            object.__setattr__(candidate, DIRTY_FIELDS, set())
+        else:
+            dirty.clear()
+
+        state = _check_state(candidate)
+        state.stable = (
+            not any(self._affected(candidate, ())) and
+            all(field.stable for field in state.fields.values())
+        )
+
+    def is_satisfied_by(self, candidate: DomainObject) -> bool:
+        dirty = getattr(candidate, DIRTY_FIELDS, None)
+        for criteria_ in self._affected(candidate, dirty):
+            if not criteria_.is_satisfied_by(candidate):
+                return False
+
+        if not self._children_satisfied(candidate, dirty):
+            return False
+
+        self._mark_valid(candidate, dirty)
+        return True
+
+    def remainder_unsatisfied_by(
+        self, candidate: DomainObject,
+    ) -> Criteria[DomainObject] | None:
+        dirty = getattr(candidate, DIRTY_FIELDS, None)
+        for criteria_ in self._affected(candidate, dirty):
+            remainder = criteria_.remainder_unsatisfied_by(candidate)
+            if remainder is not None:
+                return remainder
+
+        if not self._children_satisfied(candidate, dirty):
+            return self.nested_criteria[-1]
+
+        self._mark_valid(candidate, dirty)
+        return None
+
+
+def _tracking_setattr(self, name: str, value: object) -> None:
+    object.__setattr__(self, name, value)
+    dirty = getattr(self, DIRTY_FIELDS, None)
+    if dirty is not None:
+        dirty.add(name)
+        _report_change(self)
+
+
+# Заранее собранные описания инвариантов по class_key, см. manifest.py
+_manifest: dict[str, dict] = {}
+
+
+def class_key(cls: type) -> str:
+    return f'{cls.__module__}:{cls.__qualname__}'
+
+
+def _invariant_names(cls) -> list[str]:
+    return sorted(
+        name for name in {
+            name for klass in cls.__mro__ for name in vars(klass)
+        }
+        if name != 'invariants' and is_invariant(getattr(cls, name, None))
+    )
+
+
+def _hash_code(digest: 'hashlib._Hash', code: CodeType) -> None:
+    digest.update(code.co_code)
+    digest.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            _hash_code(digest, const)
+        elif isinstance(const, frozenset):
+            # Порядок элементов множества меняется от запуска к запуску
+            digest.update(repr(sorted(map(repr, const))).encode())
+        else:
+            digest.update(repr(const).encode())
+
+
+# Атрибуты, которые библиотека сама добавляет классу после сборки,
+# они не должны менять отпечаток
+_BUILT_ATTRIBUTES = frozenset((CHILDREN_VALIDATOR, INVARIANTS_CACHE))
+
+
+# Хеши файлов модулей по имени модуля, None - у модуля нет файла
+_module_digests: dict[str, bytes | None] = {}
+
+
+def _module_digest(module_name: str) -> bytes | None:
+    try:
+        return _module_digests[module_name]
+    except KeyError:
+        pass
+
+    digest = None
+    path = getattr(sys.modules.get(module_name), '__file__', None)
+    if path is not None:
+        try:
+            with open(path, 'rb') as file:
+                digest = hashlib.sha256(file.read()).digest()
+        except OSError:
+            pass
+    _module_digests[module_name] = digest
+    return digest
+
+
+def fingerprint(cls, names: Iterable[str] = None) -> str:
+    """
+    Хеш того, из чего собирается описание инвариантов класса: файлов
+    модулей, где объявлены классы из MRO, имён их атрибутов
+    и собственных аннотаций. Файл каждого модуля хешируется один раз,
+    атрибуты и аннотации не разрешаются, поэтому проверка описания
+    из манифеста стоит много меньше сборки рефлексией.
+
+    Если у модуля какого-то класса нет файла (класс создан в exec),
+    вместо него хешируется байткод инвариантов names (по умолчанию -
+    всех инвариантов класса).
+
+    Любая правка модуля или новый атрибут меняют отпечаток,
+    даже если инварианты не изменились, - тогда класс просто
+    собирается рефлексией.
+    """
+    digest = hashlib.sha256()
+    has_sources = True
+    for klass in cls.__mro__:
+        if klass.__module__ != 'builtins':
+            module_digest = _module_digest(klass.__module__)
+            if module_digest is None:
+                has_sources = False
+            else:
+                digest.update(module_digest)
+
+        namespace = vars(klass)
+        digest.update(repr(sorted(
+            name for name in namespace if name not in _BUILT_ATTRIBUTES
+        )).encode())
+        digest.update(repr(namespace.get('__annotations__')).encode())
+
+    if has_sources:
+        return digest.hexdigest()
+
+    for name in _invariant_names(cls) if names is None else names:
+        digest.update(name.encode())
+        predicate = getattr(getattr(cls, name, None), 'predicate', None)
+        code = getattr(predicate, '__code__', None)
+        if code is None:
+            digest.update(repr(predicate).encode())
+        else:
+            _hash_code(digest, code)
+    return digest.hexdigest()
+
+
+def describe_invariants(cls, incremental: bool = False) -> dict:
+    """
+    Собирает через рефлексию описание инвариантов класса, пригодное
+    для JSON: имена инвариантов, проверки вложенных объектов,
+    отпечаток класса (см. fingerprint) и, для инкрементальной проверки,
+    поля, которые читает каждый инвариант.
+    """
+    names = _invariant_names(cls)
+    description = {
+        'invariants': names,
+        'descendants': descendants_invariants(cls),
+        'fingerprint': fingerprint(cls, names),
+    }
+    if incremental:
+        description['reads'] = [
+            None if reads is None else sorted(reads)
+            for reads in (
+                fields_read(getattr(cls, name).predicate, cls)
+                for name in names
+            )
+        ]
+    return description
+
+
+def _build_from_description(
+    cls, description: dict, incremental: bool,
+) -> Criteria:
+    # Имена взяты из рефлексии или из манифеста с совпавшим
+    # отпечатком, повторно проверять, что это инварианты, не нужно
+    own_invariants = [
+        getattr(cls, name)() for name in description['invariants']
+    ]
+
+    descendants = []
+    if description['descendants']:
+        validator = make_children_validator(cls, description['descendants'])
+        setattr(cls, CHILDREN_VALIDATOR, staticmethod(validator))
+        descendants.append(check_children())
+    if not own_invariants and not descendants:
         return ReturnsTrue()
 
+    if not incremental:
+        return And(*own_invariants, *descendants)
+
+    reads = description.get('reads')
+    if reads is None:
+        reads = [
+            fields_read(invariant_.predicate, cls)
+            for invariant_ in own_invariants
+        ]
+    else:
+        if len(reads) != len(own_invariants):
+            raise ValueError(reads)
+        reads = [None if names is None else frozenset(names) for names in reads]
+
+    return Invariants(
+        *own_invariants, *descendants,
+        reads=reads, descendants=description['descendants'],
+    )
+
+
+def build_invariants(cls, incremental: bool = False) -> Criteria:
+    description = _manifest.get(class_key(cls))
+    # Описание из манифеста годится, только если класс с тех пор
+    # не менялся: иначе в нём может не быть новых инвариантов,
+    # а reads - не соответствовать коду
+    if (
+        description is not None and
+        description.get('fingerprint') == fingerprint(
+            cls, description.get('invariants', ()),
+        )
+    ):
+        try:
+            return _build_from_description(cls, description, incremental)
+        except (AttributeError, KeyError, TypeError, ValueError):
+            # Манифест устарел, собираем заново
+            pass
+
+    return _build_from_description(
+        cls, describe_invariants(cls, incremental), incremental,
+    )
+
+
+class InvariantsDescriptor:
+    """
+    Собирает инварианты класса при первом обращении и хранит их
+    в самом классе, так что импорт модели не тратит время на рефлексию.
+    У каждого класса собственный набор, наследники собирают свой.
+    """
+
+    def __get__(self, instance: object, owner: type):
+        invariants = owner.__dict__.get(INVARIANTS_CACHE)
+        if invariants is None:
+            invariants = build_invariants(
+                owner, owner.__incremental_invariants__,
+            )
+            setattr(owner, INVARIANTS_CACHE, invariants)
+        return invariants.__get__(instance, owner)
+
 
 class HaveInvariants:
     """
     Базовый класс для всех доменных объектов.
+
+    Инварианты собираются при первом обращении к invariants,
+    по манифесту, если он загружен (см. manifest.py), иначе рефлексией.
+
+    С параметром класса incremental=True инварианты перепроверяются
+    инкрементально: после успешной проверки повторно вычисляются только
+    те, что зависят от полей, изменённых с тех пор (см. Invariants).
+    Параметр наследуется.
+
+    >>> class Order(Root[int], HaveInvariants, incremental=True):
+    ...     id: int
+    ...     lines: list[Line]
+    ...     comment: str
     """
 
-    invariants: ClassVar[Criteria]
+    __slots__ = ()
+
+    invariants: ClassVar[Criteria] = InvariantsDescriptor()
+    __incremental_invariants__: ClassVar[bool] = False
+
+    def __init_subclass__(cls, incremental: bool = None, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        if incremental is not None:
+            cls.__incremental_invariants__ = incremental
 
-    def __init_subclass__(cls, **kwargs):
-        if not inspect.isabstract(cls):
-            cls.invariants = build_invariants(cls)
+        if (
+            cls.__incremental_invariants__ and
+            not issubclass(cls, Value) and
+            '__setattr__' not in cls.__dict__
+        ):
+            # Value неизменяемы, изменения отслеживать не нужно
+            cls.__setattr__ = _tracking_setattr
@@ -0,0 +1,101 @@
+"""
+Манифест инвариантов: заранее собранные описания инвариантов классов.
+
+Без манифеста инварианты класса собираются рефлексией при первом
+обращении к invariants. С загруженным манифестом рефлексия
+пропускается: имена инвариантов, проверки вложенных объектов и поля,
+которые читают инварианты, берутся из манифеста. Каждое описание
+хранит отпечаток класса (хеш файлов модулей, имён атрибутов
+и аннотаций классов из MRO, см. invariants.fingerprint), сверка
+которого не разрешает атрибуты и аннотации. Если отпечаток
+не совпадает с текущим классом или описания без него, класс
+собирается рефлексией, как без манифеста.
+
+Манифест собирается при сборке приложения:
+
+    python -m classic.domain.core.manifest app.domain -o invariants.json
+
+и загружается при старте, до первой проверки инвариантов:
+
+>>> load_manifest('invariants.json')
+"""
+import argparse
+import importlib
+import json
+import os
+import sys
+from typing import Iterable, Iterator, Mapping
+
+from .invariants import HaveInvariants, class_key, describe_invariants
+from . import invariants
+
+
+Manifest = dict[str, dict]
+
+
+def _subclasses(cls: type) -> Iterator[type]:
+    for subclass in cls.__subclasses__():
+        yield subclass
+        yield from _subclasses(subclass)
+
+
+def collect_classes(modules: Iterable[str]) -> list[type]:
+    """
+    Импортирует модули и возвращает объявленные в них классы
+    с инвариантами.
+    """
+    modules = set(modules)
+    for module in modules:
+        importlib.import_module(module)
+
+    return [
+        cls for cls in dict.fromkeys(_subclasses(HaveInvariants))
+        if cls.__module__ in modules and '<locals>' not in cls.__qualname__
+    ]
+
+
+def make_manifest(classes: Iterable[type]) -> Manifest:
+    return {
+        class_key(cls): describe_invariants(
+            cls, cls.__incremental_invariants__,
+        )
+        for cls in classes
+    }
+
+
+def load_manifest(manifest: Mapping[str, dict] | str | os.PathLike) -> None:
+    """
+    Регистрирует описания из манифеста - словаря или пути к JSON файлу.
+    Классы, инварианты которых уже собраны, не пересобираются.
+    """
+    if not isinstance(manifest, Mapping):
+        with open(manifest, encoding='utf-8') as file:
+            manifest = json.load(file)
+
+    invariants._manifest.update(manifest)
+
+
+def clear_manifest() -> None:
+    invariants._manifest.clear()
+
+
+def main(argv: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description='Собирает манифест инвариантов классов из модулей',
+    )
+    parser.add_argument('modules', nargs='+')
+    parser.add_argument('-o', '--output', default=None)
+    args = parser.parse_args(argv)
+
+    manifest = make_manifest(collect_classes(args.modules))
+
+    if args.output is None:
+        json.dump(manifest, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write('\n')
+    else:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(manifest, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
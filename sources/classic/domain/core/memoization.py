@@ -0,0 +1,129 @@
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable
+
+from .criteria import (
+    Criteria, And, Or, Xor, Invert, DomainObject,
+)
+
+
+_MISSING = object()
+
+
+class CriteriaMemo(Generic[DomainObject]):
+    """
+    Кеш результатов проверки критериев для кандидатов с вытеснением
+    давно не использованных записей (LRU).
+
+    Ключ записи - структура критерия (класс и аргументы, для составных
+    критериев - вложенные критерии), сам кандидат и, если задана функция
+    version, версия кандидата. Value сравниваются по значению, сущности -
+    по идентичности, поэтому после изменения сущности её записи нужно
+    сбросить через invalidate или учитывать изменения в version.
+
+    Составные критерии вычисляются через кеш рекурсивно, так что
+    одинаковые поддеревья в большом дереве вычисляются один раз.
+    Кандидаты и критерии, которые нельзя хешировать, не кешируются.
+
+    Рассчитан на короткое время жизни, например, на один запрос:
+
+    >>> memo = CriteriaMemo()
+    ... memo.is_satisfied_by(can_edit(user) & is_published(), book)
+    ... memo.is_satisfied_by(can_edit(user), book)  # из кеша
+    True
+    """
+    maxsize: int
+    version: Callable[[DomainObject], Hashable] | None
+
+    def __init__(
+        self, maxsize: int = 4096,
+        version: Callable[[DomainObject], Hashable] = None,
+    ) -> None:
+        self.maxsize = maxsize
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def _key(
+        self, criteria: Criteria[DomainObject],
+        candidate: DomainObject,
+    ) -> Hashable | None:
+        version = None if self.version is None else self.version(candidate)
+        key = (criteria, candidate, version)
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def is_satisfied_by(
+        self, criteria: Criteria[DomainObject],
+        candidate: DomainObject,
+    ) -> bool:
+        key = self._key(criteria, candidate)
+        if key is not None:
+            result = self._cache.get(key, _MISSING)
+            if result is not _MISSING:
+                self.hits += 1
+                self._cache.move_to_end(key)
+                return result
+
+        self.misses += 1
+        result = self._evaluate(criteria, candidate)
+
+        if key is not None:
+            self._cache[key] = result
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return result
+
+    def _evaluate(
+        self, criteria: Criteria[DomainObject],
+        candidate: DomainObject,
+    ) -> bool:
+        if isinstance(criteria, And):
+            for nested in criteria.nested_criteria:
+                if not self.is_satisfied_by(nested, candidate):
+                    return False
+            return True
+
+        if isinstance(criteria, Or):
+            for nested in criteria.nested_criteria:
+                if self.is_satisfied_by(nested, candidate):
+                    return True
+            return False
+
+        if isinstance(criteria, Invert):
+            return not self.is_satisfied_by(
+                criteria.nested_criteria, candidate,
+            )
+
+        if isinstance(criteria, Xor):
+            return (
+                self.is_satisfied_by(criteria.left, candidate) ^
+                self.is_satisfied_by(criteria.right, candidate)
+            )
+
+        return criteria.is_satisfied_by(candidate)
+
+    def bind(
+        self, criteria: Criteria[DomainObject],
+    ) -> Callable[[DomainObject], bool]:
+        def is_satisfied_by(candidate: DomainObject) -> bool:
+            return self.is_satisfied_by(criteria, candidate)
+
+        return is_satisfied_by
+
+    def invalidate(self, candidate: DomainObject = _MISSING) -> None:
+        """
+        Сбрасывает записи кандидата, а без аргументов - весь кеш.
+        """
+        if candidate is _MISSING:
+            self._cache.clear()
+            return
+
+        for key in [key for key in self._cache if key[1] is candidate]:
+            del self._cache[key]
@@ -0,0 +1,142 @@
+import os
+from collections import deque
+from concurrent.futures import (
+    Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor,
+)
+from enum import Enum
+from itertools import islice
+from typing import Generic, Iterable, Iterator
+
+from .criteria import Criteria, DomainObject
+
+
+class Backend(Enum):
+    """
+    PROCESS - пул процессов, для предикатов, занятых вычислениями.
+    Критерии и кандидаты передаются в процессы через pickle.
+
+    THREAD - пул потоков, для предикатов, ждущих ввода-вывода
+    или отпускающих GIL.
+    """
+    PROCESS = 'process'
+    THREAD = 'thread'
+
+
+def _evaluate_chunk(
+    criteria: Criteria[DomainObject],
+    chunk: list[DomainObject],
+) -> list[bool]:
+    is_satisfied_by = criteria.compile()
+    return [bool(is_satisfied_by(candidate)) for candidate in chunk]
+
+
+class ParallelEvaluator(Generic[DomainObject]):
+    """
+    Проверяет кандидатов на соответствие критериям в пуле исполнителей.
+
+    Кандидаты делятся на пачки по chunk_size, пачки проверяются
+    параллельно, результаты отдаются лениво в исходном порядке.
+    Одновременно в работе не больше prefetch пачек на исполнителя,
+    поэтому длинные и бесконечные последовательности не читаются
+    в память целиком.
+
+    В исполнители уходят только критерии и кандидаты, обратно
+    возвращаются маски, так что filter отдаёт те же экземпляры,
+    что были переданы.
+
+    >>> with ParallelEvaluator(Backend.PROCESS) as evaluator:
+    ...     invalid = evaluator.filter(~Order.is_valid(), repo.find(None))
+    ...     for order in invalid:
+    ...         report(order)
+    """
+    backend: Backend
+    chunk_size: int
+    prefetch: int
+
+    def __init__(
+        self, backend: Backend = Backend.PROCESS,
+        max_workers: int = None,
+        chunk_size: int = 1024,
+        prefetch: int = 2,
+        executor: Executor = None,
+    ) -> None:
+        assert chunk_size > 0 and prefetch > 0
+
+        self.backend = backend
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.prefetch = prefetch
+        self._executor = executor
+        self._owns_executor = executor is None
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.backend is Backend.PROCESS:
+                self._executor = ProcessPoolExecutor(self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(self.max_workers)
+        return self._executor
+
+    def _chunks(
+        self, candidates: Iterable[DomainObject],
+    ) -> Iterator[list[DomainObject]]:
+        iterator = iter(candidates)
+        while chunk := list(islice(iterator, self.chunk_size)):
+            yield chunk
+
+    def _evaluate(
+        self, criteria: Criteria[DomainObject],
+        candidates: Iterable[DomainObject],
+    ) -> Iterator[tuple[list[DomainObject], list[bool]]]:
+        window = self.max_workers * self.prefetch
+        pending: deque[tuple[list[DomainObject], Future]] = deque()
+        try:
+            for chunk in self._chunks(candidates):
+                pending.append((
+                    chunk,
+                    self.executor.submit(_evaluate_chunk, criteria, chunk),
+                ))
+                if len(pending) >= window:
+                    chunk, future = pending.popleft()
+                    yield chunk, future.result()
+
+            while pending:
+                chunk, future = pending.popleft()
+                yield chunk, future.result()
+        finally:
+            for __, future in pending:
+                future.cancel()
+
+    def map(
+        self, criteria: Criteria[DomainObject],
+        candidates: Iterable[DomainObject],
+    ) -> Iterator[bool]:
+        """
+        Результаты проверки каждого кандидата в исходном порядке.
+        """
+        for __, results in self._evaluate(criteria, candidates):
+            yield from results
+
+    def filter(
+        self, criteria: Criteria[DomainObject],
+        candidates: Iterable[DomainObject],
+    ) -> Iterator[DomainObject]:
+        """
+        Кандидаты, удовлетворяющие критерию, в исходном порядке.
+        """
+        for chunk, results in self._evaluate(criteria, candidates):
+            for candidate, result in zip(chunk, results):
+                if result:
+                    yield candidate
+
+    def close(self) -> None:
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self) -> 'ParallelEvaluator[DomainObject]':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -1,14 +1,25 @@
-from typing import Callable, cast, ParamSpec, Generic, overload
+import importlib
+import pickle
+from keyword import iskeyword
+from typing import Any, Callable, cast, ClassVar, ParamSpec, Generic, overload
 
+from . import vectorization
+from .compilation import Compiler
 from .criteria import Criteria, DomainObject
+from .errors import CriteriaNotSatisfied
+from .vectorization import Batch, Mask, as_mask
 
 
 Params = ParamSpec('Params')
 Predicate = Callable[[DomainObject, Params], bool]
+VectorPredicate = Callable[[Batch, Params], Any]
 
 
 class PredicateCriteria(Criteria[DomainObject], Generic[DomainObject, Params]):
+    __slots__ = ('args', 'kwargs')
+
     predicate: Predicate[DomainObject, Params]
+    vector_predicate: ClassVar[VectorPredicate | None] = None
     args: Params.args
     kwargs: Params.kwargs
 
@@ -19,11 +30,100 @@ class PredicateCriteria(Criteria[DomainObject], Generic[DomainObject, Params]):
     def is_satisfied_by(self, candidate: DomainObject) -> bool:
         return self.predicate(candidate, *self.args, **self.kwargs)
 
+    def __eq__(self, other: object) -> bool:
+        return (
+            other.__class__ is self.__class__ and
+            self.args == other.args and
+            self.kwargs == other.kwargs
+        )
+
+    def __hash__(self) -> int:
+        return hash((
+            self.__class__, self.args,
+            frozenset(self.kwargs.items()),
+        ))
+
+    def compile_expression(self, compiler: Compiler) -> str:
+        if (
+            self.__class__.is_satisfied_by
+            is not PredicateCriteria.is_satisfied_by
+        ):
+            return super().compile_expression(compiler)
+
+        arguments = [compiler.CANDIDATE]
+        arguments.extend(compiler.bind(arg) for arg in self.args)
+        for name, value in self.kwargs.items():
+            if name.isidentifier() and not iskeyword(name):
+                arguments.append(f'{name}={compiler.bind(value)}')
+            else:
+                arguments.append(f'**{compiler.bind({name: value})}')
+
+        return f'{compiler.bind(self.predicate)}({", ".join(arguments)})'
+
+    def mask(self, batch: Batch) -> Mask:
+        if (
+            self.__class__.is_satisfied_by
+            is not PredicateCriteria.is_satisfied_by
+        ):
+            return super().mask(batch)
+
+        if self.vector_predicate is not None and vectorization.is_available():
+            return as_mask(
+                self.vector_predicate(batch, *self.args, **self.kwargs)
+            )
+
+        predicate, args, kwargs = self.predicate, self.args, self.kwargs
+        return as_mask(
+            predicate(candidate, *args, **kwargs)
+            for candidate in batch.rows()
+        )
+
+    def __reduce__(self):
+        # Классы, созданные make_predicate_criteria, нельзя импортировать
+        # по имени: под ним в модуле лежит CriteriaDescriptor.
+        # Класс восстанавливается по имени исходной функции.
+        cls = self.__class__
+        if '<locals>' in cls.__qualname__:
+            raise pickle.PicklingError(
+                f'Can not pickle {cls.__qualname__}: '
+                f'criteria must be defined at module or class level'
+            )
+        return (
+            _restore_criteria,
+            (cls.__module__, cls.__qualname__),
+            (
+                getattr(self, '__dict__', None),
+                {'args': self.args, 'kwargs': self.kwargs},
+            ),
+        )
+
     def __str_(self) -> str:
         return self.predicate.__name__
 
+    def describe(self) -> str:
+        args = [repr(arg) for arg in self.args]
+        args += [f'{name}={value!r}' for name, value in self.kwargs.items()]
+        return f'{self.__class__.__qualname__}({", ".join(args)})'
+
+
+def _restore_criteria(module: str, qualname: str) -> PredicateCriteria:
+    obj = importlib.import_module(module)
+    for name in qualname.split('.'):
+        obj = getattr(obj, name)
+    if isinstance(obj, CriteriaDescriptor):
+        obj = obj.criteria_cls
+    return obj.__new__(obj)
+
 
 class BoundUnformedCriteria(Generic[DomainObject, Params]):
+    """
+    Критерий из предиката, привязанный к экземпляру, но ещё без аргументов.
+
+    Если класс критерия не переопределяет is_satisfied_by, предикат
+    вызывается напрямую, без создания экземпляра критерия.
+    """
+    __slots__ = ('instance', 'criteria_cls')
+
     instance: DomainObject
     criteria_cls: type[PredicateCriteria[DomainObject, Params]]
 
@@ -38,20 +138,25 @@ class BoundUnformedCriteria(Generic[DomainObject, Params]):
         return self.is_satisfied(*args, **kwargs)
 
     def is_satisfied(self, *args: Params.args, **kwargs: Params.kwargs) -> bool:
-        return self.criteria_cls(
-            *args, **kwargs,
-        ).is_satisfied_by(self.instance)
+        criteria_cls = self.criteria_cls
+        if criteria_cls.is_satisfied_by is _predicate_is_satisfied_by:
+            return criteria_cls.predicate(self.instance, *args, **kwargs)
+        return criteria_cls(*args, **kwargs).is_satisfied_by(self.instance)
 
     def must_be_satisfied(
         self, *args: Params.args,
         **kwargs: Params.kwargs,
     ) -> None:
-        self.criteria_cls(
-            *args, **kwargs,
-        ).must_be_satisfied_by(self.instance)
+        if not self.is_satisfied(*args, **kwargs):
+            raise CriteriaNotSatisfied(self.criteria_cls(*args, **kwargs))
+
+
+_predicate_is_satisfied_by = PredicateCriteria.is_satisfied_by
 
 
 class CriteriaDescriptor(Generic[DomainObject, Params]):
+    __slots__ = ('criteria_cls',)
+
     criteria_cls: type[PredicateCriteria[DomainObject, Params]]
 
     def __init__(
@@ -64,6 +169,28 @@ class CriteriaDescriptor(Generic[DomainObject, Params]):
     ) -> Criteria[DomainObject]:
         return self.criteria_cls(*args, **kwargs)
 
+    def vectorized(
+        self, fn: VectorPredicate[Params],
+    ) -> 'CriteriaDescriptor[DomainObject, Params]':
+        """
+        Декоратор, добавляющий критерию векторизованную реализацию
+        для пакетной проверки (см. Criteria.mask). Функция получает Batch
+        и те же аргументы, что и предикат, и возвращает булев массив NumPy.
+        Без установленного NumPy используется обычный предикат.
+
+        >>> @criteria
+        ... def older_than(task, date):
+        ...     return task.created_at < date
+        ...
+        ... @older_than.vectorized
+        ... def older_than(tasks, date):
+        ...     return tasks['created_at'] < date
+        ...
+        ... older_than(datetime(2024, 1, 1)).filter_many(tasks)
+        """
+        self.criteria_cls.vector_predicate = staticmethod(fn)
+        return self
+
     @overload
     def __get__(
         self, instance: DomainObject,
@@ -82,7 +209,7 @@ class CriteriaDescriptor(Generic[DomainObject, Params]):
         self, instance: DomainObject | None,
         owner: type[DomainObject] | None,
     ):
-        if instance:
+        if instance is not None:
             return BoundUnformedCriteria(instance, self.criteria_cls)
         else:
             return self.criteria_cls
@@ -90,13 +217,17 @@ class CriteriaDescriptor(Generic[DomainObject, Params]):
 
 def make_predicate_criteria(
     fn: Predicate[DomainObject, Params],
+    base: type[PredicateCriteria] = PredicateCriteria,
 ) -> type[PredicateCriteria[DomainObject, Params]]:
 
     new_cls = type(
         fn.__name__,
-        (PredicateCriteria,),
+        (base,),
         {
+            '__slots__': (),
             'predicate': staticmethod(fn),
+            '__module__': fn.__module__,
+            '__qualname__': fn.__qualname__,
             '__is_invariant__': getattr(fn, '__is_invariant__', False),
         }
     )
@@ -1,4 +1,10 @@
 from .base import Repo
-from .translate import translate_for, is_translator
-from .in_memory import InMemoryRepo
+from .changes import ChangeSet
+from .translate import translate_for, is_translator, CriteriaTranslator
+from .query import Cursor, Page
+from .indexes import Index, HashIndex, SortedIndex
+from .storage import DictStorage, SortedStorage
+from .in_memory import InMemoryRepo, Isolation
 from .shelve import ShelveRepo
+from .sqlite import SQLiteRepo, SqlTranslator
+from .asynchronous import AsyncRepo, AsyncInMemoryRepo
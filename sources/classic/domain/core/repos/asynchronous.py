@@ -0,0 +1,155 @@
+import asyncio
+from typing import Sequence
+
+from ..asynchronous import is_async, is_satisfied
+from ..criteria import Criteria
+from ..entities import ID
+
+from .base import RepoBase, Root
+from .in_memory import InMemoryRepo
+from .query import select
+
+
+class AsyncRepo(RepoBase[Root, ID]):
+    """
+    Асинхронный вариант Repo с тем же набором методов.
+
+    Критерии могут содержать асинхронные критерии (см. AsyncCriteria).
+    """
+
+    async def save(self, *objects: Root) -> None:
+        raise NotImplementedError
+
+    async def get(self, id_: ID) -> Root | None:
+        raise NotImplementedError
+
+    async def find(
+        self, criteria: Criteria[Root],
+        order_by: str = None,
+        limit: int = None,
+        offset: int = None,
+    ) -> Sequence[Root]:
+        raise NotImplementedError
+
+    async def count(self, criteria: Criteria[Root] = None) -> int:
+        raise NotImplementedError
+
+    async def exists(self, criteria: Criteria[Root]) -> bool:
+        raise NotImplementedError
+
+    async def remove(self, *objects: Root) -> None:
+        raise NotImplementedError
+
+    async def remove_by_id(self, *object_ids: ID) -> None:
+        raise NotImplementedError
+
+
+class AsyncInMemoryRepo(AsyncRepo[Root, ID]):
+    """
+    Асинхронная обёртка над InMemoryRepo.
+
+    Синхронные критерии проверяются обёрнутым хранилищем как есть,
+    с индексами и трансляторами. Если в критерии есть асинхронные
+    части, то остаток, не покрытый индексами, проверяется на кандидатах
+    конкурентно, но не более чем concurrency проверками одновременно:
+
+    >>> repo = AsyncInMemoryRepo(TaskRepo(), concurrency=10)
+    ... await repo.find(Task.has_status('new') & within_quota(10))
+    [Task(...)]
+    """
+
+    def __init__(
+        self, repo: InMemoryRepo[Root, ID] = None,
+        concurrency: int = 100,
+    ) -> None:
+        self.repo = InMemoryRepo() if repo is None else repo
+        self.concurrency = concurrency
+
+    async def _check(
+        self, residual: Criteria[Root], objects: Sequence[Root],
+        first_only: bool = False,
+    ) -> list[Root]:
+        """
+        Проверяет residual на объектах в concurrency задачах, каждая
+        из которых берёт следующий непроверенный объект. С first_only
+        останавливается на первом подходящем объекте.
+        """
+        results = [False] * len(objects)
+        positions = iter(range(len(objects)))
+
+        async def work() -> bool:
+            for position in positions:
+                if await is_satisfied(residual, objects[position]):
+                    results[position] = True
+                    if first_only:
+                        return True
+            return False
+
+        workers = [
+            asyncio.ensure_future(work())
+            for __ in range(min(self.concurrency, len(objects)))
+        ]
+        try:
+            if first_only:
+                for completed in asyncio.as_completed(workers):
+                    if await completed:
+                        break
+            else:
+                await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+        return [obj for obj, result in zip(objects, results) if result]
+
+    async def _filter(
+        self, criteria: Criteria[Root] | None,
+    ) -> list[Root]:
+        objects, residual = self.repo.candidates(criteria)
+        if residual is None:
+            return list(objects)
+        return await self._check(residual, list(objects))
+
+    async def save(self, *objects: Root) -> None:
+        self.repo.save(*objects)
+
+    async def get(self, object_id: ID) -> Root | None:
+        return self.repo.get(object_id)
+
+    async def find(
+        self, criteria: Criteria[Root],
+        order_by: str = None,
+        limit: int = None,
+        offset: int = None,
+    ) -> list[Root]:
+        if criteria is None or not is_async(criteria):
+            return list(self.repo.find(
+                criteria, order_by=order_by, limit=limit, offset=offset,
+            ))
+
+        found = select(
+            await self._filter(criteria), None,
+            order_by=order_by, limit=limit, offset=offset,
+        )
+        return self.repo.isolated(found)
+
+    async def count(self, criteria: Criteria[Root] = None) -> int:
+        if criteria is None or not is_async(criteria):
+            return self.repo.count(criteria)
+        return len(await self._filter(criteria))
+
+    async def exists(self, criteria: Criteria[Root]) -> bool:
+        if not is_async(criteria):
+            return self.repo.exists(criteria)
+
+        objects, residual = self.repo.candidates(criteria)
+        if residual is None:
+            return len(objects) > 0
+        found = await self._check(residual, list(objects), first_only=True)
+        return len(found) > 0
+
+    async def remove(self, *objects: Root) -> None:
+        self.repo.remove(*objects)
+
+    async def remove_by_id(self, *object_ids: ID) -> None:
+        self.repo.remove_by_id(*object_ids)
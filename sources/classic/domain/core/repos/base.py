@@ -1,5 +1,5 @@
 from typing import (
-    ClassVar, Type, Sequence, Generic,
+    Any, ClassVar, Type, Sequence, Generic, Iterable, Iterator, Mapping,
     TypeVar, get_args, Callable,
 )
 
@@ -7,13 +7,23 @@ from ..criteria import Criteria
 from ..entities import ID
 from .. import entities
 
+from .query import Cursor, Page
 from .translate import translators_map
 
 
 Root = TypeVar('Root', bound=entities.Root)
 
 
-class Repo(Generic[Root, ID]):
+def apply_changes(obj: Root, changes: Mapping[str, Any]) -> None:
+    for name, value in changes.items():
+        setattr(obj, name, value)
+
+
+class RepoBase(Generic[Root, ID]):
+    """
+    Общая часть Repo и AsyncRepo: класс корня агрегата из параметров
+    типа и трансляторы критериев, объявленные на классе хранилища.
+    """
     root: type[Root] = None
     _translators: ClassVar[dict[Type[Criteria], Callable]]
 
@@ -27,11 +37,14 @@ class Repo(Generic[Root, ID]):
             assert issubclass(root, entities.Root)
             cls.root = root
 
+
+class Repo(RepoBase[Root, ID]):
+
     def save(self, *objects: Root) -> None:
-        raise NotImplemented
+        raise NotImplementedError
 
     def get(self, id_: ID) -> Root | None:
-        raise NotImplemented
+        raise NotImplementedError
 
     def find(
         self, criteria: Criteria[Root],
@@ -39,16 +52,124 @@ class Repo(Generic[Root, ID]):
         limit: int = None,
         offset: int = None,
     ) -> Sequence[Root]:
-        raise NotImplemented
+        raise NotImplementedError
+
+    def find_page(
+        self, criteria: Criteria[Root],
+        order_by: str = None,
+        limit: int = 100,
+        after: Cursor = None,
+    ) -> Page[Root]:
+        """
+        Возвращает страницу из limit объектов и курсор следующей.
+        Курсор передаётся в after при запросе следующей страницы:
+
+        >>> page = repo.find_page(Task.is_open(), order_by='-created_at')
+        ... while page.next is not None:
+        ...     page = repo.find_page(
+        ...         Task.is_open(), order_by='-created_at', after=page.next,
+        ...     )
+
+        Реализация по умолчанию запрашивает find с limit и offset,
+        хранилища переопределяют её чтением по ключу (значение, id),
+        которое не зависит от номера страницы.
+        """
+        offset = 0
+        if after is not None:
+            after.check(order_by)
+            offset, = after.position
+
+        items = list(self.find(
+            criteria, order_by=order_by or 'id',
+            limit=limit + 1, offset=offset,
+        ))
+        if len(items) <= limit:
+            return Page(items, None)
+        return Page(items[:limit], Cursor(order_by, (offset + limit,)))
+
+    def iter_find(
+        self, criteria: Criteria[Root],
+        order_by: str = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Root]:
+        """
+        Лениво отдаёт все объекты, удовлетворяющие критерию, читая их
+        страницами по batch_size через find_page, так что в памяти
+        одновременно не больше одной страницы.
+        """
+        cursor = None
+        while True:
+            page = self.find_page(
+                criteria, order_by=order_by, limit=batch_size, after=cursor,
+            )
+            yield from page.items
+            if page.next is None:
+                return
+            cursor = page.next
 
     def count(self, criteria: Criteria[Root] = None) -> int:
-        raise NotImplemented
+        raise NotImplementedError
 
     def exists(self, criteria: Criteria[Root]) -> bool:
-        raise NotImplemented
+        raise NotImplementedError
 
     def remove(self, *objects: Root) -> None:
-        raise NotImplemented
+        raise NotImplementedError
 
     def remove_by_id(self, *object_ids: ID) -> None:
-        raise NotImplemented
+        raise NotImplementedError
+
+    def get_many(self, object_ids: Iterable[ID]) -> dict[ID, Root]:
+        """
+        Возвращает найденные объекты по id, отсутствующие пропускает.
+
+        Реализация по умолчанию вызывает get для каждого id,
+        хранилища переопределяют её одним запросом.
+        """
+        found = {}
+        for object_id in object_ids:
+            obj = self.get(object_id)
+            if obj is not None:
+                found[object_id] = obj
+        return found
+
+    def remove_by(self, criteria: Criteria[Root]) -> int:
+        """
+        Удаляет объекты, удовлетворяющие критерию,
+        возвращает количество удалённых.
+        """
+        objects = list(self.find(criteria))
+        self.remove(*objects)
+        return len(objects)
+
+    def update_by(
+        self, criteria: Criteria[Root],
+        changes: Mapping[str, Any],
+    ) -> int:
+        """
+        Присваивает атрибутам объектов, удовлетворяющих критерию,
+        значения из changes и сохраняет их одним вызовом save.
+        Возвращает количество изменённых объектов.
+
+        >>> repo.update_by(Task.has_status('new'), {'status': 'expired'})
+        12
+        """
+        objects = list(self.find(criteria))
+        for obj in objects:
+            apply_changes(obj, changes)
+        self.save(*objects)
+        return len(objects)
+
+    def flush(
+        self, saved: Sequence[Root],
+        removed_ids: Sequence[ID],
+    ) -> None:
+        """
+        Записывает пачку изменений из ChangeSet: сохраняет saved
+        и удаляет объекты с removed_ids. Хранилища переопределяют метод,
+        чтобы записать всё за одну синхронизацию или транзакцию.
+        """
+        if saved:
+            self.save(*saved)
+        if removed_ids:
+            self.remove_by_id(*removed_ids)
@@ -0,0 +1,120 @@
+from typing import Any, Generic, Iterator
+
+from ..entities import ID
+
+from .base import Repo, Root
+
+
+class RepoChanges(Generic[Root, ID]):
+    """
+    Изменения одного хранилища в ChangeSet.
+    """
+    repo: Repo[Root, ID]
+    new: dict[ID, Root]
+    dirty: dict[ID, Root]
+    removed: dict[ID, None]
+
+    def __init__(self, repo: Repo[Root, ID]) -> None:
+        self.repo = repo
+        self.new = {}
+        self.dirty = {}
+        self.removed = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.new or self.dirty or self.removed)
+
+    def flush(self) -> None:
+        self.repo.flush(
+            [*self.new.values(), *self.dirty.values()],
+            list(self.removed),
+        )
+        self.new.clear()
+        self.dirty.clear()
+        self.removed.clear()
+
+
+class ChangeSet:
+    """
+    Единица работы: копит новые, изменённые и удалённые корни агрегатов
+    и записывает их одной пачкой на каждое хранилище (см. Repo.flush).
+
+    Повторная регистрация объекта с тем же id заменяет предыдущую,
+    удаление нового, ещё не записанного объекта просто отменяет
+    его добавление. При выходе из блока with без исключения изменения
+    записываются, при исключении - отбрасываются.
+
+    >>> with ChangeSet() as changes:
+    ...     for row in rows:
+    ...         changes.add(orders, Order.from_row(row))
+    ...     changes.remove(customers, blocked_customer)
+    """
+
+    def __init__(self) -> None:
+        self._repos: dict[int, RepoChanges] = {}
+
+    def __enter__(self) -> 'ChangeSet':
+        return self
+
+    def __exit__(self, exc_type: Any, *exc_info: Any) -> None:
+        if exc_type is None:
+            self.flush()
+        else:
+            self.clear()
+
+    def __iter__(self) -> Iterator[RepoChanges]:
+        return iter(self._repos.values())
+
+    def __bool__(self) -> bool:
+        return any(self._repos.values())
+
+    def changes_of(self, repo: Repo[Root, ID]) -> RepoChanges[Root, ID]:
+        changes = self._repos.get(id(repo))
+        if changes is None:
+            changes = self._repos[id(repo)] = RepoChanges(repo)
+        return changes
+
+    def add(self, repo: Repo[Root, ID], *objects: Root) -> None:
+        """
+        Регистрирует новые объекты.
+        """
+        changes = self.changes_of(repo)
+        for obj in objects:
+            changes.removed.pop(obj.id, None)
+            changes.dirty.pop(obj.id, None)
+            changes.new[obj.id] = obj
+
+    def update(self, repo: Repo[Root, ID], *objects: Root) -> None:
+        """
+        Регистрирует изменённые объекты.
+        """
+        changes = self.changes_of(repo)
+        for obj in objects:
+            changes.removed.pop(obj.id, None)
+            if obj.id in changes.new:
+                changes.new[obj.id] = obj
+            else:
+                changes.dirty[obj.id] = obj
+
+    def remove(self, repo: Repo[Root, ID], *objects: Root) -> None:
+        """
+        Регистрирует удаление объектов.
+        """
+        self.remove_by_id(repo, *(obj.id for obj in objects))
+
+    def remove_by_id(self, repo: Repo[Root, ID], *object_ids: ID) -> None:
+        changes = self.changes_of(repo)
+        for object_id in object_ids:
+            changes.dirty.pop(object_id, None)
+            if changes.new.pop(object_id, None) is None:
+                changes.removed[object_id] = None
+
+    def flush(self) -> None:
+        """
+        Записывает изменения всех хранилищ, по одной пачке на хранилище.
+        """
+        for changes in self._repos.values():
+            if changes:
+                changes.flush()
+
+    def clear(self) -> None:
+        self._repos.clear()
@@ -1,46 +1,497 @@
+import threading
+from contextlib import contextmanager
 from copy import deepcopy
-from typing import Sequence
+from enum import Enum
+from itertools import islice
+from typing import (
+    Any, ClassVar, Collection, Generic, Iterable, Iterator, Mapping,
+    Sequence,
+)
 
+from ..copying import copy_object, freeze_object
 from ..criteria import Criteria
-from ..entities import ID, Root
+from ..entities import ID
 
-from .base import Repo
+from .base import Repo, Root, apply_changes
+from .indexes import Index, SortedIndex
+from .query import Cursor, Page, keyset, select, select_after
+from .storage import DictStorage
+from .translate import CriteriaTranslator
+
+
+class Isolation(Enum):
+    """
+    Способ изоляции объектов InMemoryRepo от изменений вызывающим кодом.
+
+    NONE - объекты не копируются, save сохраняет, а get и find
+    возвращают те же экземпляры.
+
+    DEEPCOPY - get и find возвращают копии, сделанные через deepcopy.
+
+    COPY - get и find возвращают копии, сделанные функцией, сгенерированной
+    по полям класса (см. copying.make_copier): Value и неизменяемые поля
+    не копируются. Агрегат не должен содержать циклических ссылок.
+
+    SNAPSHOT - save сохраняет неизменяемую копию (см.
+    copying.freeze_object), get и find возвращают её без копирования.
+    Присваивание полям полученных объектов и вложенных в них сущностей
+    вызывает FrozenInstanceError, изменение списков, словарей
+    и множеств в них - TypeError. Чтобы изменить объект, его нужно
+    скопировать (copy_object) и сохранить копию.
+    """
+    NONE = 'none'
+    DEEPCOPY = 'deepcopy'
+    COPY = 'copy'
+    SNAPSHOT = 'snapshot'
+
+
+class IdsTranslator(CriteriaTranslator[Collection[ID]]):
+    """
+    Переводит критерии в множества id объектов InMemoryRepo по индексам.
+    """
+
+    def conjunction(self, queries: list[Collection[ID]]) -> set[ID]:
+        return set(queries[0]).intersection(*queries[1:])
+
+    def disjunction(self, queries: list[Collection[ID]]) -> set[ID]:
+        return set().union(*queries)
+
+
+class Version(Generic[Root, ID]):
+    """
+    Состояние InMemoryRepo: объекты и индексы по ним.
+
+    Используется внутри библиотеки, см. InMemoryRepo.
+    """
+    __slots__ = ('objects', 'indexes')
+
+    objects: DictStorage[ID, Root]
+    indexes: dict[str, Index[ID]]
+
+    def __init__(
+        self, objects: DictStorage[ID, Root],
+        indexes: dict[str, Index[ID]],
+    ) -> None:
+        self.objects = objects
+        self.indexes = indexes
+
+    def copy(self) -> 'Version[Root, ID]':
+        return Version(
+            self.objects.copy(),
+            {
+                attribute: index.copy()
+                for attribute, index in self.indexes.items()
+            },
+        )
 
 
 class InMemoryRepo(Repo[Root, ID]):
+    """
+    Хранилище объектов в памяти процесса.
 
-    def __init__(self):
-        self.objects = {}
+    Изоляция возвращаемых объектов настраивается параметром isolation,
+    см. Isolation.
 
-    def save(self, *objects: Root) -> None:
+    На классе-наследнике можно объявить вторичные индексы по атрибутам
+    и трансляторы критериев, отвечающие по индексам вместо проверки
+    каждого объекта. Транслятор возвращает коллекцию id объектов,
+    удовлетворяющих критерию, или None, если ответить не может:
+
+    >>> from classic.domain.core import InMemoryRepo, translate_for
+    ... from classic.domain.core.repos import HashIndex, SortedIndex
+    ...
+    ... class TaskRepo(InMemoryRepo[Task, int]):
+    ...     indexes = (HashIndex('status'), SortedIndex('created_at'))
+    ...
+    ...     @translate_for(Task.has_status)
+    ...     def _has_status(self, criteria):
+    ...         return self.index('status').equal(*criteria.args)
+    ...
+    ...     @translate_for(Task.created_after)
+    ...     def _created_after(self, criteria):
+    ...         return self.index('created_at').range(
+    ...             low=criteria.args[0], include_low=False,
+    ...         )
+
+    Вложенные критерии And, которые не удалось транслировать,
+    проверяются только на объектах, найденных по индексам.
+    Or транслируется, только если транслируются все вложенные критерии.
+
+    Объекты хранятся в движке storage, по умолчанию - в словаре
+    (DictStorage). С SortedStorage выборки и страницы по порядку id,
+    как и с SortedIndex по атрибуту order_by, читаются с нужной позиции
+    без сортировки всех объектов, а диапазоны id доступны
+    трансляторам через self.objects.range.
+
+    С concurrent=True хранилище можно разделять между потоками.
+    Каждое чтение работает с неизменяемой версией объектов и индексов,
+    взятой в начале вызова, и не блокируется, в т.ч. ленивый find,
+    который дочитывается после последующих записей. Трансляторы
+    через self.objects и self.index видят ту же версию. Запись под
+    блокировкой копирует текущую версию, меняет копию и публикует её
+    целиком, так что читатели не видят половины изменений, а запись,
+    завершившаяся ошибкой, не меняет ничего.
+
+    Копия - это все объекты и все записи индексов, так что каждый вызов
+    записи стоит O(число объектов) независимо от числа изменённых
+    (на сотнях тысяч объектов - десятки миллисекунд), а записи
+    выполняются строго по одной. Режим подходит для данных, которые
+    читаются часто, а меняются редко и пачками (save(*objects),
+    ChangeSet), например, справочников. Для кеша, который часто
+    обновляется по одному объекту, он не подходит. Объекты, видимые
+    читателям, менять нельзя, поэтому режим стоит сочетать
+    с Isolation.SNAPSHOT:
+
+    >>> cache = TaskRepo(isolation=Isolation.SNAPSHOT, concurrent=True)
+    """
+    indexes: ClassVar[Sequence[Index]] = ()
+    storage: ClassVar[type[DictStorage]] = DictStorage
+
+    def __init__(
+        self, isolation: Isolation = Isolation.DEEPCOPY,
+        concurrent: bool = False,
+    ):
+        self.isolation = isolation
+        self.concurrent = concurrent
+        self._copy_on_save = None
+        self._copy_on_read = None
+        if isolation is Isolation.DEEPCOPY:
+            self._copy_on_read = deepcopy
+        elif isolation is Isolation.COPY:
+            self._copy_on_read = copy_object
+        elif isolation is Isolation.SNAPSHOT:
+            self._copy_on_save = freeze_object
+
+        self._version = Version(
+            self.storage(),
+            {index.attribute: index.empty() for index in self.indexes},
+        )
+        self._write_lock = threading.Lock() if concurrent else None
+        # Версия, по которой сейчас транслируются критерии в этом потоке
+        self._translating = threading.local()
+
+    @property
+    def objects(self) -> DictStorage[ID, Root]:
+        return self._current().objects
+
+    def index(self, attribute: str) -> Index[ID]:
+        return self._current().indexes[attribute]
+
+    def _current(self) -> Version:
+        """
+        Версия, по которой в этом потоке транслируются критерии,
+        вне трансляции - последняя опубликованная.
+        """
+        version = getattr(self._translating, 'version', None)
+        if version is None:
+            version = self._version
+        return version
+
+    @contextmanager
+    def _writing(self) -> Iterator[Version]:
+        """
+        Версия, которую меняет запись. Без concurrent - текущая,
+        с concurrent - копия текущей, которая под блокировкой записи
+        публикуется целиком, если запись завершилась без ошибок.
+        """
+        if self._write_lock is None:
+            yield self._version
+            return
+
+        with self._write_lock:
+            version = self._version.copy()
+            yield version
+            self._version = version
+
+    def _put(self, version: Version, objects: Iterable[Root]) -> None:
+        copy = self._copy_on_save
+        indexes = version.indexes.values()
         for obj in objects:
-            self.objects[obj.id] = obj
+            if copy is not None:
+                obj = copy(obj)
+            version.objects[obj.id] = obj
+            for index in indexes:
+                index.add(obj)
+
+    def _delete(self, version: Version, object_ids: Iterable[ID]) -> None:
+        indexes = version.indexes.values()
+        for obj_id in object_ids:
+            del version.objects[obj_id]
+            for index in indexes:
+                index.discard(obj_id)
+
+    def save(self, *objects: Root) -> None:
+        with self._writing() as version:
+            self._put(version, objects)
 
     def get(self, object_id: ID) -> Root | None:
-        return deepcopy(self.objects[object_id])
+        obj = self._version.objects[object_id]
+        if self._copy_on_read is not None:
+            obj = self._copy_on_read(obj)
+        return obj
 
     def find(
         self, criteria: Criteria[Root],
         order_by: str = None,
         limit: int = None,
         offset: int = None,
-    ) -> Sequence[object]:
-        return list(filter(criteria, self.objects))
+    ) -> Iterator[Root]:
+        version = self._version
+        ids, residual = self._plan_ids(criteria, version)
+        ordered = None
+        if ids is None and order_by is not None:
+            ordered = self._ordered(version, order_by)
+
+        if ordered is not None:
+            if residual is not None:
+                ordered = filter(residual, ordered)
+            start = offset or 0
+            found = islice(
+                ordered, start, None if limit is None else start + limit,
+            )
+        else:
+            found = select(
+                self._candidates(ids, version), residual,
+                order_by=order_by, limit=limit, offset=offset,
+            )
+        if self._copy_on_read is not None:
+            return map(self._copy_on_read, found)
+        return found
+
+    def find_page(
+        self, criteria: Criteria[Root],
+        order_by: str = None,
+        limit: int = 100,
+        after: Cursor = None,
+    ) -> Page[Root]:
+        """
+        Страница по ключу (значение order_by, id). Если порядок
+        поддерживается SortedIndex по атрибуту order_by или хранилищем
+        (для id), страница читается с позиции курсора, иначе объекты
+        просматриваются без сортировки через select_after. В обоих
+        случаях стоимость не зависит от номера страницы.
+        """
+        position = None
+        if after is not None:
+            after.check(order_by)
+            position = after.position
+
+        version = self._version
+        ids, residual = self._plan_ids(criteria, version)
+        ordered = None
+        if ids is None:
+            ordered = self._ordered(version, order_by, position)
+
+        if ordered is not None:
+            if residual is not None:
+                ordered = filter(residual, ordered)
+            items = list(islice(ordered, limit + 1))
+        else:
+            items = select_after(
+                self._candidates(ids, version), residual,
+                order_by=order_by, limit=limit + 1, after=position,
+            )
+
+        cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            key, __ = keyset(order_by)
+            cursor = Cursor(order_by, key(items[-1]))
+
+        return Page(self.isolated(items), cursor)
+
+    def iter_find(
+        self, criteria: Criteria[Root],
+        order_by: str = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Root]:
+        if self._is_ordered(self._version, order_by):
+            return super().iter_find(criteria, order_by, batch_size)
+
+        # Объекты уже в памяти: ленивый select держит только ссылки
+        # и не просматривает хранилище заново на каждой странице
+        return self.find(criteria, order_by=order_by or 'id')
+
+    def get_many(self, object_ids: Iterable[ID]) -> dict[ID, Root]:
+        objects = self._version.objects
+        copy = self._copy_on_read
+        found = {}
+        for object_id in object_ids:
+            obj = objects.get(object_id)
+            if obj is not None:
+                found[object_id] = obj if copy is None else copy(obj)
+        return found
 
     def remove(self, *objects: Root) -> None:
-        for obj in objects:
-            del self.objects[obj.id]
+        self.remove_by_id(*(obj.id for obj in objects))
+
+    def remove_by(self, criteria: Criteria[Root]) -> int:
+        with self._writing() as version:
+            objects, criteria = self._plan(criteria, version)
+            if criteria is not None:
+                objects = filter(criteria, objects)
+            ids = [obj.id for obj in objects]
+            self._delete(version, ids)
+        return len(ids)
+
+    def update_by(
+        self, criteria: Criteria[Root],
+        changes: Mapping[str, Any],
+    ) -> int:
+        # Объекты выданы наружу как снимки или видны читателям
+        # прежних версий, их менять нельзя
+        copy = (
+            self.isolation is Isolation.SNAPSHOT or
+            self._write_lock is not None
+        )
+        with self._writing() as version:
+            objects, criteria = self._plan(criteria, version)
+            if criteria is not None:
+                objects = filter(criteria, objects)
+            objects = list(objects)
+
+            for obj in objects:
+                if copy:
+                    obj = copy_object(obj)
+                    apply_changes(obj, changes)
+                    if self._copy_on_save is not None:
+                        obj = self._copy_on_save(obj)
+                    version.objects[obj.id] = obj
+                else:
+                    apply_changes(obj, changes)
+                for index in version.indexes.values():
+                    index.add(obj)
+        return len(objects)
 
     def remove_by_id(self, *object_ids: ID) -> None:
-        for obj_id in object_ids:
-            del self.objects[obj_id]
+        with self._writing() as version:
+            self._delete(version, object_ids)
+
+    def flush(
+        self, saved: Sequence[Root],
+        removed_ids: Sequence[ID],
+    ) -> None:
+        with self._writing() as version:
+            self._put(version, saved)
+            self._delete(version, removed_ids)
 
     def count(self, criteria: Criteria[Root] = None) -> int:
-        return len(
-            filter(criteria, self.objects.values())
-            if criteria is not None
-            else self.objects
+        version = self._version
+        ids, residual = self._plan_ids(criteria, version)
+        if residual is None:
+            return len(version.objects if ids is None else ids)
+        return sum(
+            1 for __ in filter(residual, self._iter_candidates(ids, version))
         )
 
     def exists(self, criteria: Criteria[Root]) -> bool:
-        return any(filter(criteria, self.objects.values()))
+        version = self._version
+        ids, residual = self._plan_ids(criteria, version)
+        if residual is None:
+            return len(version.objects if ids is None else ids) > 0
+        return any(map(residual, self._iter_candidates(ids, version)))
+
+    @staticmethod
+    def _is_ordered(version: Version, order_by: str | None) -> bool:
+        attribute = 'id' if order_by is None else order_by.lstrip('-')
+        return (
+            isinstance(version.indexes.get(attribute), SortedIndex) or
+            attribute == 'id' and version.objects.ordered
+        )
+
+    def _ordered(
+        self, version: Version,
+        order_by: str | None,
+        after: tuple[Any, ID] = None,
+    ) -> Iterator[Root] | None:
+        """
+        Лениво отдаёт объекты в порядке ключа (значение order_by, id)
+        строго после позиции after или возвращает None, если такой
+        порядок не поддерживается ни индексом, ни хранилищем.
+        """
+        if not self._is_ordered(version, order_by):
+            return None
+
+        attribute = 'id' if order_by is None else order_by.lstrip('-')
+        descending = order_by is not None and order_by[0] == '-'
+        index = version.indexes.get(attribute)
+        if isinstance(index, SortedIndex):
+            return map(
+                version.objects.__getitem__, index.scan(after, descending),
+            )
+        return version.objects.scan(
+            None if after is None else after[1], descending,
+        )
+
+    def candidates(
+        self, criteria: Criteria[Root] | None,
+    ) -> tuple[Collection[Root], Criteria[Root] | None]:
+        """
+        Возвращает объекты-кандидаты, найденные по индексам, и остаток
+        критерия, который нужно проверить на каждом из них. Объекты -
+        хранимые экземпляры, наружу их нужно отдавать через isolated.
+
+        Нужен обёрткам, которые проверяют остаток сами,
+        см. AsyncInMemoryRepo.
+        """
+        return self._plan(criteria)
+
+    def isolated(self, objects: Iterable[Root]) -> list[Root]:
+        """
+        Возвращает объекты, изолированные так же, как результаты find,
+        см. Isolation.
+        """
+        copy = self._copy_on_read
+        if copy is None:
+            return list(objects)
+        return [copy(obj) for obj in objects]
+
+    def _plan(
+        self, criteria: Criteria[Root] | None,
+        version: Version = None,
+    ) -> tuple[Collection[Root], Criteria[Root] | None]:
+        """
+        Возвращает объекты-кандидаты и остаток критерия,
+        который нужно проверить на каждом из них.
+        """
+        version = version or self._version
+        ids, residual = self._plan_ids(criteria, version)
+        return self._candidates(ids, version), residual
+
+    def _plan_ids(
+        self, criteria: Criteria[Root] | None,
+        version: Version,
+    ) -> tuple[Collection[ID] | None, Criteria[Root] | None]:
+        """
+        Возвращает id, найденные по индексам версии (None, если индексы
+        не помогли), и остаток критерия.
+        """
+        if criteria is None or not self._translators:
+            return None, criteria
+
+        self._translating.version = version
+        try:
+            ids, residual = IdsTranslator(self).translate(criteria)
+        finally:
+            self._translating.version = None
+
+        if ids is None:
+            return None, criteria
+        return ids, residual
+
+    @staticmethod
+    def _candidates(
+        ids: Collection[ID] | None, version: Version,
+    ) -> Collection[Root]:
+        if ids is None:
+            return version.objects.values()
+        objects = version.objects
+        return [objects[id_] for id_ in ids]
+
+    @staticmethod
+    def _iter_candidates(
+        ids: Collection[ID] | None, version: Version,
+    ) -> Iterable[Root]:
+        if ids is None:
+            return version.objects.values()
+        return map(version.objects.__getitem__, ids)
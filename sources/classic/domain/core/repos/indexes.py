@@ -0,0 +1,161 @@
+from operator import itemgetter
+from typing import Any, Generic, Hashable, Iterable, Iterator
+
+from ..entities import ID, Root
+
+from .storage import SortedList
+
+
+_MISSING = object()
+_value = itemgetter(0)
+
+
+class Index(Generic[ID]):
+    """
+    Базовый класс вторичного индекса по атрибуту корня агрегата.
+
+    Индекс хранит значение атрибута для каждого id, поэтому при повторном
+    сохранении изменённого объекта старая запись удаляется корректно.
+
+    Объявляются на классе репозитория, у каждого экземпляра репозитория
+    свои пустые копии, см. InMemoryRepo.indexes.
+    """
+    attribute: str
+
+    def __init__(self, attribute: str) -> None:
+        self.attribute = attribute
+        self._values = {}
+
+    def empty(self) -> 'Index[ID]':
+        return self.__class__(self.attribute)
+
+    def copy(self) -> 'Index[ID]':
+        copy = self.empty()
+        copy._values = self._values.copy()
+        self._copy_entries(copy)
+        return copy
+
+    def add(self, obj: Root) -> None:
+        value = getattr(obj, self.attribute)
+        old_value = self._values.get(obj.id, _MISSING)
+        if old_value is not _MISSING:
+            if old_value == value:
+                return
+            self._remove(obj.id, old_value)
+
+        self._values[obj.id] = value
+        self._insert(obj.id, value)
+
+    def discard(self, id_: ID) -> None:
+        old_value = self._values.pop(id_, _MISSING)
+        if old_value is not _MISSING:
+            self._remove(id_, old_value)
+
+    def equal(self, value: Any) -> Iterable[ID]:
+        raise NotImplementedError
+
+    def _copy_entries(self, copy: 'Index[ID]') -> None:
+        raise NotImplementedError
+
+    def _insert(self, id_: ID, value: Any) -> None:
+        raise NotImplementedError
+
+    def _remove(self, id_: ID, value: Any) -> None:
+        raise NotImplementedError
+
+
+class HashIndex(Index[ID]):
+    """
+    Индекс для поиска по равенству значения атрибута.
+    Значения атрибута должны быть хешируемыми.
+    """
+
+    def __init__(self, attribute: str) -> None:
+        super().__init__(attribute)
+        self._buckets: dict[Hashable, set[ID]] = {}
+
+    def equal(self, value: Hashable) -> set[ID]:
+        return self._buckets.get(value, set())
+
+    def any_of(self, values: Iterable[Hashable]) -> set[ID]:
+        result = set()
+        for value in values:
+            result |= self.equal(value)
+        return result
+
+    def _copy_entries(self, copy: 'HashIndex[ID]') -> None:
+        copy._buckets = {
+            value: bucket.copy()
+            for value, bucket in self._buckets.items()
+        }
+
+    def _insert(self, id_: ID, value: Hashable) -> None:
+        bucket = self._buckets.get(value)
+        if bucket is None:
+            bucket = self._buckets[value] = set()
+        bucket.add(id_)
+
+    def _remove(self, id_: ID, value: Hashable) -> None:
+        bucket = self._buckets[value]
+        bucket.discard(id_)
+        if not bucket:
+            del self._buckets[value]
+
+
+class SortedIndex(Index[ID]):
+    """
+    Индекс для поиска по диапазону значений атрибута.
+
+    Хранит пары (значение, id) в SortedList, поэтому значения
+    атрибута, а при равенстве значений и id, должны быть сравнимы.
+    """
+
+    def __init__(self, attribute: str) -> None:
+        super().__init__(attribute)
+        self._entries: SortedList[tuple[Any, ID]] = SortedList()
+
+    def equal(self, value: Any) -> list[ID]:
+        return self.range(value, value)
+
+    def range(
+        self, low: Any = None, high: Any = None,
+        include_low: bool = True,
+        include_high: bool = True,
+    ) -> list[ID]:
+        """
+        Возвращает id объектов, у которых значение атрибута лежит
+        между low и high, в порядке возрастания значения.
+        None означает отсутствие границы.
+        """
+        return [
+            id_ for __, id_ in self._entries.irange(
+                low, high, include_low, include_high, key=_value,
+            )
+        ]
+
+    def scan(
+        self, after: tuple[Any, ID] = None,
+        descending: bool = False,
+    ) -> Iterator[ID]:
+        """
+        Лениво отдаёт id объектов в порядке (значение, id), начиная
+        строго после позиции after, по убыванию - строго до неё.
+        Нужен для постраничного чтения по курсору.
+        """
+        if descending:
+            entries = self._entries.irange(
+                high=after, include_high=False, reverse=True,
+            )
+        else:
+            entries = self._entries.irange(low=after, include_low=False)
+        for __, id_ in entries:
+            yield id_
+
+    def _copy_entries(self, copy: 'SortedIndex[ID]') -> None:
+        copy._entries = self._entries.copy()
+
+    def _insert(self, id_: ID, value: Any) -> None:
+        self._entries.add((value, id_))
+
+    def _remove(self, id_: ID, value: Any) -> None:
+        self._entries.discard((value, id_))
@@ -0,0 +1,161 @@
+import heapq
+from dataclasses import dataclass
+from itertools import count, islice
+from operator import attrgetter
+from typing import Any, Callable, Generic, Iterable, Iterator, TypeVar
+
+from ..criteria import Criteria
+from ..entities import Root
+
+
+Object = TypeVar('Object')
+
+
+class Descending:
+    """
+    Обёртка над ключом сортировки, обращающая порядок сравнения.
+    Нужна, чтобы сортировать по убыванию значения, которые нельзя обратить
+    арифметически (строки, даты и т.п.).
+    """
+    __slots__ = ('value',)
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+    def __lt__(self, other: 'Descending') -> bool:
+        return other.value < self.value
+
+    def __eq__(self, other: object) -> bool:
+        return (
+            isinstance(other, Descending) and
+            self.value == other.value
+        )
+
+
+def ordering(order_by: str) -> tuple[Callable[[Root], Any], bool]:
+    """
+    Разбирает order_by вида 'attribute' или '-attribute'
+    (по убыванию) в функцию-ключ и признак обратного порядка.
+    """
+    if order_by.startswith('-'):
+        return attrgetter(order_by[1:]), True
+    return attrgetter(order_by), False
+
+
+def select(
+    objects: Iterable[Root],
+    criteria: Criteria[Root] = None,
+    order_by: str = None,
+    limit: int = None,
+    offset: int = None,
+) -> Iterator[Root]:
+    """
+    Ленивый запрос к последовательности объектов: фильтрация по критерию,
+    сортировка, limit и offset.
+
+    Ничего не вычисляется до начала итерации. С limit выбираются
+    offset + limit первых объектов через кучу, без сортировки всех
+    подходящих. Без limit объекты отдаются по одному из кучи, так что
+    чтение первой страницы не требует полной сортировки.
+    """
+    if criteria is not None:
+        objects = filter(criteria, objects)
+
+    start = offset or 0
+
+    if order_by is None:
+        stop = None if limit is None else start + limit
+        yield from islice(objects, start, stop)
+        return
+
+    key, reverse = ordering(order_by)
+
+    if limit is not None:
+        top = heapq.nlargest if reverse else heapq.nsmallest
+        yield from islice(top(start + limit, objects, key=key), start, None)
+        return
+
+    wrap = Descending if reverse else None
+    sequence = count()
+    heap = [
+        (wrap(key(obj)) if wrap else key(obj), next(sequence), obj)
+        for obj in objects
+    ]
+    heapq.heapify(heap)
+
+    for __ in range(start):
+        if not heap:
+            return
+        heapq.heappop(heap)
+
+    while heap:
+        yield heapq.heappop(heap)[2]
+
+
+@dataclass(frozen=True)
+class Cursor:
+    """
+    Непрозрачная позиция в выдаче Repo.find_page, с которой начинается
+    следующая страница. Годится только для того же order_by.
+
+    Содержимое position определяет хранилище: для постраничного чтения
+    по ключу это пара (значение ключа сортировки, id) последнего
+    объекта страницы, для реализации по умолчанию - смещение.
+    """
+    order_by: str | None
+    position: tuple
+
+    def check(self, order_by: str | None) -> None:
+        if self.order_by != order_by:
+            raise ValueError(
+                f'Cursor was made for order_by={self.order_by!r}, '
+                f'not {order_by!r}'
+            )
+
+
+@dataclass(frozen=True)
+class Page(Generic[Object]):
+    """
+    Страница выдачи: объекты и курсор следующей страницы,
+    None - если страница последняя.
+    """
+    items: list[Object]
+    next: Cursor | None
+
+
+def keyset(order_by: str | None) -> tuple[Callable[[Root], tuple], bool]:
+    """
+    Функция-ключ (значение атрибута, id) для постраничного чтения
+    по ключу и признак обратного порядка. Без order_by - по id.
+    """
+    if order_by is None:
+        return (lambda obj: (obj.id, obj.id)), False
+
+    key, reverse = ordering(order_by)
+    return (lambda obj: (key(obj), obj.id)), reverse
+
+
+def select_after(
+    objects: Iterable[Root],
+    criteria: Criteria[Root] = None,
+    order_by: str = None,
+    limit: int = 100,
+    after: tuple = None,
+) -> list[Root]:
+    """
+    Первые limit объектов в порядке keyset(order_by), следующие
+    строго после позиции after. Просматривает все объекты,
+    но без сортировки и без пропуска предыдущих страниц.
+    """
+    if criteria is not None:
+        objects = filter(criteria, objects)
+
+    position, reverse = keyset(order_by)
+    if after is not None:
+        if reverse:
+            objects = (obj for obj in objects if position(obj) < after)
+        else:
+            objects = (obj for obj in objects if position(obj) > after)
+
+    top = heapq.nlargest if reverse else heapq.nsmallest
+    return top(limit, objects, key=position)
@@ -1,5 +1,194 @@
-from .base import Repo
+import pickle
+import shelve
+from collections import OrderedDict
+from typing import Any, Iterable, Iterator, Mapping, Sequence
 
+from ..criteria import Criteria
+from ..entities import ID, Root
 
-class ShelveRepo(Repo):
-    pass
+from .base import Repo, apply_changes
+from .query import select
+
+
+class ShelveRepo(Repo[Root, ID]):
+    """
+    Хранилище объектов на диске на основе модуля shelve (dbm + pickle).
+
+    Объекты хранятся под ключом repr(id). save, remove, remove_by_id,
+    remove_by, update_by и flush записывают все изменения
+    и синхронизируют файл один раз на вызов. Удаление отсутствующего id
+    вызывает KeyError до того, как что-либо записано. find, count
+    и exists читают записи по одной, не загружая всё хранилище в память.
+
+    Записи последних сохранённых и прочитанных через get объектов
+    (байты pickle, которые и так получаются при записи) держатся
+    в кеше ограниченного размера cache_size, чтобы не читать их
+    из файла повторно. Каждое чтение распаковывает запись заново,
+    так что изменения полученного или сохранённого объекта
+    не попадают ни в кеш, ни на диск без save, а сохранение
+    не тратит на кеш ничего, кроме ссылки на уже готовые байты.
+
+    >>> with ShelveRepo[Task, int]('tasks.db') as repo:
+    ...     repo.save(Task(1), Task(2))
+    ...     repo.get(1)
+    Task(id=1)
+    """
+    shelf: shelve.Shelf
+    cache_size: int
+
+    def __init__(
+        self, filename: str,
+        cache_size: int = 1024,
+        flag: str = 'c',
+        protocol: int = None,
+    ) -> None:
+        self.shelf = shelve.open(filename, flag=flag, protocol=protocol)
+        self.cache_size = cache_size
+        self.protocol = protocol
+        self._cache: OrderedDict[str, bytes] = OrderedDict()
+
+    def __enter__(self) -> 'ShelveRepo[Root, ID]':
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._cache.clear()
+        self.shelf.close()
+
+    @staticmethod
+    def _key(id_: ID) -> str:
+        return repr(id_)
+
+    def _remember(self, key: str, data: bytes) -> None:
+        if not self.cache_size:
+            return
+
+        self._cache[key] = data
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _read(self, key: str, remember: bool) -> bytes | None:
+        """
+        Возвращает запись из кеша или из файла, None - если её нет.
+        """
+        data = self._cache.get(key)
+        if data is not None:
+            self._cache.move_to_end(key)
+            return data
+
+        # Записи читаются в обход Shelf, чтобы положить в кеш байты,
+        # а не распакованный объект
+        data = self.shelf.dict.get(key.encode(self.shelf.keyencoding))
+        if data is not None and remember:
+            self._remember(key, data)
+        return data
+
+    def _load(self, key: str) -> Root:
+        data = self._cache.get(key)
+        if data is None:
+            return self.shelf[key]
+        return pickle.loads(data)
+
+    def _scan(self) -> Iterator[Root]:
+        # Сканирование не заполняет кеш, чтобы не вытеснять из него
+        # часто используемые объекты.
+        for key in self.shelf:
+            yield self._load(key)
+
+    def _write(self, objects: Iterable[Root]) -> None:
+        for obj in objects:
+            key = self._key(obj.id)
+            data = pickle.dumps(obj, self.protocol)
+            self.shelf.dict[key.encode(self.shelf.keyencoding)] = data
+            self._remember(key, data)
+
+    def _existing_keys(
+        self, object_ids: Iterable[ID],
+        saved: Iterable[Root] = (),
+    ) -> list[str]:
+        """
+        Возвращает ключи удаляемых объектов или вызывает KeyError,
+        если какого-то объекта нет ни в файле, ни среди saved.
+        """
+        saved_keys = {self._key(obj.id) for obj in saved}
+        keys = []
+        for object_id in object_ids:
+            key = self._key(object_id)
+            if key not in saved_keys and key not in self.shelf:
+                raise KeyError(object_id)
+            keys.append(key)
+        return keys
+
+    def _delete(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            del self.shelf[key]
+            self._cache.pop(key, None)
+
+    def save(self, *objects: Root) -> None:
+        self._write(objects)
+        self.shelf.sync()
+
+    def get(self, object_id: ID) -> Root | None:
+        data = self._read(self._key(object_id), remember=True)
+        return None if data is None else pickle.loads(data)
+
+    def get_many(self, object_ids: Iterable[ID]) -> dict[ID, Root]:
+        found = {}
+        for object_id in object_ids:
+            data = self._read(self._key(object_id), remember=False)
+            if data is not None:
+                found[object_id] = pickle.loads(data)
+        return found
+
+    def find(
+        self, criteria: Criteria[Root],
+        order_by: str = None,
+        limit: int = None,
+        offset: int = None,
+    ) -> Iterator[Root]:
+        return select(
+            self._scan(), criteria,
+            order_by=order_by, limit=limit, offset=offset,
+        )
+
+    def count(self, criteria: Criteria[Root] = None) -> int:
+        if criteria is None:
+            return len(self.shelf)
+        return sum(1 for __ in filter(criteria, self._scan()))
+
+    def exists(self, criteria: Criteria[Root]) -> bool:
+        return any(map(criteria, self._scan()))
+
+    def remove(self, *objects: Root) -> None:
+        self.remove_by_id(*(obj.id for obj in objects))
+
+    def remove_by_id(self, *object_ids: ID) -> None:
+        self._delete(self._existing_keys(object_ids))
+        self.shelf.sync()
+
+    def remove_by(self, criteria: Criteria[Root]) -> int:
+        ids = [obj.id for obj in filter(criteria, self._scan())]
+        self.remove_by_id(*ids)
+        return len(ids)
+
+    def update_by(
+        self, criteria: Criteria[Root],
+        changes: Mapping[str, Any],
+    ) -> int:
+        objects = list(filter(criteria, self._scan()))
+        for obj in objects:
+            apply_changes(obj, changes)
+        self.save(*objects)
+        return len(objects)
+
+    def flush(
+        self, saved: Sequence[Root],
+        removed_ids: Sequence[ID],
+    ) -> None:
+        keys = self._existing_keys(removed_ids, saved)
+        self._write(saved)
+        self._delete(keys)
+        self.shelf.sync()
@@ -0,0 +1,206 @@
+import pickle
+import sqlite3
+from typing import Any, ClassVar, Iterable, Iterator, Sequence
+
+from ..criteria import Criteria
+from ..entities import ID, Root
+
+from .base import Repo
+from .query import select
+from .translate import CriteriaTranslator
+
+
+SqlFragment = tuple[str, Sequence[Any]]
+
+
+class SqlTranslator(CriteriaTranslator[SqlFragment]):
+    """
+    Переводит критерии в условие WHERE с параметрами.
+
+    Трансляторы репозитория возвращают пару (SQL, параметры),
+    где параметры подставляются вместо знаков '?'.
+
+    Условие, равное NULL (например, сравнение с NULL в колонке),
+    считается невыполненным, как и предикат, вернувший False в Python,
+    поэтому под отрицанием и в исключающем или оно заменяется на 0:
+    иначе NOT и <> от NULL тоже дают NULL и теряют строки.
+    """
+
+    @staticmethod
+    def _join(operator: str, fragments: list[SqlFragment]) -> SqlFragment:
+        sql = f' {operator} '.join(f'({sql})' for sql, __ in fragments)
+        params = [param for __, params in fragments for param in params]
+        return sql, params
+
+    def conjunction(self, queries: list[SqlFragment]) -> SqlFragment:
+        return self._join('AND', queries)
+
+    def disjunction(self, queries: list[SqlFragment]) -> SqlFragment:
+        return self._join('OR', queries)
+
+    def negation(self, query: SqlFragment) -> SqlFragment:
+        sql, params = query
+        return f'NOT COALESCE(({sql}), 0)', params
+
+    def exclusive(self, left: SqlFragment, right: SqlFragment) -> SqlFragment:
+        (left_sql, left_params), (right_sql, right_params) = left, right
+        return (
+            f'(NOT COALESCE(({left_sql}), 0)) <> '
+            f'(NOT COALESCE(({right_sql}), 0))',
+            [*left_params, *right_params],
+        )
+
+    def constant(self, value: bool) -> SqlFragment:
+        return ('1' if value else '0'), ()
+
+
+class SQLiteRepo(Repo[Root, ID]):
+    """
+    Эталонное хранилище на sqlite3, выполняющее фильтрацию в базе.
+
+    Объекты хранятся в таблице table сериализованными через pickle,
+    рядом с ними в колонках columns хранятся значения одноимённых
+    атрибутов, по которым строятся условия. Критерии переводятся
+    в WHERE трансляторами репозитория (см. SqlTranslator), то, что
+    перевести не удалось, проверяется в Python на найденных объектах.
+
+    >>> class TaskRepo(SQLiteRepo[Task, int]):
+    ...     table = 'tasks'
+    ...     columns = ('status', 'created_at')
+    ...
+    ...     @translate_for(Task.has_status)
+    ...     def _has_status(self, criteria):
+    ...         return 'status = ?', criteria.args
+    ...
+    ... repo = TaskRepo(sqlite3.connect('tasks.db'))
+    """
+    table: ClassVar[str]
+    columns: ClassVar[Sequence[str]] = ()
+
+    def __init__(self, connection: sqlite3.Connection) -> None:
+        for name in (self.table, *self.columns):
+            assert name.isidentifier(), f'Invalid SQL identifier: {name}'
+
+        self.connection = connection
+        columns = ''.join(f', "{column}"' for column in self.columns)
+        with self.connection:
+            self.connection.execute(
+                f'CREATE TABLE IF NOT EXISTS "{self.table}" '
+                f'(id PRIMARY KEY{columns}, data BLOB NOT NULL)'
+            )
+
+    def _where(
+        self, criteria: Criteria[Root] | None,
+    ) -> tuple[SqlFragment, Criteria[Root] | None]:
+        query, residual = SqlTranslator(self).translate(criteria)
+        if query is None:
+            return ('', ()), criteria
+        sql, params = query
+        return (f' WHERE {sql}', params), residual
+
+    def _rows(self, sql: str, params: Sequence[Any]) -> Iterator[Root]:
+        for data, in self.connection.execute(sql, params):
+            yield pickle.loads(data)
+
+    def _write(self, objects: Iterable[Root]) -> None:
+        names = ', '.join(
+            f'"{name}"' for name in ('id', *self.columns, 'data')
+        )
+        placeholders = ', '.join('?' * (len(self.columns) + 2))
+        self.connection.executemany(
+            f'INSERT OR REPLACE INTO "{self.table}" ({names}) '
+            f'VALUES ({placeholders})',
+            [
+                (
+                    obj.id,
+                    *(getattr(obj, column) for column in self.columns),
+                    pickle.dumps(obj),
+                )
+                for obj in objects
+            ],
+        )
+
+    def _delete(self, object_ids: Iterable[ID]) -> None:
+        self.connection.executemany(
+            f'DELETE FROM "{self.table}" WHERE id = ?',
+            [(object_id,) for object_id in object_ids],
+        )
+
+    def save(self, *objects: Root) -> None:
+        with self.connection:
+            self._write(objects)
+
+    def get(self, object_id: ID) -> Root | None:
+        return next(self._rows(
+            f'SELECT data FROM "{self.table}" WHERE id = ?', (object_id,),
+        ), None)
+
+    def find(
+        self, criteria: Criteria[Root],
+        order_by: str = None,
+        limit: int = None,
+        offset: int = None,
+    ) -> Iterator[Root]:
+        (where, params), residual = self._where(criteria)
+        sql = f'SELECT data FROM "{self.table}"{where}'
+
+        column = order_by.lstrip('-') if order_by else None
+        if column is not None and column not in ('id', *self.columns):
+            # Сортировка по атрибуту без колонки выполняется в Python
+            return select(
+                self._rows(sql, params), residual,
+                order_by=order_by, limit=limit, offset=offset,
+            )
+
+        if column is not None:
+            direction = 'DESC' if order_by.startswith('-') else 'ASC'
+            sql += f' ORDER BY "{column}" {direction}, id'
+
+        if residual is not None:
+            return select(
+                self._rows(sql, params), residual,
+                limit=limit, offset=offset,
+            )
+
+        if limit is not None or offset:
+            sql += ' LIMIT ? OFFSET ?'
+            params = (*params, -1 if limit is None else limit, offset or 0)
+        return self._rows(sql, params)
+
+    def count(self, criteria: Criteria[Root] = None) -> int:
+        (where, params), residual = self._where(criteria)
+        if residual is not None:
+            return sum(1 for __ in filter(residual, self._rows(
+                f'SELECT data FROM "{self.table}"{where}', params,
+            )))
+
+        (count,), = self.connection.execute(
+            f'SELECT COUNT(*) FROM "{self.table}"{where}', params,
+        )
+        return count
+
+    def exists(self, criteria: Criteria[Root]) -> bool:
+        (where, params), residual = self._where(criteria)
+        if residual is not None:
+            return any(map(residual, self._rows(
+                f'SELECT data FROM "{self.table}"{where}', params,
+            )))
+
+        return self.connection.execute(
+            f'SELECT 1 FROM "{self.table}"{where} LIMIT 1', params,
+        ).fetchone() is not None
+
+    def remove(self, *objects: Root) -> None:
+        self.remove_by_id(*(obj.id for obj in objects))
+
+    def remove_by_id(self, *object_ids: ID) -> None:
+        with self.connection:
+            self._delete(object_ids)
+
+    def flush(
+        self, saved: Sequence[Root],
+        removed_ids: Sequence[ID],
+    ) -> None:
+        with self.connection:
+            self._write(saved)
+            self._delete(removed_ids)
@@ -0,0 +1,273 @@
+from bisect import bisect_left, bisect_right, insort
+from typing import (
+    Any, Callable, ClassVar, Generic, Iterable, Iterator, TypeVar,
+)
+
+from ..entities import ID
+
+from .base import Root
+
+
+Item = TypeVar('Item')
+
+
+class SortedList(Generic[Item]):
+    """
+    Отсортированный список, разбитый на блоки размером от load
+    до 2 * load элементов, с максимумом каждого блока в отдельном списке.
+
+    Поиск позиции - два двоичных поиска, вставка и удаление сдвигают
+    только один блок, поэтому стоимость не растёт линейно с числом
+    элементов, как у insort в один большой список.
+
+    Используется внутри библиотеки, см. SortedStorage и SortedIndex.
+    """
+    __slots__ = ('_blocks', '_maxes', '_len')
+
+    load: ClassVar[int] = 512
+
+    _blocks: list[list[Item]]
+    _maxes: list[Item]
+
+    def __init__(self, items: Iterable[Item] = ()) -> None:
+        items = sorted(items)
+        load = self.load
+        self._blocks = [
+            items[start:start + load]
+            for start in range(0, len(items), load)
+        ]
+        self._maxes = [block[-1] for block in self._blocks]
+        self._len = len(items)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[Item]:
+        for block in self._blocks:
+            yield from block
+
+    def copy(self) -> 'SortedList[Item]':
+        copy = self.__class__.__new__(self.__class__)
+        copy._blocks = [block[:] for block in self._blocks]
+        copy._maxes = self._maxes[:]
+        copy._len = self._len
+        return copy
+
+    def __contains__(self, item: Item) -> bool:
+        i = bisect_left(self._maxes, item)
+        if i == len(self._maxes):
+            return False
+        block = self._blocks[i]
+        return block[bisect_left(block, item)] == item
+
+    def add(self, item: Item) -> None:
+        blocks, maxes = self._blocks, self._maxes
+        self._len += 1
+        if not maxes:
+            blocks.append([item])
+            maxes.append(item)
+            return
+
+        i = bisect_right(maxes, item)
+        if i == len(maxes):
+            i -= 1
+            blocks[i].append(item)
+            maxes[i] = item
+        else:
+            insort(blocks[i], item)
+
+        block = blocks[i]
+        if len(block) > 2 * self.load:
+            half = len(block) // 2
+            blocks[i:i + 1] = block[:half], block[half:]
+            maxes[i:i + 1] = block[half - 1], block[-1]
+
+    def discard(self, item: Item) -> None:
+        blocks, maxes = self._blocks, self._maxes
+        i = bisect_left(maxes, item)
+        if i == len(maxes):
+            return
+        block = blocks[i]
+        j = bisect_left(block, item)
+        if block[j] != item:
+            return
+
+        del block[j]
+        self._len -= 1
+        if block:
+            maxes[i] = block[-1]
+        else:
+            del blocks[i], maxes[i]
+
+    def _position(
+        self, value: Any, right: bool,
+        key: Callable[[Item], Any] | None,
+    ) -> tuple[int, int]:
+        bisect = bisect_right if right else bisect_left
+        i = bisect(self._maxes, value, key=key)
+        if i == len(self._maxes):
+            return i, 0
+        return i, bisect(self._blocks[i], value, key=key)
+
+    def irange(
+        self, low: Any = None, high: Any = None,
+        include_low: bool = True,
+        include_high: bool = True,
+        reverse: bool = False,
+        key: Callable[[Item], Any] = None,
+    ) -> Iterator[Item]:
+        """
+        Лениво отдаёт элементы между low и high (None - нет границы),
+        границы сравниваются с key(элемент), если key задан.
+        Список нельзя изменять, пока обход не закончен.
+        """
+        blocks = self._blocks
+        start = (0, 0) if low is None else self._position(
+            low, not include_low, key,
+        )
+        stop = (len(blocks), 0) if high is None else self._position(
+            high, include_high, key,
+        )
+
+        if reverse:
+            i, j = stop
+            while (i, j) > start:
+                if j == 0:
+                    i -= 1
+                    j = len(blocks[i])
+                    continue
+                begin = start[1] if i == start[0] else 0
+                yield from reversed(blocks[i][begin:j])
+                j = begin
+        else:
+            i, j = start
+            while (i, j) < stop:
+                block = blocks[i]
+                end = stop[1] if i == stop[0] else len(block)
+                yield from block[j:end]
+                i, j = i + 1, 0
+
+
+class DictStorage(dict, Generic[ID, Root]):
+    """
+    Движок хранения InMemoryRepo: словарь id -> объект.
+
+    Порядок id не поддерживается, поэтому range и scan сортируют
+    все id. Подходит, когда выборки по порядку id редки.
+    """
+    ordered: ClassVar[bool] = False
+
+    def copy(self) -> 'DictStorage[ID, Root]':
+        return self.__class__(self)
+
+    def range(
+        self, low: ID = None, high: ID = None,
+        include_low: bool = True,
+        include_high: bool = True,
+    ) -> list[ID]:
+        """
+        Возвращает id между low и high в порядке возрастания.
+        None означает отсутствие границы.
+        """
+        return [
+            id_ for id_ in sorted(self)
+            if (
+                low is None or low < id_ or include_low and low == id_
+            ) and (
+                high is None or id_ < high or include_high and id_ == high
+            )
+        ]
+
+    def scan(
+        self, after: ID = None,
+        descending: bool = False,
+    ) -> Iterator[Root]:
+        """
+        Лениво отдаёт объекты в порядке id, начиная строго после
+        after, по убыванию - строго до него.
+        """
+        if descending:
+            ids = self.range(high=after, include_high=False)[::-1]
+        else:
+            ids = self.range(low=after, include_low=False)
+        return map(self.__getitem__, ids)
+
+
+class SortedStorage(DictStorage[ID, Root]):
+    """
+    Движок хранения InMemoryRepo, поддерживающий порядок id
+    в SortedList рядом со словарём.
+
+    Чтение по id стоит столько же, сколько в DictStorage, range и scan
+    не сортируют, а начинают с нужной позиции, так что страницы
+    и выборки по порядку id не просматривают всё хранилище.
+    Сохранение нового и удаление объекта стоят дороже, чем в словаре.
+    Id должны быть сравнимы между собой.
+
+    >>> class OrderRepo(InMemoryRepo[Order, int]):
+    ...     storage = SortedStorage
+    """
+    ordered: ClassVar[bool] = True
+
+    _ids: SortedList[ID]
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._ids = SortedList(self)
+
+    def __setitem__(self, id_: ID, obj: Root) -> None:
+        if id_ not in self:
+            self._ids.add(id_)
+        super().__setitem__(id_, obj)
+
+    def __delitem__(self, id_: ID) -> None:
+        super().__delitem__(id_)
+        self._ids.discard(id_)
+
+    def pop(self, id_: ID, *default: Root) -> Root:
+        if id_ in self:
+            self._ids.discard(id_)
+        return super().pop(id_, *default)
+
+    def popitem(self) -> tuple[ID, Root]:
+        id_, obj = super().popitem()
+        self._ids.discard(id_)
+        return id_, obj
+
+    def setdefault(self, id_: ID, default: Root = None) -> Root:
+        if id_ not in self:
+            self[id_] = default
+        return self[id_]
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        for id_, obj in dict(*args, **kwargs).items():
+            self[id_] = obj
+
+    def clear(self) -> None:
+        super().clear()
+        self._ids = SortedList()
+
+    def copy(self) -> 'SortedStorage[ID, Root]':
+        copy = self.__class__.__new__(self.__class__)
+        dict.update(copy, self)
+        copy._ids = self._ids.copy()
+        return copy
+
+    def range(
+        self, low: ID = None, high: ID = None,
+        include_low: bool = True,
+        include_high: bool = True,
+    ) -> list[ID]:
+        return list(self._ids.irange(low, high, include_low, include_high))
+
+    def scan(
+        self, after: ID = None,
+        descending: bool = False,
+    ) -> Iterator[Root]:
+        if descending:
+            ids = self._ids.irange(
+                high=after, include_high=False, reverse=True,
+            )
+        else:
+            ids = self._ids.irange(low=after, include_low=False)
+        return map(self.__getitem__, ids)
@@ -1,21 +1,29 @@
 import inspect
-from typing import Type, Callable
+from typing import Type, Callable, Generic, TypeVar
 
-from classic.components import doublewrap
+from ..criteria import (
+    Criteria, And, Or, Xor, Invert, ReturnsTrue, ReturnsFalse,
+)
 
-from ..criteria import Criteria
+
+Function = TypeVar('Function', bound=Callable)
+Query = TypeVar('Query')
 
 
 def is_translator(obj: object) -> bool:
     return callable(obj) and hasattr(obj, '__criteria__')
 
 
-@doublewrap
-def translate_for(fn, criteria: Type[Criteria]):
+def translate_for(criteria: Type[Criteria]) -> Callable[[Function], Function]:
+    # doublewrap здесь не подходит: класс критерия сам по себе callable,
+    # и @translate_for(SomeCriteria) был бы принят за декорирование класса.
     assert issubclass(criteria, Criteria)
 
-    fn.__criteria__ = criteria
-    return fn
+    def decorator(fn: Function) -> Function:
+        fn.__criteria__ = criteria
+        return fn
+
+    return decorator
 
 
 def translators_map(cls: Type[object]) -> dict[Type[Criteria], Callable]:
@@ -24,3 +32,107 @@ def translators_map(cls: Type[object]) -> dict[Type[Criteria], Callable]:
         for __, method
         in inspect.getmembers(cls, is_translator)
     }
+
+
+class CriteriaTranslator(Generic[Query]):
+    """
+    Обходит дерево критериев и переводит его в запрос к хранилищу
+    с помощью трансляторов, зарегистрированных на репозитории
+    через translate_for.
+
+    Возвращает пару (запрос, остаток), где остаток - критерий, который
+    нужно проверить на объектах, найденных по запросу, или None.
+    Из вложенных критериев And транслируется всё, что возможно,
+    остальное уходит в остаток. Or, Xor и Invert транслируются,
+    только если полностью транслируются их вложенные критерии,
+    иначе целиком становятся остатком.
+
+    Наследники описывают, как комбинировать запросы. Любой метод может
+    вернуть None, если скомбинировать запросы нельзя.
+    """
+
+    def __init__(self, repo: object) -> None:
+        self.repo = repo
+        self.translators = repo._translators
+
+    def translate(
+        self, criteria: Criteria | None,
+    ) -> tuple[Query | None, Criteria | None]:
+        if criteria is None:
+            return None, None
+
+        translator = self.translators.get(criteria.__class__)
+        if translator is not None:
+            query = translator(self.repo, criteria)
+            if query is not None:
+                return query, None
+
+        if isinstance(criteria, And):
+            return self._translate_and(criteria)
+
+        query = None
+        if isinstance(criteria, Or):
+            queries = [
+                self.translate_exactly(nested)
+                for nested in criteria.nested_criteria
+            ]
+            if None not in queries:
+                query = self.disjunction(queries)
+        elif isinstance(criteria, Invert):
+            nested = self.translate_exactly(criteria.nested_criteria)
+            if nested is not None:
+                query = self.negation(nested)
+        elif isinstance(criteria, Xor):
+            left = self.translate_exactly(criteria.left)
+            right = self.translate_exactly(criteria.right)
+            if left is not None and right is not None:
+                query = self.exclusive(left, right)
+        elif isinstance(criteria, ReturnsTrue):
+            query = self.constant(True)
+        elif isinstance(criteria, ReturnsFalse):
+            query = self.constant(False)
+
+        if query is None:
+            return None, criteria
+        return query, None
+
+    def translate_exactly(self, criteria: Criteria) -> Query | None:
+        query, residual = self.translate(criteria)
+        if residual is not None:
+            return None
+        return query
+
+    def _translate_and(
+        self, criteria: And,
+    ) -> tuple[Query | None, Criteria | None]:
+        queries, residuals = [], []
+        for nested in criteria.nested_criteria:
+            query, residual = self.translate(nested)
+            if query is not None:
+                queries.append(query)
+            if residual is not None:
+                residuals.append(residual)
+
+        query = self.conjunction(queries) if queries else None
+        if query is None:
+            return None, criteria
+        if not residuals:
+            return query, None
+        if len(residuals) == 1:
+            return query, residuals[0]
+        return query, And(*residuals)
+
+    def conjunction(self, queries: list[Query]) -> Query | None:
+        return None
+
+    def disjunction(self, queries: list[Query]) -> Query | None:
+        return None
+
+    def negation(self, query: Query) -> Query | None:
+        return None
+
+    def exclusive(self, left: Query, right: Query) -> Query | None:
+        return None
+
+    def constant(self, value: bool) -> Query | None:
+        return None
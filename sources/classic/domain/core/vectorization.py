@@ -0,0 +1,176 @@
+from types import SimpleNamespace
+from typing import Any, Iterable, Sequence
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+Mask = Sequence[bool]
+
+
+class Batch:
+    """
+    Пачка кандидатов для пакетной проверки критериев
+    (см. Criteria.mask и Criteria.filter_many).
+
+    Строится из объектов, тогда колонки атрибутов собираются лениво
+    при первом обращении, или сразу из колонок (Batch.from_columns),
+    тогда объекты-строки при необходимости собираются из колонок.
+
+    Если установлен NumPy, колонки и маски - массивы NumPy, иначе списки.
+    """
+    size: int
+
+    def __init__(self, objects: Iterable[Any]) -> None:
+        self._objects = list(objects)
+        self._columns = {}
+        self.size = len(self._objects)
+
+    @classmethod
+    def from_columns(cls, **columns: Sequence[Any]) -> 'Batch':
+        batch = cls(())
+        batch._objects = None
+        batch._columns = {
+            name: as_column(values)
+            for name, values in columns.items()
+        }
+        batch.size = len(next(iter(batch._columns.values()), ()))
+        return batch
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, name: str) -> Sequence[Any]:
+        return self.column(name)
+
+    def column(self, name: str) -> Sequence[Any]:
+        column = self._columns.get(name)
+        if column is None:
+            column = self._columns[name] = as_column([
+                getattr(obj, name) for obj in self.rows()
+            ])
+        return column
+
+    def take(self, mask: 'Mask') -> 'Batch':
+        """
+        Возвращает пачку из отмеченных в mask строк, в том же порядке.
+        Уже собранные колонки не собираются заново.
+        """
+        batch = self.__class__(())
+        if self._objects is not None:
+            batch._objects = compress(self._objects, mask)
+        else:
+            batch._objects = None
+        batch._columns = {
+            name: select(column, mask)
+            for name, column in self._columns.items()
+        }
+        batch.size = count(mask)
+        return batch
+
+    def rows(self) -> list[Any]:
+        if self._objects is None:
+            names = list(self._columns)
+            self._objects = [
+                SimpleNamespace(**dict(zip(names, values)))
+                for values in zip(*self._columns.values())
+            ]
+        return self._objects
+
+
+def is_available() -> bool:
+    return numpy is not None
+
+
+def as_column(values: Sequence[Any]) -> Sequence[Any]:
+    if numpy is None:
+        return list(values)
+
+    column = numpy.asarray(values)
+    if column.ndim != 1:
+        # Значения-последовательности не должны превращаться в измерения
+        column = numpy.empty(len(values), dtype=object)
+        for index, value in enumerate(values):
+            column[index] = value
+    return column
+
+
+def as_mask(values: Iterable[Any]) -> Mask:
+    if numpy is None:
+        return [bool(value) for value in values]
+    if isinstance(values, numpy.ndarray):
+        return values.astype(bool, copy=False)
+    return numpy.fromiter(values, dtype=bool)
+
+
+def full_mask(size: int, value: bool) -> Mask:
+    if numpy is None:
+        return [value] * size
+    return numpy.full(size, value, dtype=bool)
+
+
+def mask_any(mask: Mask) -> bool:
+    if numpy is None:
+        return any(mask)
+    return bool(mask.any())
+
+
+def mask_all(mask: Mask) -> bool:
+    if numpy is None:
+        return all(mask)
+    return bool(mask.all())
+
+
+def mask_and(left: Mask, right: Mask) -> Mask:
+    if numpy is None:
+        return [a and b for a, b in zip(left, right)]
+    return left & right
+
+
+def mask_or(left: Mask, right: Mask) -> Mask:
+    if numpy is None:
+        return [a or b for a, b in zip(left, right)]
+    return left | right
+
+
+def mask_xor(left: Mask, right: Mask) -> Mask:
+    if numpy is None:
+        return [a != b for a, b in zip(left, right)]
+    return left ^ right
+
+
+def mask_not(mask: Mask) -> Mask:
+    if numpy is None:
+        return [not value for value in mask]
+    return ~mask
+
+
+def count(mask: Mask) -> int:
+    if numpy is None:
+        return sum(mask)
+    return int(numpy.count_nonzero(mask))
+
+
+def compress(objects: Sequence[Any], mask: Mask) -> list[Any]:
+    return [obj for obj, selected in zip(objects, mask) if selected]
+
+
+def select(column: Sequence[Any], mask: Mask) -> Sequence[Any]:
+    if numpy is None:
+        return compress(column, mask)
+    return column[mask]
+
+
+def expand(mask: Mask, values: Mask) -> Mask:
+    """
+    Раскладывает маску values, посчитанную для отмеченных в mask строк
+    (см. Batch.take), по всем строкам, неотмеченные строки - False.
+    """
+    if numpy is None:
+        values = iter(values)
+        return [selected and next(values) for selected in mask]
+    result = numpy.zeros(len(mask), dtype=bool)
+    result[mask] = values
+    return result
@@ -0,0 +1,198 @@
+import asyncio
+from dataclasses import dataclass
+
+import pytest
+
+from classic.domain.core import (
+    Root, criteria, async_criteria, is_satisfied, must_be_satisfied,
+    check_arg, check_result, CriteriaNotSatisfied, AsyncInMemoryRepo,
+    InMemoryRepo,
+)
+
+
+@dataclass
+class Candidate:
+    value: int
+
+
+@criteria
+def is_positive(candidate):
+    return candidate.value > 0
+
+
+cancelled = []
+
+
+@async_criteria
+async def waits(candidate, delay, result):
+    try:
+        await asyncio.sleep(delay)
+    except asyncio.CancelledError:
+        cancelled.append(delay)
+        raise
+    return result
+
+
+@async_criteria
+async def is_even(candidate):
+    await asyncio.sleep(0)
+    return candidate.value % 2 == 0
+
+
+def test_sync_evaluation_is_forbidden():
+    with pytest.raises(TypeError):
+        is_even().is_satisfied_by(Candidate(2))
+
+
+def test_composition():
+    candidate = Candidate(2)
+
+    assert asyncio.run(is_satisfied(is_positive() & is_even(), candidate))
+    assert not asyncio.run(is_satisfied(~is_even(), candidate))
+    assert asyncio.run(is_satisfied(is_even() ^ ~is_positive(), candidate))
+    assert asyncio.run(is_satisfied(is_positive(), candidate))
+
+
+def test_sync_part_decides_first():
+    candidate = Candidate(-1)
+
+    assert not asyncio.run(is_satisfied(is_positive() & is_even(), candidate))
+    assert asyncio.run(is_satisfied(~is_positive() | is_even(), candidate))
+
+
+@async_criteria
+async def is_loaded(candidate):
+    await asyncio.sleep(0)
+    return candidate.value is not None
+
+
+def test_async_guard_protects_next_criteria():
+    assert not asyncio.run(is_satisfied(
+        is_loaded() & is_positive(), Candidate(None),
+    ))
+    assert asyncio.run(is_satisfied(
+        ~is_loaded() | (is_loaded() & is_positive()), Candidate(None),
+    ))
+
+    with pytest.raises(TypeError):
+        asyncio.run(is_satisfied(
+            is_positive() & is_loaded(), Candidate(None),
+        ))
+
+
+def test_deep_mixed_tree():
+    rule = is_positive()
+    for __ in range(200):
+        rule = is_positive() & ~rule
+    rule = rule | is_even()
+
+    assert asyncio.run(is_satisfied(rule, Candidate(2)))
+    assert not asyncio.run(is_satisfied(rule, Candidate(-1)))
+
+
+def test_early_cancellation():
+    cancelled.clear()
+    criteria_ = waits(10, True) | waits(0, True)
+
+    assert asyncio.run(asyncio.wait_for(
+        is_satisfied(criteria_, Candidate(1)), timeout=1,
+    ))
+    assert cancelled == [10]
+
+    cancelled.clear()
+    criteria_ = waits(10, True) & waits(0, False)
+
+    assert not asyncio.run(asyncio.wait_for(
+        is_satisfied(criteria_, Candidate(1)), timeout=1,
+    ))
+    assert cancelled == [10]
+
+
+def test_must_be_satisfied():
+    with pytest.raises(CriteriaNotSatisfied):
+        asyncio.run(must_be_satisfied(is_even(), Candidate(1)))
+
+
+@check_arg('candidate', is_even())
+async def accepts(candidate):
+    return candidate.value
+
+
+@check_arg('candidate', is_even(), skip=True)
+async def skips(candidate):
+    return candidate.value
+
+
+@check_result(is_even())
+async def returns(value):
+    return Candidate(value)
+
+
+def test_async_checks():
+    assert asyncio.run(accepts(Candidate(2))) == 2
+    assert asyncio.run(skips(Candidate(1))) is None
+    assert asyncio.run(returns(2)) == Candidate(2)
+
+    with pytest.raises(CriteriaNotSatisfied):
+        asyncio.run(accepts(Candidate(1)))
+
+    with pytest.raises(CriteriaNotSatisfied):
+        asyncio.run(returns(1))
+
+
+class Item(Root):
+    id: int
+    value: int
+
+    is_even = is_even
+    is_positive = is_positive
+
+
+@pytest.fixture
+def repo():
+    repo = AsyncInMemoryRepo[Item, int](InMemoryRepo[Item, int]())
+    asyncio.run(repo.save(*(Item(id=id_, value=id_) for id_ in range(-3, 6))))
+    return repo
+
+
+def test_async_repo(repo):
+    criteria_ = Item.is_positive() & Item.is_even()
+
+    found = asyncio.run(repo.find(criteria_, order_by='-value'))
+    assert [obj.id for obj in found] == [4, 2]
+    assert asyncio.run(repo.count(criteria_)) == 2
+    assert asyncio.run(repo.exists(criteria_))
+    assert not asyncio.run(repo.exists(Item.is_even() & waits(0, False)))
+
+    found = asyncio.run(repo.find(Item.is_positive(), limit=2))
+    assert [obj.id for obj in found] == [1, 2]
+
+    asyncio.run(repo.remove_by_id(2))
+    assert asyncio.run(repo.count(criteria_)) == 1
+    assert asyncio.run(repo.get(4)).value == 4
+
+
+in_flight = []
+peaks = []
+
+
+@async_criteria
+async def tracked(candidate):
+    in_flight.append(candidate.id)
+    peaks.append(len(in_flight))
+    try:
+        await asyncio.sleep(0)
+    finally:
+        in_flight.remove(candidate.id)
+    return candidate.value > 0
+
+
+def test_async_repo_bounds_concurrency():
+    repo = AsyncInMemoryRepo[Item, int](InMemoryRepo[Item, int](), 3)
+    asyncio.run(repo.save(*(Item(id=id_, value=id_) for id_ in range(20))))
+
+    found = asyncio.run(repo.find(tracked()))
+    assert [obj.id for obj in found] == list(range(1, 20))
+    assert max(peaks) == 3
+    assert asyncio.run(repo.exists(tracked()))
+    assert in_flight == []
@@ -0,0 +1,90 @@
+import pytest
+
+from classic.domain.core import (
+    check_arg, check_result, criteria, CriteriaNotSatisfied,
+)
+
+
+@criteria
+def is_positive(value):
+    return value > 0
+
+
+@check_arg('value', is_positive())
+def identity(value, other=None):
+    return value
+
+
+@check_arg(value=is_positive(), other=is_positive())
+def pair(value, /, other=1, *, third=None):
+    return value, other
+
+
+@check_arg('value', is_positive(), skip=True)
+def skipping(value):
+    return value
+
+
+@check_result(is_positive())
+def returns(value):
+    return value
+
+
+def test_check_arg_positional_and_keyword():
+    assert identity(1) == 1
+    assert identity(value=1) == 1
+
+    with pytest.raises(CriteriaNotSatisfied):
+        identity(-1)
+
+    with pytest.raises(CriteriaNotSatisfied):
+        identity(value=-1, other=2)
+
+
+def test_check_arg_several_arguments():
+    assert pair(1) == (1, 1)
+    assert pair(1, other=2) == (1, 2)
+
+    with pytest.raises(CriteriaNotSatisfied):
+        pair(-1)
+
+    with pytest.raises(CriteriaNotSatisfied):
+        pair(1, -2)
+
+
+def test_check_arg_skip():
+    assert skipping(1) == 1
+    assert skipping(-1) is None
+
+
+def test_check_arg_missing_argument():
+    with pytest.raises(TypeError):
+        identity()
+
+
+def test_check_arg_unknown_argument():
+    with pytest.raises(TypeError):
+        check_arg('unknown', is_positive())(lambda value: value)
+
+
+def test_check_result():
+    assert returns(1) == 1
+
+    with pytest.raises(CriteriaNotSatisfied):
+        returns(-1)
+
+
+@criteria
+def not_none(value):
+    return value is not None
+
+
+@check_arg('value', not_none() & is_positive())
+def guarded(value):
+    return value
+
+
+def test_guard_in_check():
+    assert guarded(1) == 1
+    with pytest.raises(CriteriaNotSatisfied):
+        guarded(None)
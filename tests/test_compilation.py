@@ -0,0 +1,49 @@
+import pytest
+
+from classic.domain.core import And, Criteria, criteria
+from classic.domain.core.criteria import ReturnsTrue, ReturnsFalse
+
+
+@criteria
+def greater_than(value, other):
+    return value > other
+
+
+@criteria
+def divisible_by(value, divider=2):
+    return value % divider == 0
+
+
+class IsOdd(Criteria[int]):
+
+    def is_satisfied_by(self, candidate: int) -> bool:
+        return candidate % 2 == 1
+
+
+@pytest.mark.parametrize('criteria_', (
+    greater_than(0),
+    divisible_by(divider=3),
+    greater_than(0) & divisible_by(),
+    greater_than(0) | divisible_by(3),
+    greater_than(0) ^ divisible_by(3),
+    ~greater_than(0),
+    ~(greater_than(0) & ~divisible_by(divider=3)) | IsOdd(),
+    greater_than(0) & ReturnsTrue(),
+    greater_than(0) | ReturnsFalse(),
+))
+def test_compiled_matches_interpreted(criteria_):
+    compiled = criteria_.compile()
+
+    for candidate in range(-10, 10):
+        assert compiled(candidate) is bool(
+            criteria_.is_satisfied_by(candidate)
+        )
+
+
+def test_deep_tree_falls_back():
+    criteria_ = greater_than(0)
+    for __ in range(150):
+        criteria_ = ~And(criteria_, ReturnsTrue())
+
+    compiled = criteria_.compile()
+    assert compiled(1) is criteria_.is_satisfied_by(1)
@@ -0,0 +1,108 @@
+import pickle
+from copy import deepcopy
+from dataclasses import field, FrozenInstanceError
+from datetime import date
+
+import pytest
+
+from classic.domain.core import Value, Entity, Root
+from classic.domain.core.copying import (
+    copy_object, make_copier, freeze_object, FrozenList,
+)
+
+
+class Money(Value):
+    amount: int
+    currency: str
+
+
+class Line(Entity[int]):
+    id: int
+    price: Money
+    tags: list[str] = field(default_factory=list)
+
+
+class Order(Root[int]):
+    id: int
+    created_at: date
+    lines: list[Line] = field(default_factory=list)
+    discount: Money | None = None
+    notes: dict[str, str] = field(default_factory=dict)
+    extra: object = None
+
+
+def make_order():
+    return Order(
+        1, date(2024, 1, 1),
+        lines=[
+            Line(1, Money(10, 'RUB'), tags=['a']),
+            Line(2, Money(20, 'RUB')),
+        ],
+        discount=Money(5, 'RUB'),
+        notes={'key': 'value'},
+        extra={'nested': [1, 2]},
+    )
+
+
+def test_copy_is_independent():
+    order = make_order()
+    copy = make_copier(Order)(order)
+
+    assert copy is not order
+    assert copy.id == order.id
+    assert copy.lines is not order.lines
+    assert copy.lines[0] is not order.lines[0]
+    assert copy.lines[0].tags == ['a']
+    assert copy.lines[0].tags is not order.lines[0].tags
+    assert copy.notes == order.notes
+    assert copy.notes is not order.notes
+    assert copy.extra == order.extra
+    assert copy.extra['nested'] is not order.extra['nested']
+
+
+def test_copy_shares_values():
+    order = make_order()
+    copy = copy_object(order)
+
+    assert copy.created_at is order.created_at
+    assert copy.discount is order.discount
+    assert copy.lines[0].price is order.lines[0].price
+
+
+def test_copier_is_cached():
+    assert make_copier(Order) is make_copier(Order)
+
+
+def test_frozen_copy_is_read_only():
+    order = make_order()
+    frozen = freeze_object(order)
+
+    assert isinstance(frozen, Order)
+    assert isinstance(frozen.lines, FrozenList)
+    assert frozen.lines[0].tags == ['a']
+    assert frozen.extra == order.extra
+    assert frozen.discount is order.discount
+    assert freeze_object(frozen) is frozen
+
+    with pytest.raises(FrozenInstanceError):
+        frozen.id = 2
+    with pytest.raises(FrozenInstanceError):
+        frozen.lines[0].price = Money(1, 'RUB')
+    with pytest.raises(TypeError):
+        frozen.lines.append(Line(3, Money(1, 'RUB')))
+    with pytest.raises(TypeError):
+        frozen.notes['key'] = 'other'
+
+
+@pytest.mark.parametrize('thaw', (
+    copy_object, deepcopy, lambda obj: pickle.loads(pickle.dumps(obj)),
+))
+def test_copies_of_frozen_objects_are_mutable(thaw):
+    copy = thaw(freeze_object(make_order()))
+
+    assert type(copy) is Order
+    assert type(copy.lines) is list
+    assert type(copy.lines[0]) is Line
+    copy.id = 2
+    copy.lines[0].tags.append('b')
+    copy.notes['key'] = 'other'
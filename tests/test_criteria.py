@@ -1,8 +1,10 @@
 import pytest
 
 from classic.domain.core import (
-    Entity, Criteria, criteria, CriteriaNotSatisfied
+    Entity, Criteria, criteria, CriteriaNotSatisfied,
+    And, Or, Xor, Invert, NormalForm,
 )
+from classic.domain.core.criteria import ReturnsTrue, ReturnsFalse
 
 
 class SomeEntity(Entity):
@@ -71,3 +73,171 @@ def test_method_without_params(entity: SomeEntity):
 
     with pytest.raises(CriteriaNotSatisfied):
         SomeEntity.without_param().must_be_satisfied_by(SomeEntity(None))
+
+
+def test_structural_equality():
+    assert with_param(1) == with_param(1)
+    assert with_param(1) != with_param(2)
+    assert with_param(value=1) == with_param(value=1)
+    assert with_param(1) != SomeEntity.with_param(1)
+    assert (
+        (with_param(1) & ~without_param()) ==
+        (with_param(1) & ~without_param())
+    )
+    assert (with_param(1) ^ with_param(2)) != (with_param(2) ^ with_param(1))
+
+    assert len({
+        with_param(1), with_param(1),
+        with_param(1) | without_param(),
+        with_param(1) | without_param(),
+    }) == 2
+
+
+def test_composition_does_not_mutate_operands():
+    shared = with_param(1) & without_param()
+
+    combined = shared & with_param(2)
+    other = shared | with_param(3)
+
+    assert shared == And(with_param(1), without_param())
+    assert combined == And(with_param(1), without_param(), with_param(2))
+    assert other == Or(shared, with_param(3))
+
+
+def test_optimize():
+    a, b, c = with_param(1), with_param(2), without_param()
+
+    assert (a & ReturnsTrue()).optimize() == a
+    assert (a & ReturnsFalse() & b).optimize() == ReturnsFalse()
+    assert (a | ReturnsTrue()).optimize() == ReturnsTrue()
+    assert (~~a).optimize() == a
+    assert (~ReturnsFalse()).optimize() == ReturnsTrue()
+    assert And(a, And(b, Or(c, c)), a).optimize() == And(a, b, c)
+    assert (a & ~a & b).optimize() == ReturnsFalse()
+    assert (a | ~a).optimize() == ReturnsTrue()
+    assert (a ^ ReturnsTrue()).optimize() == Invert(a)
+    assert (a ^ a).optimize() == ReturnsFalse()
+    assert Xor(a, b).optimize() == Xor(a, b)
+
+
+def test_optimize_normal_forms():
+    a, b, c = with_param(1), with_param(2), without_param()
+    criteria_ = a & ~(b & ~c)
+
+    assert criteria_.optimize(NormalForm.DNF) == Or(
+        And(a, Invert(b)), And(a, c),
+    )
+    assert criteria_.optimize(NormalForm.CNF) == And(a, Or(Invert(b), c))
+    assert (a ^ b).optimize(NormalForm.DNF) == Or(
+        And(a, Invert(b)), And(Invert(a), b),
+    )
+
+    for value in (None, 1, 2):
+        entity = SomeEntity(value)
+        for form in (None, NormalForm.DNF, NormalForm.CNF):
+            assert (
+                criteria_.optimize(form).is_satisfied_by(entity) is
+                criteria_.is_satisfied_by(entity)
+            )
+
+
+class EmptyEntity(SomeEntity):
+
+    def __init__(self, value):
+        self.value = value
+
+    def __bool__(self):
+        return False
+
+
+def test_falsy_instance():
+    entity = EmptyEntity(1)
+
+    assert entity.with_param(1) is True
+    assert entity.with_param.is_satisfied(2) is False
+    assert entity.rule() is True
+
+    with pytest.raises(CriteriaNotSatisfied):
+        entity.with_param.must_be_satisfied(2)
+
+
+def test_criteria_have_no_instance_dict():
+    for criteria_ in (
+        with_param(1), with_param(1) & without_param(),
+        with_param(1) | without_param(), ~with_param(1),
+        with_param(1) ^ without_param(), ReturnsTrue(),
+    ):
+        assert not hasattr(criteria_, '__dict__')
+
+
+class CountingCriteria(Criteria):
+
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+
+    def is_satisfied_by(self, candidate):
+        self.calls += 1
+        return self.result
+
+
+@pytest.mark.parametrize('make,remainder', (
+    (lambda a, b, c: b & a & c, lambda a, b, c: a),
+    (lambda a, b, c: a | c, lambda a, b, c: Or(a, c)),
+    (lambda a, b, c: a | b, lambda a, b, c: None),
+    (lambda a, b, c: ~b, lambda a, b, c: ~b),
+    (lambda a, b, c: ~a, lambda a, b, c: None),
+    (lambda a, b, c: a ^ c, lambda a, b, c: a ^ c),
+    (lambda a, b, c: a ^ ~c, lambda a, b, c: None),
+    (lambda a, b, c: b ^ ~a, lambda a, b, c: b ^ ~a),
+    (lambda a, b, c: (a | c) ^ ~b, lambda a, b, c: Xor(Or(a, c), ~b)),
+))
+def test_remainder_is_computed_in_one_pass(entity, make, remainder):
+    leaves = [CountingCriteria(result) for result in (False, True, False)]
+
+    result = make(*leaves).remainder_unsatisfied_by(entity)
+    assert result == remainder(*leaves)
+    assert all(leaf.calls <= 1 for leaf in leaves)
+
+
+def test_failure_report(entity: SomeEntity):
+    rule = SomeEntity.without_param() & (
+        with_param(2) | SomeEntity.with_param(value=3)
+    ) & ~with_param(1)
+
+    with pytest.raises(CriteriaNotSatisfied) as error:
+        rule.must_be_satisfied_by(entity)
+
+    assert error.value.failures == [
+        with_param(2), SomeEntity.with_param(value=3),
+    ]
+    assert str(error.value) == 'with_param(2), SomeEntity.with_param(value=3)'
+    assert repr(error.value.failures) == (
+        '[with_param(2), SomeEntity.with_param(value=3)]'
+    )
+    assert repr(~with_param(1)) == '~with_param(1)'
+
+    with pytest.raises(CriteriaNotSatisfied) as error:
+        (~with_param(1) ^ SomeEntity.with_param(2)).must_be_satisfied_by(
+            entity,
+        )
+    assert str(error.value) == '(~with_param(1) ^ SomeEntity.with_param(2))'
+
+    with pytest.raises(CriteriaNotSatisfied) as error:
+        entity.with_param.must_be_satisfied(2)
+    assert error.value.failures == [SomeEntity.with_param(2)]
+
+
+@criteria
+def greater_than(entity, value):
+    return entity.value > value
+
+
+def test_guard_protects_following_criteria():
+    rule = without_param() & greater_than(3)
+    candidate = SomeEntity(None)
+
+    assert rule.is_satisfied_by(candidate) is False
+    with pytest.raises(CriteriaNotSatisfied) as error:
+        rule.must_be_satisfied_by(candidate)
+    assert error.value.failures == [without_param()]
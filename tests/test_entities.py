@@ -0,0 +1,92 @@
+import pickle
+from copy import deepcopy
+from dataclasses import FrozenInstanceError, field
+
+import pytest
+
+from classic.domain.core import (
+    Value, Entity, Root, HaveInvariants, invariant, InMemoryRepo, Isolation,
+)
+from classic.domain.core.copying import copy_object
+
+
+class Money(Value, slots=True):
+    amount: int
+    currency: str = 'RUB'
+
+
+class Line(Entity[int], HaveInvariants, slots=True, incremental=True):
+    id: int
+    price: Money
+    quantity: int = 1
+
+    @invariant
+    def positive_quantity(self):
+        return self.quantity > 0
+
+
+class Order(Root[int], slots=True):
+    id: int
+    lines: list[Line] = field(default_factory=list)
+
+
+class ExtendedOrder(Order):
+    comment: str = ''
+
+
+def test_slotted_objects_have_no_dict():
+    for obj in (Money(1), Line(1, Money(1)), Order(1)):
+        assert not hasattr(obj, '__dict__')
+
+
+def test_slotted_value():
+    money = Money(10)
+
+    assert money == Money(10)
+    assert hash(money) == hash(Money(10))
+    assert money._cached_hash == hash(money)
+    assert {money: 1}[Money(10)] == 1
+    assert pickle.loads(pickle.dumps(money)) == money
+
+    with pytest.raises(FrozenInstanceError):
+        money.amount = 20
+
+
+def test_slotted_entity_with_incremental_invariants():
+    line = Line(1, Money(10))
+
+    assert line.invariants()
+    line.quantity = 0
+    assert not line.invariants()
+    assert line != Line(1, Money(10))
+
+
+def test_slotted_copies():
+    order = Order(1, [Line(1, Money(10), quantity=2)])
+    order.lines[0].invariants()
+
+    for copy in (copy_object(order), deepcopy(order)):
+        assert copy is not order
+        assert copy.lines[0] is not order.lines[0]
+        assert copy.lines[0].quantity == 2
+        assert copy.lines[0].price is order.lines[0].price or \
+            copy.lines[0].price == order.lines[0].price
+
+    assert not hasattr(copy_object(order).lines[0], '__dirty_fields__')
+
+
+def test_subclass_of_slotted_class_copies_all_fields():
+    order = ExtendedOrder(1, [Line(1, Money(10))], comment='text')
+
+    copy = copy_object(order)
+
+    assert copy.id == 1
+    assert copy.comment == 'text'
+    assert copy.lines[0] is not order.lines[0]
+
+
+def test_slotted_objects_in_repo():
+    repo = InMemoryRepo[Order, int](isolation=Isolation.COPY)
+    repo.save(Order(1, [Line(1, Money(10))]))
+
+    assert repo.get(1).lines[0].price == Money(10)
@@ -0,0 +1,130 @@
+import pytest
+
+from classic.domain.core import (
+    And, Or, criteria, AdaptiveEvaluator, CriteriaStatistics,
+)
+
+
+calls = []
+
+
+@criteria
+def is_positive(value):
+    calls.append('is_positive')
+    return value > 0
+
+
+@criteria
+def is_even(value):
+    calls.append('is_even')
+    return value % 2 == 0
+
+
+@criteria
+def is_small(value):
+    calls.append('is_small')
+    return value < 100
+
+
+@pytest.fixture(autouse=True)
+def clear_calls():
+    calls.clear()
+
+
+def test_and_short_circuits():
+    assert And(is_positive(), is_even(), is_small()).is_satisfied_by(-1) is False
+    assert calls == ['is_positive']
+
+
+def test_or_short_circuits():
+    assert Or(is_positive(), is_even(), is_small()).is_satisfied_by(1) is True
+    assert calls == ['is_positive']
+
+
+@pytest.mark.parametrize('criteria_', (
+    is_positive() & is_even(),
+    is_positive() | is_even(),
+    is_positive() ^ is_even(),
+    ~is_positive() & (is_even() | is_small()),
+))
+def test_evaluator_matches_criteria(criteria_):
+    evaluator = AdaptiveEvaluator(reorder_every=3)
+    values = list(range(-10, 10))
+
+    assert (
+        list(filter(evaluator.bind(criteria_), values)) ==
+        list(filter(criteria_, values))
+    )
+
+
+def test_evaluator_collects_stats():
+    evaluator = AdaptiveEvaluator()
+    evaluator.is_satisfied_by(is_positive() & is_even(), 2)
+
+    stats = evaluator.statistics[is_positive.criteria_cls]
+    assert stats.calls == 1
+    assert stats.satisfied == 1
+    assert stats.satisfied_ratio == 1
+
+
+def test_evaluator_puts_selective_criteria_first():
+    statistics = CriteriaStatistics()
+    for __ in range(10):
+        statistics.record(is_small.criteria_cls, True, 0.001)
+        statistics.record(is_even.criteria_cls, False, 0.001)
+
+    evaluator = AdaptiveEvaluator(statistics)
+    assert evaluator.is_satisfied_by(is_small() & is_even(), 3) is False
+    assert calls == ['is_even']
+
+
+def test_evaluator_reorders_at_runtime():
+    evaluator = AdaptiveEvaluator(reorder_every=5)
+    rule = is_small() & is_positive()
+
+    for __ in range(10):
+        evaluator.is_satisfied_by(rule, -1)
+
+    calls.clear()
+    evaluator.is_satisfied_by(rule, -1)
+    assert calls == ['is_positive']
+
+
+def test_evaluator_bounds_plans():
+    evaluator = AdaptiveEvaluator(max_plans=2)
+    rules = [is_positive() & is_even() for __ in range(10)]
+
+    for rule in rules:
+        evaluator.is_satisfied_by(rule, 2)
+
+    assert len(evaluator._plans) == 2
+    assert evaluator.is_satisfied_by(rules[0], 2) is True
+    assert len(evaluator._plans) == 2
+
+
+def test_evaluator_requires_plans():
+    with pytest.raises(ValueError):
+        AdaptiveEvaluator(max_plans=0)
+
+    evaluator = AdaptiveEvaluator(max_plans=1)
+    assert evaluator.is_satisfied_by(is_positive() & is_even(), 2) is True
+
+
+@criteria
+def not_none(value):
+    calls.append('not_none')
+    return value is not None
+
+
+def test_evaluator_keeps_guards_working():
+    evaluator = AdaptiveEvaluator(reorder_every=5)
+    rule = not_none() & is_positive()
+    for value in range(-20, 0):
+        evaluator.is_satisfied_by(rule, value)
+
+    assert evaluator.is_satisfied_by(rule, None) is False
+    assert evaluator.is_satisfied_by(rule, 1) is True
+    assert evaluator.is_satisfied_by(rule, None) is False
+
+    with pytest.raises(TypeError):
+        evaluator.is_satisfied_by(is_positive() & not_none(), None)
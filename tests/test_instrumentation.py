@@ -0,0 +1,131 @@
+from threading import Barrier, Event, Thread
+
+from classic.domain.core import (
+    Entity, HaveInvariants, criteria, invariant, PredicateCriteria,
+    StatsSink, SpanSink, CallbackSink, instrumented,
+)
+
+
+@criteria
+def is_positive(value):
+    return value > 0
+
+
+@criteria
+def is_even(value):
+    return value % 2 == 0
+
+
+class Account(Entity, HaveInvariants):
+    balance: int
+
+    @invariant
+    def balance_is_not_negative(self):
+        return self.balance >= 0
+
+
+original = PredicateCriteria.is_satisfied_by
+
+
+def test_stats_sink():
+    sink = StatsSink()
+
+    with instrumented(sink):
+        for value in range(-5, 5):
+            (is_positive() & is_even()).is_satisfied_by(value)
+
+    stats = sink.statistics[is_positive.criteria_cls]
+    assert stats.calls == 10
+    assert stats.satisfied == 4
+    assert 0 <= stats.percentile(50) <= stats.percentile(99)
+    assert sink.statistics[is_even.criteria_cls].calls == 4
+    assert PredicateCriteria.is_satisfied_by is original
+
+
+def test_invariants_are_recorded_once():
+    recorded = []
+
+    with instrumented(CallbackSink(
+        lambda criteria_, result, elapsed: recorded.append(
+            (criteria_.__class__, result),
+        ),
+    )):
+        assert Account(id=1, balance=1).invariants.is_satisfied()
+
+    assert recorded.count(
+        (Account.balance_is_not_negative, True)
+    ) == 1
+    assert recorded.count((Account.invariants.__class__, True)) == 1
+
+
+def test_span_sink():
+    spans = []
+
+    class Span:
+        def __init__(self, name, start_time, attributes):
+            self.name = name
+            self.start_time = start_time
+            self.attributes = attributes
+            self.end_time = None
+
+        def end(self, end_time):
+            self.end_time = end_time
+
+    class Tracer:
+        def start_span(self, name, start_time, attributes):
+            spans.append(Span(name, start_time, attributes))
+            return spans[-1]
+
+    with instrumented(SpanSink(Tracer())):
+        is_positive()(1)
+
+    span, = spans
+    assert span.name == 'criteria.is_positive'
+    assert span.attributes == {'criteria.result': True}
+    assert span.start_time <= span.end_time
+
+
+def test_disabled_records_nothing():
+    sink = StatsSink()
+
+    with instrumented(sink):
+        pass
+    is_positive()(1)
+
+    assert sink.statistics.by_class == {}
+
+
+def test_nested_blocks_keep_outer_sinks():
+    outer, inner = StatsSink(), StatsSink()
+
+    with instrumented(outer):
+        with instrumented(inner):
+            is_positive()(1)
+        is_positive()(1)
+        assert PredicateCriteria.is_satisfied_by is not original
+
+    assert PredicateCriteria.is_satisfied_by is original
+    assert outer.statistics[is_positive.criteria_cls].calls == 2
+    assert inner.statistics[is_positive.criteria_cls].calls == 1
+
+
+def test_overlapping_threads_keep_instrumentation():
+    sink, other = StatsSink(), StatsSink()
+    entered, leave = Barrier(2), Event()
+
+    def worker():
+        with instrumented(other):
+            entered.wait()
+            leave.wait()
+
+    thread = Thread(target=worker)
+    thread.start()
+    with instrumented(sink):
+        entered.wait()
+    is_positive()(1)
+    leave.set()
+    thread.join()
+
+    assert PredicateCriteria.is_satisfied_by is original
+    assert sink.statistics.by_class == {}
+    assert other.statistics[is_positive.criteria_cls].calls == 1
@@ -1,4 +1,6 @@
+import json
 from dataclasses import dataclass, field
+from typing import Mapping, Optional
 
 import pytest
 
@@ -6,6 +8,13 @@ from classic.domain.core import (
     Value, Entity, Root, HaveInvariants,
     invariant, CriteriaNotSatisfied,
 )
+from classic.domain.core.invariants import (
+    INVARIANTS_CACHE, class_key, descendants_invariants, fields_read,
+    fingerprint,
+)
+from classic.domain.core.manifest import (
+    make_manifest, load_manifest, clear_manifest,
+)
 
 
 @dataclass
@@ -59,3 +68,398 @@ def test_invariants_on_value(instance, value):
 
         with pytest.raises(CriteriaNotSatisfied):
             cls.invariants.must_be_satisfied_by(instance)
+
+
+checked = []
+
+
+class Line(Entity[int], HaveInvariants, incremental=True):
+    id: int
+    quantity: int
+
+    @invariant
+    def positive_quantity(self):
+        checked.append(('quantity', self.id))
+        return self.quantity > 0
+
+
+class Order(Root[int], HaveInvariants, incremental=True):
+    id: int
+    comment: str
+    limit: int
+    lines: list[Line] = field(default_factory=list)
+
+    @invariant
+    def short_comment(self):
+        checked.append('comment')
+        return len(self.comment) < 10
+
+    @invariant
+    def lines_under_limit(self):
+        checked.append('limit')
+        return len(self.lines) <= self.limit
+
+
+@pytest.fixture
+def order():
+    return Order(1, 'comment', 3, lines=[Line(1, 1), Line(2, 1)])
+
+
+def test_incremental_first_check_is_full(order):
+    checked.clear()
+    assert order.invariants.is_satisfied() is True
+    assert sorted(map(str, checked)) == sorted(map(str, [
+        'comment', 'limit', ('quantity', 1), ('quantity', 2),
+    ]))
+
+
+def test_incremental_rechecks_only_dirty(order):
+    order.invariants.must_be_satisfied()
+
+    checked.clear()
+    assert order.invariants.is_satisfied() is True
+    # limit читает список строк, его содержимое могло измениться
+    assert checked == ['limit']
+
+    checked.clear()
+    order.comment = 'too long comment'
+    assert order.invariants.is_satisfied() is False
+    assert checked == ['limit', 'comment']
+
+    checked.clear()
+    order.comment = 'short'
+    order.lines[1].quantity = 0
+    assert order.invariants.is_satisfied() is False
+    assert checked == ['limit', 'comment', ('quantity', 2)]
+
+    checked.clear()
+    order.lines[1].quantity = 2
+    order.lines.append(Line(3, 1))
+    assert order.invariants.is_satisfied() is True
+    # comment остался изменённым после неудачной проверки
+    assert checked == [
+        'limit', 'comment', ('quantity', 2), ('quantity', 3),
+    ]
+
+
+def test_incremental_failure_report(order):
+    order.comment = 'too long comment'
+    order.lines += [Line(3, 1), Line(4, 1)]
+
+    with pytest.raises(CriteriaNotSatisfied) as error:
+        order.invariants.must_be_satisfied()
+    assert str(error.value) == 'Order.lines_under_limit()'
+
+    order.comment = 'short'
+    del order.lines[2:]
+    order.invariants.must_be_satisfied()
+
+    checked.clear()
+    assert order.invariants.is_satisfied() is True
+    assert checked == ['limit']
+
+
+def test_incremental_is_inherited():
+    class SpecialLine(Line):
+        pass
+
+    assert SpecialLine.__incremental_invariants__ is True
+    line = SpecialLine(1, 1)
+    line.invariants.must_be_satisfied()
+
+    checked.clear()
+    line.quantity = -1
+    assert line.invariants.is_satisfied() is False
+
+
+def test_incremental_rechecks_only_changed_children(order):
+    order.invariants.must_be_satisfied()
+
+    checked.clear()
+    order.lines[0].quantity = 5
+    assert order.invariants.is_satisfied() is True
+    assert checked == ['limit', ('quantity', 1)]
+
+    removed = order.lines.pop()
+    order.invariants.must_be_satisfied()
+
+    checked.clear()
+    removed.quantity = 0
+    assert order.invariants.is_satisfied() is True
+    assert checked == ['limit']
+
+
+class Cell(Entity[int], HaveInvariants, incremental=True):
+    id: int
+    value: int
+
+    @invariant
+    def non_negative(self):
+        checked.append(('cell', self.id))
+        return self.value >= 0
+
+
+class Slot(Entity[int], HaveInvariants, incremental=True):
+    id: int
+    cell: Cell
+
+
+class Grid(Root[int], HaveInvariants, incremental=True):
+    id: int
+    slots: list[Slot]
+
+
+def test_incremental_changes_are_reported_to_all_owners():
+    grid = Grid(1, [Slot(i, Cell(i, 0)) for i in range(3)])
+    grid.invariants.must_be_satisfied()
+
+    checked.clear()
+    grid.slots[1].cell.value = -1
+    assert grid.invariants.is_satisfied() is False
+    assert checked == [('cell', 1)]
+
+    checked.clear()
+    grid.slots[1].cell.value = 1
+    assert grid.invariants.is_satisfied() is True
+    assert checked == [('cell', 1)]
+
+    checked.clear()
+    assert grid.invariants.is_satisfied() is True
+    assert checked == []
+
+
+class Limit(Entity[int], HaveInvariants, incremental=True):
+    id: int
+    amount: int
+
+
+class Budget(Root[int], HaveInvariants, incremental=True):
+    id: int
+    limit: Limit
+    spent: int
+
+    @invariant
+    def within_limit(self):
+        return self.spent <= self.limit.amount
+
+
+def test_incremental_rechecks_entity_valued_fields():
+    budget = Budget(1, Limit(1, 10), 5)
+    budget.invariants.must_be_satisfied()
+
+    budget.limit.amount = 1
+    assert budget.invariants.is_satisfied() is False
+
+
+def over_cap(totals):
+    return totals.total > totals.cap
+
+
+class Totals(Root[int], HaveInvariants, incremental=True):
+    id: int
+    total: int
+    cap: int
+
+    @invariant
+    def read_by_name(self):
+        return getattr(self, 'total') <= self.cap
+
+    @invariant
+    def read_by_helper(self):
+        return not over_cap(self)
+
+
+def test_fields_read_indirectly_are_unknown():
+    assert fields_read(Totals.read_by_name.predicate, Totals) is None
+    assert fields_read(Totals.read_by_helper.predicate, Totals) is None
+    assert fields_read(Budget.within_limit.predicate, Budget) == {
+        'spent', 'limit',
+    }
+
+    totals = Totals(1, 1, 10)
+    totals.invariants.must_be_satisfied()
+    totals.total = 100
+    assert totals.invariants.is_satisfied() is False
+
+
+def test_invariants_are_built_lazily_once_per_class():
+    class Lazy(Value, HaveInvariants):
+        number: int
+
+        @invariant
+        def is_positive(self):
+            return self.number > 0
+
+    assert INVARIANTS_CACHE not in Lazy.__dict__
+    assert Lazy(1).invariants.is_satisfied() is True
+    assert Lazy.invariants is Lazy.__dict__[INVARIANTS_CACHE]
+    assert Lazy.invariants is Lazy.invariants
+
+    class Child(Lazy):
+        pass
+
+    assert INVARIANTS_CACHE not in Child.__dict__
+    assert Child(-1).invariants.is_satisfied() is False
+    assert Child.invariants is not Lazy.invariants
+
+
+class Part(Value, HaveInvariants):
+    number: int
+
+    @invariant
+    def is_positive(self):
+        return self.number > 0
+
+
+class Assembly(Root[int], HaveInvariants):
+    id: int
+    main: Part
+    spare: Optional[Part] = None
+    pair: tuple[Part, int] = (Part(1), 0)
+    parts: tuple[Part, ...] = ()
+    unique: set[Part] = field(default_factory=set)
+    by_name: Mapping[str, Part] = field(default_factory=dict)
+    by_part: dict[Part, list[Part]] = field(default_factory=dict)
+    numbers: list[int] = field(default_factory=list)
+    nested: 'list[Assembly | None]' = field(default_factory=list)
+
+
+def test_descendants_are_found_by_annotations():
+    assert descendants_invariants(Assembly) == [
+        ['main', 'object'],
+        ['spare', 'maybe'],
+        ['pair', ['tuple', 'object', None]],
+        ['parts', ['each', 'object']],
+        ['unique', ['each', 'object']],
+        ['by_name', ['values', 'object']],
+        ['by_part', ['items', 'object', ['each', 'object']]],
+        ['nested', ['each', 'maybe']],
+    ]
+
+
+@pytest.mark.parametrize('kwargs', (
+    {'main': Part(-1)},
+    {'spare': Part(-1)},
+    {'pair': (Part(-1), 0)},
+    {'parts': (Part(1), Part(-1))},
+    {'unique': {Part(-1)}},
+    {'by_name': {'a': Part(-1)}},
+    {'by_part': {Part(-1): []}},
+    {'by_part': {Part(1): [Part(-1)]}},
+    {'nested': [None, Assembly(2, Part(-1))]},
+))
+def test_children_invariants(kwargs):
+    valid = Assembly(1, Part(1), numbers=[-1], nested=[None])
+    assert valid.invariants.is_satisfied() is True
+
+    kwargs.setdefault('main', Part(1))
+    assert Assembly(1, **kwargs).invariants.is_satisfied() is False
+
+
+@pytest.fixture
+def manifest():
+    yield
+    clear_manifest()
+
+
+def test_manifest_round_trip(manifest, tmp_path):
+    description = make_manifest([Order])[class_key(Order)]
+    assert description == {
+        'invariants': ['lines_under_limit', 'short_comment'],
+        'descendants': [['lines', ['each', 'object']]],
+        'fingerprint': fingerprint(Order),
+        'reads': [['limit', 'lines'], ['comment']],
+    }
+
+    class Order2(Order):
+        pass
+
+    path = tmp_path / 'invariants.json'
+    path.write_text(json.dumps({class_key(Order2): description}))
+    load_manifest(path)
+
+    order = Order2(1, 'short', 2, [Line(1, 1)])
+    assert order.invariants.is_satisfied() is True
+    order.comment = 'too long comment'
+    assert order.invariants.is_satisfied() is False
+
+
+def test_manifest_of_changed_class_is_ignored(manifest):
+    description = make_manifest([Order])[class_key(Order)]
+
+    class WithNewInvariant(Order):
+        @invariant
+        def has_lines(self):
+            return len(self.lines) > 0
+
+    class WithRewrittenInvariant(Order):
+        @invariant
+        def short_comment(self):
+            return self.limit < 10
+
+    load_manifest({
+        class_key(WithNewInvariant): description,
+        class_key(WithRewrittenInvariant): description,
+    })
+    assert fingerprint(WithNewInvariant) != description['fingerprint']
+    assert WithNewInvariant(1, 'short', 2).invariants() is False
+
+    order = WithRewrittenInvariant(1, 'short', 2)
+    order.invariants.must_be_satisfied()
+    order.limit = 100
+    assert order.invariants() is False
+
+
+def test_manifest_without_fingerprint_is_ignored(manifest):
+    class Unchecked(Value, HaveInvariants):
+        number: int
+
+        @invariant
+        def is_positive(self):
+            return self.number > 0
+
+    load_manifest({
+        class_key(Unchecked): {'invariants': [], 'descendants': []},
+    })
+    assert Unchecked(-1).invariants() is False
+
+
+def test_stale_manifest_falls_back_to_reflection(manifest):
+    class Stale(Value, HaveInvariants):
+        number: int
+
+        @invariant
+        def is_positive(self):
+            return self.number > 0
+
+    load_manifest({
+        class_key(Stale): {
+            'invariants': ['removed'],
+            'descendants': [],
+            'fingerprint': fingerprint(Stale),
+        },
+    })
+    assert Stale(-1).invariants.is_satisfied() is False
+
+
+GENERATED = """
+class Generated(Value, HaveInvariants):
+    number: int
+
+    @invariant
+    def is_positive(self):
+        return self.number > {}
+"""
+
+
+def test_fingerprint_of_class_without_source_hashes_bytecode():
+    def generate(bound):
+        namespace = {
+            '__name__': 'generated', 'Value': Value,
+            'HaveInvariants': HaveInvariants, 'invariant': invariant,
+        }
+        exec(GENERATED.format(bound), namespace)
+        return namespace['Generated']
+
+    assert fingerprint(generate(0)) == fingerprint(generate(0))
+    assert fingerprint(generate(0)) != fingerprint(generate(1))
@@ -0,0 +1,68 @@
+from classic.domain.core import Entity, CriteriaMemo, criteria
+
+
+calls = []
+
+
+class User(Entity[int]):
+    id: int
+    role: str
+
+
+@criteria
+def has_role(user, role):
+    calls.append(role)
+    return user.role == role
+
+
+def test_memo_reuses_results():
+    calls.clear()
+    memo = CriteriaMemo()
+    user = User(1, 'admin')
+    rule = has_role('admin') | has_role('editor')
+
+    assert memo.is_satisfied_by(rule, user) is True
+    assert memo.is_satisfied_by(has_role('admin'), user) is True
+    assert memo.is_satisfied_by(~has_role('admin') & rule, user) is False
+    assert calls == ['admin']
+
+
+def test_memo_shares_subexpressions():
+    calls.clear()
+    memo = CriteriaMemo()
+    user = User(1, 'user')
+    shared = has_role('admin') | has_role('editor')
+
+    assert memo.is_satisfied_by(
+        (shared & has_role('user')) | (has_role('user') & shared), user,
+    ) is False
+    assert calls == ['admin', 'editor', 'user']
+
+
+def test_memo_invalidation_and_eviction():
+    calls.clear()
+    memo = CriteriaMemo(maxsize=2)
+    user = User(1, 'admin')
+
+    memo.is_satisfied_by(has_role('admin'), user)
+    user.role = 'user'
+    assert memo.is_satisfied_by(has_role('admin'), user) is True
+
+    memo.invalidate(user)
+    assert memo.is_satisfied_by(has_role('admin'), user) is False
+
+    memo.is_satisfied_by(has_role('user'), user)
+    memo.is_satisfied_by(has_role('editor'), user)
+    assert len(memo) == 2
+    assert calls == ['admin', 'admin', 'user', 'editor']
+
+
+def test_memo_with_version():
+    calls.clear()
+    memo = CriteriaMemo(version=lambda user: user.role)
+    user = User(1, 'admin')
+
+    assert memo.is_satisfied_by(has_role('admin'), user) is True
+    user.role = 'user'
+    assert memo.is_satisfied_by(has_role('admin'), user) is False
+    assert calls == ['admin', 'admin']
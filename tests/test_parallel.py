@@ -0,0 +1,77 @@
+import pickle
+from dataclasses import dataclass
+
+import pytest
+
+from classic.domain.core import (
+    criteria, ParallelEvaluator, Backend,
+)
+
+
+@dataclass
+class Candidate:
+    value: int
+
+    @criteria
+    def greater_than(self, value):
+        return self.value > value
+
+
+@criteria
+def divisible_by(candidate, divisor):
+    return candidate.value % divisor == 0
+
+
+def test_pickle_predicate_criteria():
+    criteria_ = (
+        Candidate.greater_than(3) & ~divisible_by(divisor=2) |
+        divisible_by(7) ^ Candidate.greater_than(10)
+    )
+
+    restored = pickle.loads(pickle.dumps(criteria_))
+
+    assert restored == criteria_
+    assert restored.nested_criteria[0].nested_criteria[0].__class__ \
+        is Candidate.greater_than
+    assert [
+        restored(Candidate(value)) for value in range(15)
+    ] == [
+        criteria_(Candidate(value)) for value in range(15)
+    ]
+
+
+def test_pickle_local_criteria_fails():
+    @criteria
+    def local(candidate):
+        return True
+
+    with pytest.raises(pickle.PicklingError):
+        pickle.dumps(local())
+
+
+@pytest.mark.parametrize('backend', [Backend.THREAD, Backend.PROCESS])
+def test_parallel_filter_keeps_order(backend):
+    candidates = [Candidate(value) for value in range(1000)]
+    criteria_ = divisible_by(3) & Candidate.greater_than(100)
+
+    with ParallelEvaluator(backend, max_workers=2, chunk_size=64) as evaluator:
+        found = list(evaluator.filter(criteria_, candidates))
+        results = list(evaluator.map(criteria_, candidates))
+
+    assert found == list(filter(criteria_, candidates))
+    assert all(a is b for a, b in zip(found, filter(criteria_, candidates)))
+    assert results == list(map(criteria_, candidates))
+
+
+def test_parallel_filter_streams():
+    def candidates():
+        value = 0
+        while True:
+            yield Candidate(value)
+            value += 1
+
+    with ParallelEvaluator(
+        Backend.THREAD, max_workers=2, chunk_size=8,
+    ) as evaluator:
+        found = evaluator.filter(divisible_by(5), candidates())
+        assert [next(found).value for __ in range(3)] == [0, 5, 10]
@@ -1,6 +1,18 @@
+import pickle
+import random
+import sqlite3
+import threading
+from dataclasses import FrozenInstanceError
+
 import pytest
 
-from classic.domain.core import Repo, Root, InMemoryRepo, criteria
+from classic.domain.core import (
+    Repo, Root, ChangeSet, InMemoryRepo, Isolation, ShelveRepo, SQLiteRepo,
+    HashIndex, SortedIndex, SqlTranslator, SortedStorage,
+    criteria, translate_for,
+)
+from classic.domain.core.copying import copy_object
+from classic.domain.core.repos.storage import SortedList
 
 
 class SomeEntity(Root):
@@ -11,10 +23,36 @@ class SomeEntity(Root):
     def value_greater_than(self, other):
         return self.value > other
 
+    @criteria
+    def value_equal(self, other):
+        return self.value == other
+
+
+class HashIndexedRepo(InMemoryRepo[SomeEntity, int]):
+    indexes = (HashIndex('value'),)
+
+    @translate_for(SomeEntity.value_equal)
+    def _value_equal(self, criteria_):
+        return self.index('value').equal(*criteria_.args)
+
+
+class SortedIndexedRepo(InMemoryRepo[SomeEntity, int]):
+    indexes = (SortedIndex('value'),)
+
+    @translate_for(SomeEntity.value_equal)
+    def _value_equal(self, criteria_):
+        return self.index('value').equal(*criteria_.args)
+
+    @translate_for(SomeEntity.value_greater_than)
+    def _value_greater_than(self, criteria_):
+        return self.index('value').range(
+            low=criteria_.args[0], include_low=False,
+        )
+
 
 @pytest.fixture
 def in_memory_repo():
-    return InMemoryRepo[SomeEntity]()
+    return InMemoryRepo[SomeEntity, int]()
 
 
 class TestRepo:
@@ -30,3 +68,595 @@ class TestRepo:
         instance_from_repo = repo.get(1)
 
         assert instance == instance_from_repo
+
+
+@pytest.fixture
+def filled_repo(in_memory_repo):
+    in_memory_repo.save(*(
+        SomeEntity(id_, value)
+        for id_, value in enumerate('dbeacfdb')
+    ))
+    return in_memory_repo
+
+
+def ids(objects):
+    return [obj.id for obj in objects]
+
+
+@pytest.mark.parametrize('kwargs,expected', (
+    ({}, [0, 1, 2, 3, 4, 5, 6, 7]),
+    ({'limit': 3}, [0, 1, 2]),
+    ({'limit': 3, 'offset': 6}, [6, 7]),
+    ({'order_by': 'value'}, [3, 1, 7, 4, 0, 6, 2, 5]),
+    ({'order_by': '-value'}, [5, 2, 0, 6, 4, 1, 7, 3]),
+    ({'order_by': 'value', 'limit': 3}, [3, 1, 7]),
+    ({'order_by': 'value', 'limit': 3, 'offset': 2}, [7, 4, 0]),
+    ({'order_by': '-value', 'limit': 2, 'offset': 1}, [2, 0]),
+    ({'order_by': 'value', 'offset': 6}, [2, 5]),
+    ({'order_by': 'value', 'offset': 10}, []),
+))
+def test_find_all(filled_repo, kwargs, expected):
+    assert ids(filled_repo.find(None, **kwargs)) == expected
+
+
+def test_find_by_criteria(filled_repo):
+    criteria_ = SomeEntity.value_greater_than('c')
+
+    assert ids(filled_repo.find(criteria_)) == [0, 2, 5, 6]
+    assert ids(filled_repo.find(criteria_, order_by='-value', limit=2)) == [5, 2]
+
+
+def test_find_is_lazy(filled_repo):
+    calls = []
+
+    @criteria
+    def tracked(entity):
+        calls.append(entity.id)
+        return True
+
+    result = filled_repo.find(tracked(), limit=2)
+    assert calls == []
+
+    assert ids(result) == [0, 1]
+    assert calls == [0, 1]
+
+
+class SomeSQLiteRepo(SQLiteRepo[SomeEntity, int]):
+    table = 'entities'
+    columns = ('value',)
+
+    def __init__(self):
+        super().__init__(sqlite3.connect(':memory:'))
+
+    @translate_for(SomeEntity.value_equal)
+    def _value_equal(self, criteria_):
+        return 'value = ?', criteria_.args
+
+
+@pytest.mark.parametrize('repo_cls', (
+    InMemoryRepo[SomeEntity, int], HashIndexedRepo, SortedIndexedRepo,
+    SomeSQLiteRepo,
+))
+@pytest.mark.parametrize('criteria_,expected', (
+    (SomeEntity.value_equal('d'), [0, 6]),
+    (SomeEntity.value_equal('z'), []),
+    (SomeEntity.value_greater_than('c'), [0, 2, 5, 6]),
+    (
+        SomeEntity.value_greater_than('c') & ~SomeEntity.value_equal('d'),
+        [2, 5],
+    ),
+    (
+        SomeEntity.value_equal('a') | SomeEntity.value_equal('b'),
+        [1, 3, 7],
+    ),
+    (
+        SomeEntity.value_equal('a') | SomeEntity.value_greater_than('e'),
+        [3, 5],
+    ),
+))
+def test_find_with_indexes(repo_cls, criteria_, expected):
+    repo = repo_cls()
+    repo.save(*(
+        SomeEntity(id_, value)
+        for id_, value in enumerate('dbeacfdb')
+    ))
+
+    assert sorted(ids(repo.find(criteria_))) == expected
+    assert repo.count(criteria_) == len(expected)
+    assert repo.exists(criteria_) is bool(expected)
+
+
+@pytest.mark.parametrize('repo_cls', (HashIndexedRepo, SortedIndexedRepo))
+def test_indexes_follow_changes(repo_cls):
+    repo = repo_cls()
+    first, second, third = (
+        SomeEntity(1, 'a'), SomeEntity(2, 'a'), SomeEntity(3, 'b'),
+    )
+    repo.save(first, second, third)
+
+    first.value = 'b'
+    repo.save(first)
+    assert sorted(ids(repo.find(SomeEntity.value_equal('a')))) == [2]
+    assert sorted(ids(repo.find(SomeEntity.value_equal('b')))) == [1, 3]
+
+    repo.remove(third)
+    repo.remove_by_id(2)
+    assert ids(repo.find(SomeEntity.value_equal('a'))) == []
+    assert ids(repo.find(SomeEntity.value_equal('b'))) == [1]
+
+
+@pytest.fixture
+def shelve_repo(tmp_path):
+    with ShelveRepo[SomeEntity, int](
+        str(tmp_path / 'repo'), cache_size=2,
+    ) as repo:
+        yield repo
+
+
+def test_shelve_repo(shelve_repo, tmp_path):
+    shelve_repo.save(*(
+        SomeEntity(id_, value)
+        for id_, value in enumerate('dbeacfdb')
+    ))
+
+    assert shelve_repo.get(3).value == 'a'
+    assert shelve_repo.get(100) is None
+    assert shelve_repo.count() == 8
+    assert shelve_repo.count(SomeEntity.value_equal('d')) == 2
+    assert shelve_repo.exists(SomeEntity.value_equal('f')) is True
+    assert ids(shelve_repo.find(
+        SomeEntity.value_greater_than('a'), order_by='-value', limit=3,
+    )) == [5, 2, 0]
+
+    shelve_repo.remove(shelve_repo.get(0))
+    shelve_repo.remove_by_id(1, 2)
+    assert shelve_repo.count() == 5
+    assert shelve_repo.get(0) is None
+    shelve_repo.close()
+
+    with ShelveRepo[SomeEntity, int](str(tmp_path / 'repo')) as reopened:
+        assert sorted(ids(reopened.find(None))) == [3, 4, 5, 6, 7]
+        assert reopened.get(5).value == 'f'
+
+
+def test_shelve_repo_does_not_share_cached_objects(shelve_repo):
+    saved = SomeEntity(1, 'a')
+    shelve_repo.save(saved)
+    saved.value = 'b'
+
+    got = shelve_repo.get(1)
+    assert got.value == 'a'
+    got.value = 'c'
+    assert shelve_repo.get(1).value == 'a'
+    assert next(shelve_repo.find(None)).value == 'a'
+    assert shelve_repo.get_many([1])[1].value == 'a'
+
+
+def test_shelve_repo_reads_cached_records(shelve_repo, monkeypatch):
+    looped = SomeEntity(1, None)
+    looped.value = [looped]
+    shelve_repo.save(looped)
+
+    # Запись берётся из кеша, а не из файла
+    monkeypatch.setattr(shelve_repo.shelf, 'dict', {})
+    got = shelve_repo.get(1)
+    assert got is not looped
+    assert got.value[0] is got
+
+
+def test_shelve_repo_flush_checks_removed_ids_first(shelve_repo):
+    shelve_repo.save(SomeEntity(1, 'a'), SomeEntity(2, 'b'))
+
+    with pytest.raises(KeyError):
+        shelve_repo.flush([SomeEntity(3, 'c')], [1, 10])
+    with pytest.raises(KeyError):
+        shelve_repo.remove_by_id(2, 10)
+
+    assert sorted(ids(shelve_repo.find(None))) == [1, 2]
+    shelve_repo.flush([SomeEntity(3, 'c')], [1, 3])
+    assert sorted(ids(shelve_repo.find(None))) == [2]
+
+
+def test_shelve_repo_syncs_once_per_call(shelve_repo, monkeypatch):
+    syncs = []
+    monkeypatch.setattr(shelve_repo.shelf, 'sync', lambda: syncs.append(1))
+
+    shelve_repo.save(*(SomeEntity(id_, 'a') for id_ in range(100)))
+    shelve_repo.remove_by_id(*range(50))
+
+    assert syncs == [1, 1]
+
+
+@pytest.mark.parametrize('isolation,shared_on_save,shared_on_read', (
+    (Isolation.NONE, True, True),
+    (Isolation.DEEPCOPY, True, False),
+    (Isolation.COPY, True, False),
+    (Isolation.SNAPSHOT, False, True),
+))
+def test_isolation(isolation, shared_on_save, shared_on_read):
+    repo = InMemoryRepo[SomeEntity, int](isolation=isolation)
+    instance = SomeEntity(1, 'a')
+    repo.save(instance)
+
+    assert (repo.objects[1] is instance) is shared_on_save
+    assert (repo.get(1) is repo.objects[1]) is shared_on_read
+    assert (
+        next(repo.find(SomeEntity.value_equal('a'))) is repo.objects[1]
+    ) is shared_on_read
+
+
+def test_sql_translator():
+    repo = SomeSQLiteRepo()
+    value_equal = SomeEntity.value_equal
+    greater_than = SomeEntity.value_greater_than('c')
+
+    assert SqlTranslator(repo).translate(
+        value_equal('a') | ~value_equal('b'),
+    ) == (('(value = ?) OR (NOT COALESCE((value = ?), 0))', ['a', 'b']), None)
+
+    assert SqlTranslator(repo).translate(
+        value_equal('a') & greater_than & (value_equal('b') ^ value_equal('c')),
+    ) == (
+        (
+            '(value = ?) AND ((NOT COALESCE((value = ?), 0)) <> '
+            '(NOT COALESCE((value = ?), 0)))',
+            ['a', 'b', 'c'],
+        ),
+        greater_than,
+    )
+
+    criteria_ = value_equal('a') | greater_than
+    assert SqlTranslator(repo).translate(criteria_) == (None, criteria_)
+
+
+@pytest.mark.parametrize('criteria_', (
+    ~SomeEntity.value_equal('a'),
+    SomeEntity.value_equal('a') ^ SomeEntity.value_equal('b'),
+    ~(SomeEntity.value_equal('a') & SomeEntity.value_equal('b')),
+))
+def test_sql_translation_keeps_null_rows(criteria_):
+    repo = SomeSQLiteRepo()
+    objects = [SomeEntity(1, None), SomeEntity(2, 'a'), SomeEntity(3, 'b')]
+    repo.save(*objects)
+
+    expected = [obj.id for obj in objects if criteria_(obj)]
+    assert ids(repo.find(criteria_, order_by='id')) == expected
+    assert repo.count(criteria_) == len(expected)
+
+
+@pytest.mark.parametrize('criteria_,kwargs,expected', (
+    (None, {'order_by': '-id', 'limit': 3}, [7, 6, 5]),
+    (None, {'order_by': 'value', 'limit': 2, 'offset': 1}, [1, 7]),
+    (SomeEntity.value_equal('d'), {'order_by': '-id'}, [6, 0]),
+    (
+        SomeEntity.value_greater_than('a') & ~SomeEntity.value_equal('d'),
+        {'order_by': 'value', 'limit': 3, 'offset': 1},
+        [7, 4, 2],
+    ),
+))
+def test_sqlite_repo_find(criteria_, kwargs, expected):
+    repo = SomeSQLiteRepo()
+    repo.save(*(
+        SomeEntity(id_, value)
+        for id_, value in enumerate('dbeacfdb')
+    ))
+
+    assert ids(repo.find(criteria_, **kwargs)) == expected
+
+
+def test_sqlite_repo_save_and_remove():
+    repo = SomeSQLiteRepo()
+    instance = SomeEntity(1, 'a')
+    repo.save(instance, SomeEntity(2, 'b'))
+
+    instance.value = 'c'
+    repo.save(instance)
+    assert repo.get(1).value == 'c'
+    assert repo.count(SomeEntity.value_equal('a')) == 0
+
+    repo.remove(instance)
+    repo.remove_by_id(2)
+    assert repo.get(1) is None
+    assert repo.count() == 0
+
+
+def make_bulk_repo(kind, tmp_path):
+    if kind == 'shelve':
+        repo = ShelveRepo[SomeEntity, int](str(tmp_path / 'bulk'))
+    elif kind == 'sqlite':
+        repo = SomeSQLiteRepo()
+    elif kind == 'snapshot':
+        repo = HashIndexedRepo(isolation=Isolation.SNAPSHOT)
+    else:
+        repo = HashIndexedRepo()
+    repo.save(*(
+        SomeEntity(id_, value)
+        for id_, value in enumerate('dbeacfdb')
+    ))
+    return repo
+
+
+BULK_REPOS = ('in_memory', 'snapshot', 'shelve', 'sqlite')
+
+
+@pytest.mark.parametrize('kind', BULK_REPOS)
+def test_bulk_operations(kind, tmp_path):
+    repo = make_bulk_repo(kind, tmp_path)
+
+    found = repo.get_many([3, 100, 0])
+    assert list(found) == [3, 0]
+    assert found[3].value == 'a'
+
+    assert repo.update_by(SomeEntity.value_equal('d'), {'value': 'z'}) == 2
+    assert sorted(ids(repo.find(SomeEntity.value_equal('z')))) == [0, 6]
+    assert repo.count(SomeEntity.value_equal('d')) == 0
+
+    assert repo.remove_by(SomeEntity.value_greater_than('c')) == 4
+    assert sorted(ids(repo.find(None))) == [1, 3, 4, 7]
+
+
+@pytest.mark.parametrize('kind', BULK_REPOS)
+def test_change_set(kind, tmp_path):
+    repo = make_bulk_repo(kind, tmp_path)
+    flushes = []
+    flush = repo.flush
+    repo.flush = lambda *args: flushes.append(args) or flush(*args)
+
+    with ChangeSet() as changes:
+        changes.add(repo, SomeEntity(10, 'x'), SomeEntity(11, 'y'))
+        # Снимки SNAPSHOT неизменяемы, меняется копия
+        changed = copy_object(repo.get(1))
+        changed.value = 'w'
+        changes.update(repo, changed)
+        changes.remove(repo, SomeEntity(11, 'y'))
+        changes.remove_by_id(repo, 2, 3)
+
+    assert len(flushes) == 1
+    assert repo.get(10).value == 'x'
+    assert repo.get(1).value == 'w'
+    assert repo.count() == 7
+    assert not repo.exists(SomeEntity.value_equal('y'))
+    assert repo.get_many([2, 3, 11]) == {}
+
+
+def test_change_set_is_discarded_on_error(in_memory_repo):
+    with pytest.raises(ZeroDivisionError):
+        with ChangeSet() as changes:
+            changes.add(in_memory_repo, SomeEntity(1, 'a'))
+            1 / 0
+
+    assert in_memory_repo.count() == 0
+    assert not changes
+
+
+class PagedRepo(InMemoryRepo[SomeEntity, int]):
+    indexes = (SortedIndex('value'), HashIndex('id'))
+
+    @translate_for(SomeEntity.value_equal)
+    def _value_equal(self, criteria_):
+        return self.index('value').equal(*criteria_.args)
+
+
+class SortedRepo(InMemoryRepo[SomeEntity, int]):
+    storage = SortedStorage
+
+
+def read_pages(repo, criteria_, order_by, limit):
+    pages = []
+    page = repo.find_page(criteria_, order_by=order_by, limit=limit)
+    pages.append(ids(page.items))
+    while page.next is not None:
+        page = repo.find_page(
+            criteria_, order_by=order_by, limit=limit, after=page.next,
+        )
+        pages.append(ids(page.items))
+    return pages
+
+
+@pytest.mark.parametrize('repo_cls', (
+    InMemoryRepo[SomeEntity, int], PagedRepo, SortedRepo, SomeSQLiteRepo,
+))
+@pytest.mark.parametrize('criteria_,order_by,expected', (
+    (None, None, [[0, 1, 2], [3, 4, 5], [6, 7]]),
+    (None, 'value', [[3, 1, 7], [4, 0, 6], [2, 5]]),
+    (SomeEntity.value_greater_than('b'), 'value', [[4, 0, 6], [2, 5]]),
+    (SomeEntity.value_equal('b'), 'value', [[1, 7]]),
+))
+def test_find_page(repo_cls, criteria_, order_by, expected):
+    repo = repo_cls()
+    repo.save(*(
+        SomeEntity(id_, value)
+        for id_, value in enumerate('dbeacfdb')
+    ))
+
+    assert read_pages(repo, criteria_, order_by, limit=3) == expected
+    assert ids(repo.iter_find(
+        criteria_, order_by=order_by, batch_size=3,
+    )) == [id_ for page in expected for id_ in page]
+
+
+@pytest.mark.parametrize('repo_cls', (
+    InMemoryRepo[SomeEntity, int], PagedRepo, SortedRepo, SomeSQLiteRepo,
+))
+def test_find_page_descending(repo_cls):
+    repo = repo_cls()
+    repo.save(*(
+        SomeEntity(id_, value)
+        for id_, value in enumerate('dbeacfdb')
+    ))
+
+    pages = read_pages(repo, None, '-value', limit=3)
+    found = [id_ for page in pages for id_ in page]
+
+    assert [len(page) for page in pages] == [3, 3, 2]
+    assert sorted(found) == list(range(8))
+    assert [repo.get(id_).value for id_ in found] == sorted('dbeacfdb')[::-1]
+
+
+def test_cursor_survives_changes_between_pages():
+    repo = PagedRepo()
+    repo.save(*(SomeEntity(id_, value) for id_, value in enumerate('abcdef')))
+
+    page = repo.find_page(None, order_by='value', limit=2)
+    repo.save(SomeEntity(10, 'a'))
+    repo.remove_by_id(2)
+
+    assert ids(repo.find_page(
+        None, order_by='value', limit=2, after=page.next,
+    ).items) == [3, 4]
+
+    with pytest.raises(ValueError):
+        repo.find_page(None, order_by='-value', after=page.next)
+
+
+def test_sorted_list(monkeypatch):
+    # Маленькие блоки, чтобы проверить их разбиение и удаление
+    monkeypatch.setattr(SortedList, 'load', 4)
+    random.seed(0)
+
+    items = SortedList()
+    expected = []
+    for __ in range(500):
+        item = random.randrange(100)
+        if item in expected and random.random() < 0.5:
+            items.discard(item)
+            expected.remove(item)
+        else:
+            items.add(item)
+            expected.append(item)
+    expected.sort()
+
+    assert list(items) == expected and len(items) == len(expected)
+    assert list(items.irange(10, 20)) == [
+        item for item in expected if 10 <= item <= 20
+    ]
+    assert list(items.irange(10, 20, False, False, reverse=True)) == [
+        item for item in reversed(expected) if 10 < item < 20
+    ]
+    assert list(items.irange(high=-1)) == []
+    assert list(items.irange(low=expected[-1], reverse=True)) == [
+        expected[-1],
+    ] * expected.count(expected[-1])
+
+
+def test_sorted_storage():
+    repo = SortedRepo(isolation=Isolation.NONE)
+    repo.save(*(SomeEntity(id_, 'a') for id_ in (5, 3, 9, 1, 7)))
+    repo.remove_by_id(3)
+    repo.save(SomeEntity(4, 'b'))
+
+    assert list(repo.objects) == [5, 9, 1, 7, 4]
+    assert repo.objects.range(2, 7, include_high=False) == [4, 5]
+    assert ids(repo.find(None, order_by='id', offset=1, limit=2)) == [4, 5]
+    assert ids(repo.find(
+        SomeEntity.value_equal('a'), order_by='-id', limit=2,
+    )) == [9, 7]
+    assert repo.count() == 5
+    assert repo.exists(SomeEntity.value_equal('b'))
+    assert not repo.exists(SomeEntity.value_equal('c'))
+
+
+@pytest.fixture
+def concurrent_repo():
+    repo = PagedRepo(isolation=Isolation.SNAPSHOT, concurrent=True)
+    repo.save(*(SomeEntity(id_, value) for id_, value in enumerate('abc')))
+    return repo
+
+
+def test_concurrent_readers_see_a_snapshot(concurrent_repo):
+    found = concurrent_repo.find(None)
+    first = next(found)
+
+    concurrent_repo.save(SomeEntity(3, 'd'))
+    concurrent_repo.remove_by_id(1)
+    concurrent_repo.update_by(SomeEntity.value_equal('c'), {'value': 'x'})
+
+    assert [first.id, *ids(found)] == [0, 1, 2]
+    assert first.value == 'a'
+    assert sorted(ids(concurrent_repo.find(None))) == [0, 2, 3]
+    assert ids(concurrent_repo.find(SomeEntity.value_equal('x'))) == [2]
+
+
+def test_concurrent_writes_are_atomic(concurrent_repo):
+    with pytest.raises(KeyError):
+        concurrent_repo.flush([SomeEntity(3, 'd')], [10])
+
+    assert concurrent_repo.count() == 3
+    assert concurrent_repo.count(SomeEntity.value_equal('d')) == 0
+
+
+class IdRangeRepo(InMemoryRepo[SomeEntity, int]):
+    storage = SortedStorage
+
+    @translate_for(SomeEntity.value_greater_than)
+    def _value_greater_than(self, criteria_):
+        # Запись, опубликованная во время трансляции
+        self.save(SomeEntity(100, 'z'))
+        objects = self.objects
+        return [
+            id_ for id_ in objects.range()
+            if objects[id_].value > criteria_.args[0]
+        ]
+
+
+def test_snapshots_are_read_only():
+    repo = PagedRepo(isolation=Isolation.SNAPSHOT)
+    saved = SomeEntity(1, 'a')
+    repo.save(saved)
+    saved.value = 'b'
+
+    snapshot = repo.get(1)
+    assert isinstance(snapshot, SomeEntity)
+    assert snapshot.value == 'a'
+    with pytest.raises(FrozenInstanceError):
+        snapshot.value = 'c'
+    assert next(repo.find(None)) is snapshot
+
+    changed = copy_object(snapshot)
+    changed.value = 'c'
+    repo.save(changed)
+    assert repo.get(1).value == 'c'
+    assert pickle.loads(pickle.dumps(repo.get(1))).value == 'c'
+
+    repo.update_by(SomeEntity.value_equal('c'), {'value': 'd'})
+    assert snapshot.value == 'a'
+    with pytest.raises(FrozenInstanceError):
+        repo.get(1).value = 'e'
+
+
+def test_translators_see_the_pinned_version():
+    repo = IdRangeRepo(isolation=Isolation.SNAPSHOT, concurrent=True)
+    repo.save(SomeEntity(1, 'a'), SomeEntity(2, 'b'))
+
+    found = repo.find(SomeEntity.value_greater_than('a'))
+    assert ids(found) == [2]
+    assert repo.count() == 3
+
+
+def test_concurrent_threads(concurrent_repo):
+    errors = []
+
+    def write():
+        for id_ in range(3, 300):
+            concurrent_repo.save(SomeEntity(id_, 'b'))
+            if id_ % 3 == 0:
+                concurrent_repo.remove_by_id(id_)
+
+    def read():
+        try:
+            for __ in range(100):
+                count = concurrent_repo.count(SomeEntity.value_equal('b'))
+                assert len(list(concurrent_repo.find(None))) >= 3
+                assert count >= 1
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=write)]
+    threads += [threading.Thread(target=read) for __ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert concurrent_repo.count() == 3 + 297 - 99
@@ -0,0 +1,113 @@
+from dataclasses import dataclass
+
+import pytest
+
+from classic.domain.core import Batch, Criteria, criteria, vectorization
+from classic.domain.core.criteria import ReturnsTrue, ReturnsFalse
+
+
+@dataclass
+class Item:
+    price: int
+    name: str
+
+
+vector_calls = []
+
+
+@criteria
+def cheaper_than(item, price):
+    return item.price < price
+
+
+@cheaper_than.vectorized
+def cheaper_than(items, price):
+    vector_calls.append(price)
+    return items['price'] < price
+
+
+@criteria
+def named(item, name):
+    return item.name == name
+
+
+class PriceIsEven(Criteria[Item]):
+
+    def is_satisfied_by(self, candidate: Item) -> bool:
+        return candidate.price % 2 == 0
+
+
+ITEMS = [Item(price, name) for price, name in zip(range(10), 'abcabcabca')]
+
+
+@pytest.fixture(params=('numpy', 'pure python'))
+def backend(request, monkeypatch):
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(vectorization, 'numpy', None)
+    vector_calls.clear()
+    return request.param
+
+
+@pytest.mark.parametrize('criteria_', (
+    cheaper_than(5),
+    named('a'),
+    PriceIsEven(),
+    cheaper_than(5) & named('a'),
+    cheaper_than(5) | named('a') | PriceIsEven(),
+    cheaper_than(5) ^ PriceIsEven(),
+    ~(cheaper_than(8) & ~named('b')),
+    named('z') & cheaper_than(3),
+    cheaper_than(3) & ReturnsTrue(),
+    cheaper_than(3) | ReturnsFalse(),
+))
+def test_filter_many_matches_filter(backend, criteria_):
+    assert criteria_.filter_many(ITEMS) == list(filter(criteria_, ITEMS))
+
+
+def test_vectorized_predicate_used_with_numpy(backend):
+    assert cheaper_than(3).filter_many(ITEMS) == ITEMS[:3]
+    assert vector_calls == ([3] if backend == 'numpy' else [])
+
+
+def test_and_stops_on_empty_mask(backend):
+    assert (named('z') & cheaper_than(3)).filter_many(ITEMS) == []
+    assert vector_calls == []
+
+
+def test_batch_from_columns(backend):
+    batch = Batch.from_columns(price=[1, 5, 2], name=['a', 'b', 'a'])
+
+    assert list((cheaper_than(3) & named('a')).mask(batch)) == [
+        True, False, True,
+    ]
+    assert [row.price for row in PriceIsEven().filter_many(batch)] == [2]
+
+
+@criteria
+def not_none(item):
+    return item is not None
+
+
+@criteria
+def greater_than(item, value):
+    return item > value
+
+
+def test_later_criteria_see_only_undecided_rows(backend):
+    guarded = not_none() & greater_than(3)
+    assert guarded.filter_many([None, 5, 1]) == [5]
+    assert (~not_none() | greater_than(3)).filter_many([None, 5, 1]) == [
+        None, 5,
+    ]
+
+
+def test_batch_take(backend):
+    batch = Batch(ITEMS[:4])
+    batch.column('price')
+    taken = batch.take(PriceIsEven().mask(batch))
+
+    assert len(taken) == 2
+    assert list(taken['price']) == [0, 2]
+    assert [item.name for item in taken.rows()] == ['a', 'c']